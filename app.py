@@ -2,8 +2,20 @@ from flask import Flask, render_template, request, jsonify, session, Response
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
-import uuid
-from ollama.debate_generator import stream_debate
+from ollama.debate_generator import (
+    DEBATE_EXPIRED_MESSAGE, DEBATE_SETTINGS_MISSING_MESSAGE, debate_arguments, debate_notice_events,
+    debate_settings, debate_slots, stream_debate
+)
+from chat_service import ChatService, sse_event
+from chatbot.web.bot_registry import get_page_config
+from context_window import create_context_window
+from conversation_store import create_conversation_store
+from response_cache import create_response_cache
+from metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from debate_runs import create_debate_runs, parse_last_event_id
+from ollama.warmup import create_model_warmers, warmup_status
+from debate_replay import create_debate_replay_cache, make_debate_key, replay_events, replay_speed
+from single_flight import SingleFlight
 
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
@@ -17,6 +29,36 @@ client = OpenAI(
     api_key=os.getenv('OPENAI_API_KEY')
 )
 
+# 대화 내역 저장소 (쿠키 세션에는 세션 ID만 저장)
+conversation_store = create_conversation_store()
+
+# 대화형 봇이 보내는 대화 내역을 토큰 예산 안으로 유지합니다 (오래된 턴은 요약)
+context_window = create_context_window()
+
+# 번역/요약/질문 생성 봇의 응답 캐시
+response_cache = create_response_cache()
+
+# 동시에 들어온 같은 요청을 하나의 업스트림 호출로 합칩니다
+single_flight = SingleFlight()
+
+# /api/chat, /api/chat-stream 처리 (대화 내역, 응답 캐시, 요청 합치기는 chat_service.py)
+chat_service = ChatService(client, conversation_store, context_window, response_cache, single_flight)
+
+# 토론 실행 저장소 (재연결하면 재생 버퍼에서 이어 받습니다)
+debate_runs = create_debate_runs()
+
+# 끝난 토론의 재생 캐시 (DEBATE_REPLAY_PATH가 없으면 None)
+debate_replay = create_debate_replay_cache()
+
+# Ollama 모델을 미리 적재하고 keep_alive를 주기적으로 갱신합니다
+# (import만 하는 스크립트나 reloader의 감시 프로세스에서는 시작하지 않도록 첫 요청 때 시작)
+model_warmers = create_model_warmers()
+
+@app.before_request
+def start_model_warmers():
+    for warmer in model_warmers:
+        warmer.start()  # 이미 시작했으면 아무 일도 하지 않습니다
+
 @app.route('/')
 def index():
     """메인 페이지 - 챗봇 목록"""
@@ -25,224 +67,52 @@ def index():
 @app.route('/chatbot/<bot_type>')
 def chatbot_page(bot_type):
     """각 챗봇 페이지"""
-    bot_configs = {
-        'chat': {
-            'title': '10줄 대화 챗봇',
-            'description': '최대 10줄까지 자연스러운 대화를 나눌 수 있습니다.',
-            'placeholder': '안녕하세요! 무엇이든 물어보세요.'
-        },
-        'translator': {
-            'title': '번역 봇',
-            'description': '다양한 언어로 텍스트를 번역해드립니다.',
-            'placeholder': '번역할 텍스트를 입력하세요. 예: "안녕하세요" -> 영어'
-        },
-        'summarizer': {
-            'title': '요약 봇',
-            'description': '긴 텍스트를 핵심 내용으로 요약해드립니다.',
-            'placeholder': '요약할 텍스트를 입력하세요.'
-        },
-        'question': {
-            'title': '질문 생성 봇',
-            'description': '주어진 주제로 다양한 질문을 생성합니다.',
-            'placeholder': '질문을 생성할 주제나 텍스트를 입력하세요.'
-        },
-        'coding': {
-            'title': '코딩 도우미 봇',
-            'description': '프로그래밍 질문에 답하고 코드 도움을 제공합니다.',
-            'placeholder': '프로그래밍 질문을 입력하세요.'
-        },
-        'diary': {
-            'title': '일기 작성 봇',
-            'description': '하루 경험을 바탕으로 아름다운 일기를 작성해줍니다.',
-            'placeholder': '오늘 하루 있었던 일을 말해주세요.'
-        },
-        'debate': {
-            'title': 'AI 토론 봇',
-            'description': '두 AI가 주어진 주제에 대해 토론하는 것을 지켜보세요.',
-            'placeholder': ''
-        }
-    }
-
-    config = bot_configs.get(bot_type, {
-        'title': '챗봇',
-        'description': '챗봇 서비스',
-        'placeholder': '메시지를 입력하세요.'
-    })
-
+    config = get_page_config(bot_type)
     return render_template('chatbot.html', bot_type=bot_type, config=config)
 
 @app.route('/api/chat', methods=['POST'])
 def chat_api():
     """채팅 API 엔드포인트"""
-    data = request.json
-    bot_type = data.get('bot_type')
-    message = data.get('message')
-
-    # 세션에서 대화 내역 가져오기 (10줄 챗봇용)
-    conversation_key = f'conversation_{bot_type}'
-    if conversation_key not in session:
-        session[conversation_key] = []
-
-    try:
-        if bot_type == 'chat':
-            # 10줄 대화 챗봇
-            conversation = session[conversation_key]
-
-            # 10줄 제한 확인
-            if len(conversation) >= 20:  # user + assistant = 2 * 10
-                return jsonify({
-                    'response': '10줄 대화가 완료되었습니다. 새로운 대화를 시작하려면 페이지를 새로고침하세요.',
-                    'finished': True
-                })
-
-            # 사용자 메시지 추가
-            conversation.append({"role": "user", "content": message})
-
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "당신은 친근하고 도움이 되는 한국어 대화 파트너입니다. 간단하고 명확하게 답변해주세요."}
-                ] + conversation,
-                max_tokens=150,
-                temperature=0.7
-            )
-
-            ai_response = response.choices[0].message.content
-            conversation.append({"role": "assistant", "content": ai_response})
-            session[conversation_key] = conversation
-
-            turn_count = len(conversation) // 2
-            return jsonify({
-                'response': ai_response,
-                'turn_count': f"{turn_count}/10"
-            })
-
-        elif bot_type == 'translator':
-            # 번역 봇
-            # 메시지에서 텍스트와 목표 언어 추출 시도
-            if '->' in message:
-                parts = message.split('->')
-                text_to_translate = parts[0].strip()
-                target_language = parts[1].strip()
-            else:
-                text_to_translate = message
-                target_language = "영어"  # 기본값
-
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"당신은 전문 번역가입니다. 주어진 텍스트를 {target_language}로 정확하게 번역해주세요. 번역 결과만 제공하고, 추가 설명은 하지 마세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"다음 텍스트를 {target_language}로 번역해주세요: {text_to_translate}"
-                    }
-                ],
-                max_tokens=200,
-                temperature=0.3
-            )
-
-            return jsonify({'response': response.choices[0].message.content})
-
-        elif bot_type == 'summarizer':
-            # 요약 봇
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 텍스트 요약 전문가입니다. 주어진 텍스트의 핵심 내용을 3-5문장으로 요약해주세요. 중요한 정보는 빠뜨리지 말고, 불필요한 세부사항은 제거해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"다음 텍스트를 요약해주세요: {message}"
-                    }
-                ],
-                max_tokens=300,
-                temperature=0.5
-            )
-
-            return jsonify({'response': response.choices[0].message.content})
-
-        elif bot_type == 'question':
-            # 질문 생성 봇
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 교육 전문가이자 질문 생성 전문가입니다. 주어진 텍스트나 주제를 바탕으로 이해도 확인, 토론 유도, 창의적 사고 등 다양한 목적의 질문을 5-7개 생성해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"다음 내용을 바탕으로 다양한 질문들을 생성해주세요: {message}"
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-
-            return jsonify({'response': response.choices[0].message.content})
-
-        elif bot_type == 'coding':
-            # 코딩 도우미 봇
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 다양한 프로그래밍 언어에 능통한 코딩 멘토입니다. 명확하고 이해하기 쉬운 설명과 함께 실제 동작하는 코드 예시, 모범 사례를 제공해주세요. 초보자도 이해할 수 있도록 단계별로 설명해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ],
-                max_tokens=800,
-                temperature=0.3
-            )
-
-            return jsonify({'response': response.choices[0].message.content})
-
-        elif bot_type == 'diary':
-            # 일기 작성 봇
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 감정적으로 공감하고 아름다운 글을 쓰는 일기 작성 도우미입니다. 사용자의 하루 경험을 바탕으로 자연스럽고 따뜻한 느낌의 개인적인 일기를 작성해주세요. 사용자의 경험과 감정을 진정성 있게 담아내고, 읽었을 때 따뜻하고 위로가 되는 느낌으로 작성해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"오늘의 경험을 바탕으로 일기를 작성해주세요: {message}"
-                    }
-                ],
-                max_tokens=600,
-                temperature=0.7
-            )
-
-            return jsonify({'response': response.choices[0].message.content})
+    return jsonify(chat_service.chat(request.json, session))
+
+@app.route('/api/chat-stream', methods=['POST'])
+def chat_stream_api():
+    """채팅 스트리밍 API - 생성되는 토큰을 SSE로 바로 전달합니다."""
+    return Response(chat_service.chat_stream(request.json, session), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/stats')
+def api_stats():
+    """응답 캐시 적중률과 요청 합치기(single-flight) 통계"""
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'single_flight': single_flight.stats(),
+        'debate_runs': debate_runs.stats(),
+        'persona_cache': persona_cache.stats() if persona_cache is not None else None,
+        'debate_replay': debate_replay.stats() if debate_replay is not None else None
+    })
 
-        else:
-            return jsonify({'error': '지원하지 않는 봇 타입입니다.'})
+@app.route('/metrics')
+def prometheus_metrics():
+    """봇/모델별 LLM 호출 지표 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
-    except Exception as e:
-        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'})
+@app.route('/api/model-status')
+def model_status():
+    """Ollama 모델 예열 상태와 적재 시간. 아직 적재되지 않았으면 503을 반환합니다. (준비 상태 확인용)"""
+    status = warmup_status(model_warmers)
+    return jsonify(status), 200 if status['ready'] else 503
 
-from ollama.persona_generator import generate_personas
+from ollama.persona_generator import generate_personas, persona_cache, stream_personas
 
 @app.route('/api/reset/<bot_type>', methods=['POST'])
 def reset_conversation(bot_type):
     """대화 초기화"""
-    conversation_key = f'conversation_{bot_type}'
-    if conversation_key in session:
-        del session[conversation_key]
+    chat_service.reset(session, bot_type)
     # 토론 봇 세션 정보도 초기화
     if 'debate_settings' in session:
         del session['debate_settings']
+    session.pop('debate_run_id', None)
     return jsonify({'status': 'success'})
 
 # --- AI 토론 봇을 위한 새로운 API들 ---
@@ -255,38 +125,93 @@ def api_generate_personas():
     if not topic:
         return jsonify({'error': '토픽이 제공되지 않았습니다.'}), 400
     
-    personas = generate_personas(topic)
+    # 같은 주제의 페르소나 생성이 진행 중이면 그 결과를 함께 받습니다
+    # force이면("페르소나 재생성") 캐시를 건너뛰고 새로 생성합니다
+    force = bool(data.get('force'))
+    flight_key = f"personas:{'force:' if force else ''}{topic.strip()}"
+    personas = single_flight.do(flight_key, lambda: generate_personas(topic, force=force))
     return jsonify(personas)
 
+@app.route('/api/generate-personas-stream', methods=['POST'])
+def api_generate_personas_stream():
+    """
+    페르소나를 SSE로 생성합니다. 각 페르소나의 설명이 완성되는 즉시 보내므로
+    persona1은 persona2의 생성이 끝나기 전에 화면에 나타납니다. (이벤트 형식은 stream_personas 참고)
+    """
+    data = request.json
+    topic = data.get('topic')
+    if not topic:
+        return jsonify({'error': '토픽이 제공되지 않았습니다.'}), 400
+
+    force = bool(data.get('force'))
+    flight_key = f"personas-stream:{'force:' if force else ''}{topic.strip()}"
+    events = single_flight.stream(flight_key, lambda: stream_personas(topic, force=force))
+
+    def generate():
+        for event in events:
+            yield sse_event(event)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/prepare-debate', methods=['POST'])
 def prepare_debate():
-    """토론 시작 전, 주제와 페르소나를 세션에 저장합니다."""
-    data = request.json
-    session['debate_settings'] = {
-        'topic': data.get('topic'),
-        'persona1': data.get('persona1'),
-        'persona2': data.get('persona2')
-    }
+    """토론 시작 전, 주제와 페르소나, 진행 옵션(라운드 수, 형식, 동시 호출 수)을 세션에 저장합니다."""
+    try:
+        session['debate_settings'] = debate_settings(request.json)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    session.pop('debate_run_id', None)
     return jsonify({'status': 'success'})
 
 @app.route('/api/debate-stream')
 def debate_stream():
-    """세션에 저장된 정보로 AI 토론 스트리밍을 시작합니다."""
-    settings = session.get('debate_settings')
-    if not settings:
-        def error_generate():
-            yield "data: <p style='color: red;'>토론 설정이 만료되었거나 없습니다. 페이지를 새로고침하여 다시 시도해주세요.</p>\n\n"
-        return Response(error_generate(), mimetype='text/event-stream')
+    """
+    세션에 저장된 정보로 AI 토론을 시작하고 이벤트를 스트리밍합니다.
+    브라우저가 Last-Event-ID와 함께 재연결하면(또는 ?run=<id>) 새로 생성하지 않고
+    진행 중이거나 끝난 토론을 재생 버퍼에서 이어서 보냅니다.
+    """
+    last_event_id = request.headers.get('Last-Event-ID')
+    run_id = request.args.get('run') or (session.get('debate_run_id') if last_event_id else None)
+
+    if run_id:
+        run = debate_runs.get(run_id)
+        if run is None:
+            return Response(''.join(map(sse_event, debate_notice_events(DEBATE_EXPIRED_MESSAGE))),
+                            mimetype='text/event-stream')
+    else:
+        settings = session.get('debate_settings')
+        if not settings:
+            return Response(''.join(map(sse_event, debate_notice_events(DEBATE_SETTINGS_MISSING_MESSAGE))),
+                            mimetype='text/event-stream')
+
+        model = os.getenv("OLLAMA_MODEL")
+        replay_key = make_debate_key(model, settings)
+        cached_events = None
+        if debate_replay is not None and not settings.get('fresh'):
+            cached_events = debate_replay.get(replay_key)
+
+        # 생성(또는 재생)은 연결과 별개로 백그라운드에서 진행되고, 이벤트는 재생 버퍼에 쌓입니다
+        if cached_events is not None:
+            # 같은 설정으로 끝난 토론이 있으면 업스트림 호출 없이 저장된 발언을 재생합니다
+            metrics.record_cache_hit('debate')
+            run = debate_runs.start(lambda: replay_events(cached_events, replay_speed()), slots=0)
+        else:
+            def start():
+                events = stream_debate(**debate_arguments(settings))
+                return events if debate_replay is None else debate_replay.record(replay_key, events)
+
+            # 모델의 업스트림 슬롯이 모자라면 차례가 올 때까지 queued 이벤트로 대기 순번을 보냅니다
+            run = debate_runs.start(start, model=model, slots=debate_slots(settings))
+        session['debate_run_id'] = run.id
 
     def generate():
-        for content_part in stream_debate(
-            topic=settings['topic'], 
-            persona1=settings['persona1'], 
-            persona2=settings['persona2']
-        ):
-            yield f"data: {content_part}\n\n"
-            
-    return Response(generate(), mimetype='text/event-stream')
+        for event_id, event in run.subscribe(parse_last_event_id(last_event_id)):
+            # 발언 시작/끝과 토큰 조각을 id가 붙은 JSON 이벤트로 전달합니다
+            yield sse_event(event, event_id)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Debate-Run-Id': run.id})
 
 if __name__ == '__main__':
     # 캐시 비활성화를 위한 설정
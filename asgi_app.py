@@ -0,0 +1,230 @@
+"""
+비동기(ASGI) 서빙 모드
+
+app.py와 같은 화면과 API를 Quart(Flask 호환 비동기 프레임워크)와 AsyncOpenAI로 제공합니다.
+LLM 응답을 기다리는 동안 워커 스레드를 점유하지 않으므로, 한 프로세스가
+수백 개의 동시 업스트림 호출을 처리할 수 있습니다.
+
+실행 방법:
+hypercorn asgi_app:app --bind 127.0.0.1:8000
+"""
+
+from quart import Quart, render_template, request, jsonify, session, Response
+import asyncio
+import os
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+from ollama.debate_generator import (
+    DEBATE_EXPIRED_MESSAGE, DEBATE_SETTINGS_MISSING_MESSAGE, astream_debate, debate_arguments,
+    debate_notice_events, debate_settings, debate_slots
+)
+from ollama.persona_generator import agenerate_personas, astream_personas, persona_cache
+from chat_service import AsyncChatService, sse_event
+from chatbot.web.bot_registry import get_page_config
+from context_window import create_context_window
+from conversation_store import create_conversation_store
+from response_cache import create_response_cache
+from metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from debate_runs import create_debate_runs, parse_last_event_id
+from ollama.warmup import create_model_warmers, warmup_status
+from debate_replay import create_debate_replay_cache, make_debate_key, areplay_events, replay_speed
+from single_flight import AsyncSingleFlight
+
+# .env 파일에서 환경변수를 로드합니다
+load_dotenv()
+
+# Quart 앱 초기화 (app.py와 같은 세션 키 사용)
+app = Quart(__name__)
+app.secret_key = 'your-secret-key-here'
+# 토론 스트리밍은 수 분이 걸릴 수 있으므로 응답 시간 제한을 두지 않습니다
+app.config['RESPONSE_TIMEOUT'] = None
+
+# AsyncOpenAI 클라이언트 초기화 (커넥션 풀을 모든 요청이 공유)
+client = AsyncOpenAI(
+    api_key=os.getenv('OPENAI_API_KEY')
+)
+
+# 대화 내역 저장소 (쿠키 세션에는 세션 ID만 저장)
+conversation_store = create_conversation_store()
+
+# 대화형 봇이 보내는 대화 내역을 토큰 예산 안으로 유지합니다 (오래된 턴은 요약)
+context_window = create_context_window()
+
+# 번역/요약/질문 생성 봇의 응답 캐시
+response_cache = create_response_cache()
+
+# 동시에 들어온 같은 요청을 하나의 업스트림 호출로 합칩니다
+single_flight = AsyncSingleFlight()
+
+# /api/chat, /api/chat-stream 처리 (대화 내역, 응답 캐시, 요청 합치기는 chat_service.py)
+chat_service = AsyncChatService(client, conversation_store, context_window, response_cache, single_flight)
+
+# 토론 실행 저장소 (재연결하면 재생 버퍼에서 이어 받습니다)
+debate_runs = create_debate_runs(use_async=True)
+
+# 끝난 토론의 재생 캐시 (DEBATE_REPLAY_PATH가 없으면 None)
+# SQLite 파일을 읽으므로 asyncio.to_thread로 호출하여 이벤트 루프를 막지 않습니다
+debate_replay = create_debate_replay_cache()
+
+# Ollama 모델을 미리 적재하고 keep_alive를 주기적으로 갱신합니다 (서버가 시작될 때 시작)
+model_warmers = create_model_warmers()
+
+@app.before_serving
+async def start_model_warmers():
+    for warmer in model_warmers:
+        warmer.start()
+
+@app.route('/')
+async def index():
+    """메인 페이지 - 챗봇 목록"""
+    return await render_template('index.html')
+
+@app.route('/chatbot/<bot_type>')
+async def chatbot_page(bot_type):
+    """각 챗봇 페이지"""
+    config = get_page_config(bot_type)
+    return await render_template('chatbot.html', bot_type=bot_type, config=config)
+
+@app.route('/api/chat', methods=['POST'])
+async def chat_api():
+    """채팅 API 엔드포인트"""
+    return jsonify(await chat_service.chat(await request.get_json(), session))
+
+@app.route('/api/chat-stream', methods=['POST'])
+async def chat_stream_api():
+    """채팅 스트리밍 API - 생성되는 토큰을 SSE로 바로 전달합니다."""
+    body = await chat_service.chat_stream(await request.get_json(), session)
+    return Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/stats')
+async def api_stats():
+    """응답 캐시 적중률과 요청 합치기(single-flight) 통계"""
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'single_flight': single_flight.stats(),
+        'debate_runs': debate_runs.stats(),
+        'persona_cache': persona_cache.stats() if persona_cache is not None else None,
+        'debate_replay': await asyncio.to_thread(debate_replay.stats) if debate_replay is not None else None
+    })
+
+@app.route('/metrics')
+async def prometheus_metrics():
+    """봇/모델별 LLM 호출 지표 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/model-status')
+async def model_status():
+    """Ollama 모델 예열 상태와 적재 시간. 아직 적재되지 않았으면 503을 반환합니다. (준비 상태 확인용)"""
+    status = warmup_status(model_warmers)
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/api/reset/<bot_type>', methods=['POST'])
+async def reset_conversation(bot_type):
+    """대화 초기화"""
+    await chat_service.reset(session, bot_type)
+    # 토론 봇 세션 정보도 초기화
+    session.pop('debate_settings', None)
+    session.pop('debate_run_id', None)
+    return jsonify({'status': 'success'})
+
+# --- AI 토론 봇 API ---
+
+@app.route('/api/generate-personas', methods=['POST'])
+async def api_generate_personas():
+    """토픽을 받아 두 개의 대립하는 페르소나를 생성합니다."""
+    data = await request.get_json()
+    topic = data.get('topic')
+    if not topic:
+        return jsonify({'error': '토픽이 제공되지 않았습니다.'}), 400
+
+    # 같은 주제의 페르소나 생성이 진행 중이면 그 결과를 함께 받습니다
+    # force이면("페르소나 재생성") 캐시를 건너뛰고 새로 생성합니다
+    force = bool(data.get('force'))
+    flight_key = f"personas:{'force:' if force else ''}{topic.strip()}"
+    personas = await single_flight.do(flight_key, lambda: agenerate_personas(topic, force=force))
+    return jsonify(personas)
+
+@app.route('/api/generate-personas-stream', methods=['POST'])
+async def api_generate_personas_stream():
+    """
+    페르소나를 SSE로 생성합니다. 각 페르소나의 설명이 완성되는 즉시 보내므로
+    persona1은 persona2의 생성이 끝나기 전에 화면에 나타납니다. (이벤트 형식은 stream_personas 참고)
+    """
+    data = await request.get_json()
+    topic = data.get('topic')
+    if not topic:
+        return jsonify({'error': '토픽이 제공되지 않았습니다.'}), 400
+
+    force = bool(data.get('force'))
+    flight_key = f"personas-stream:{'force:' if force else ''}{topic.strip()}"
+    events = single_flight.stream(flight_key, lambda: astream_personas(topic, force=force))
+
+    async def generate():
+        async for event in events:
+            yield sse_event(event)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/prepare-debate', methods=['POST'])
+async def prepare_debate():
+    """토론 시작 전, 주제와 페르소나, 진행 옵션(라운드 수, 형식, 동시 호출 수)을 세션에 저장합니다."""
+    try:
+        session['debate_settings'] = debate_settings(await request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    session.pop('debate_run_id', None)
+    return jsonify({'status': 'success'})
+
+@app.route('/api/debate-stream')
+async def debate_stream():
+    """
+    세션에 저장된 정보로 AI 토론을 시작하고 이벤트를 스트리밍합니다.
+    브라우저가 Last-Event-ID와 함께 재연결하면(또는 ?run=<id>) 새로 생성하지 않고
+    진행 중이거나 끝난 토론을 재생 버퍼에서 이어서 보냅니다.
+    """
+    last_event_id = request.headers.get('Last-Event-ID')
+    run_id = request.args.get('run') or (session.get('debate_run_id') if last_event_id else None)
+
+    if run_id:
+        run = debate_runs.get(run_id)
+        if run is None:
+            return Response(''.join(map(sse_event, debate_notice_events(DEBATE_EXPIRED_MESSAGE))),
+                            mimetype='text/event-stream')
+    else:
+        settings = session.get('debate_settings')
+        if not settings:
+            return Response(''.join(map(sse_event, debate_notice_events(DEBATE_SETTINGS_MISSING_MESSAGE))),
+                            mimetype='text/event-stream')
+
+        model = os.getenv("OLLAMA_MODEL")
+        replay_key = make_debate_key(model, settings)
+        cached_events = None
+        if debate_replay is not None and not settings.get('fresh'):
+            cached_events = await asyncio.to_thread(debate_replay.get, replay_key)
+
+        # 생성(또는 재생)은 연결과 별개로 백그라운드에서 진행되고, 이벤트는 재생 버퍼에 쌓입니다
+        if cached_events is not None:
+            # 같은 설정으로 끝난 토론이 있으면 업스트림 호출 없이 저장된 발언을 재생합니다
+            metrics.record_cache_hit('debate')
+            run = debate_runs.start(lambda: areplay_events(cached_events, replay_speed()), slots=0)
+        else:
+            def start():
+                events = astream_debate(**debate_arguments(settings))
+                return events if debate_replay is None else debate_replay.arecord(replay_key, events)
+
+            # 모델의 업스트림 슬롯이 모자라면 차례가 올 때까지 queued 이벤트로 대기 순번을 보냅니다
+            run = debate_runs.start(start, model=model, slots=debate_slots(settings))
+        session['debate_run_id'] = run.id
+
+    async def generate():
+        async for event_id, event in run.subscribe(parse_last_event_id(last_event_id)):
+            # 발언 시작/끝과 토큰 조각을 id가 붙은 JSON 이벤트로 전달합니다
+            yield sse_event(event, event_id)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Debate-Run-Id': run.id})
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=8000)
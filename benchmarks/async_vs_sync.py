@@ -0,0 +1,149 @@
+"""
+동기(Flask) vs 비동기(ASGI) 서빙 비교 벤치마크
+
+모의 서버(mock_server.py)를 업스트림으로 두고, 같은 동시 요청을
+app.py(스레드 수가 고정된 WSGI 서버)와 asgi_app.py(hypercorn)에 보내
+처리량과 지연 시간을 나란히 비교합니다.
+
+실행 방법:
+python benchmarks/async_vs_sync.py --concurrency 200 --requests 400 --latency 2.0 --threads 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def serve_sync(port, threads):
+    """app.py를 동시 처리 스레드 수가 고정된 WSGI 서버로 실행합니다. (gunicorn --threads N과 유사)"""
+    from werkzeug.serving import BaseWSGIServer
+    from app import app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer('127.0.0.1', port, app).serve_forever()
+
+def wait_for_port(port, timeout=30):
+    """서버가 응답할 때까지 기다립니다."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"{port} 포트의 서버가 시작되지 않았습니다.")
+
+def post_chat(port, bot_type, message):
+    """/api/chat에 요청을 보내고 (성공 여부, 지연 시간)을 반환합니다."""
+    body = json.dumps({'bot_type': bot_type, 'message': message}).encode('utf-8')
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/chat",
+        data=body,
+        headers={'Content-Type': 'application/json'},
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            ok = 'error' not in json.loads(response.read())
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+def run_load(port, concurrency, total_requests):
+    """동시 요청을 보내고 처리량과 지연 시간 통계를 계산합니다."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda i: post_chat(port, 'translator', f"문장 {i} -> 영어"),
+            range(total_requests)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in results]
+    return {
+        'ok': sum(1 for ok, _ in results if ok),
+        'elapsed': elapsed,
+        'throughput': total_requests / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="동기 vs 비동기 서빙 벤치마크")
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=2.0, help="모의 업스트림 지연(초)")
+    parser.add_argument('--threads', type=int, default=8, help="동기 서버의 워커 스레드 수")
+    parser.add_argument('--serve-sync', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_sync:
+        serve_sync(args.serve_sync, args.threads)
+        return
+
+    mock_port, sync_port, async_port = 9100, 9101, 9102
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY='benchmark',
+        OPENAI_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        OLLAMA_MODEL='mock',
+    )
+    processes = [
+        subprocess.Popen([sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'),
+                          '--port', str(mock_port), '--latency', str(args.latency)], env=env, cwd=ROOT),
+        subprocess.Popen([sys.executable, __file__, '--serve-sync', str(sync_port),
+                          '--threads', str(args.threads)], env=env, cwd=ROOT,
+                         stderr=subprocess.DEVNULL),
+        subprocess.Popen([sys.executable, '-m', 'hypercorn', 'asgi_app:app', '--bind',
+                          f"127.0.0.1:{async_port}", '--backlog', '4096'], env=env, cwd=ROOT),
+    ]
+
+    try:
+        for port in (sync_port, async_port):
+            wait_for_port(port)
+
+        print(f"업스트림 지연 {args.latency}s, 동시 요청 {args.concurrency}, 총 요청 {args.requests}")
+        print(f"{'모드':<22}{'성공':>6}{'소요(s)':>10}{'req/s':>10}{'p50(s)':>10}{'p95(s)':>10}")
+        for name, port in ((f"sync Flask ({args.threads} threads)", sync_port),
+                           ("async ASGI (1 process)", async_port)):
+            stats = run_load(port, args.concurrency, args.requests)
+            print(f"{name:<22}{stats['ok']:>6}{stats['elapsed']:>10.2f}{stats['throughput']:>10.1f}"
+                  f"{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+토론 기억 모드 벤치마크: 라운드별 턴 지연 시간
+
+같은 토론을 전체 기록 모드와 기억 모드(DebateMemory)로 진행하면서
+턴마다 보낸 프롬프트 토큰 수와 지연 시간(요약 갱신 시간 포함)을 나란히 출력합니다.
+
+기본값으로는 프롬프트 길이에 비례해 느려지는 모의 서버(--prompt-rate)를 띄워 측정하고,
+--base-url을 주면 실제 Ollama 서버로 측정합니다.
+
+실행 방법:
+python benchmarks/debate_memory.py --rounds 8 --memory-turns 4
+python benchmarks/debate_memory.py --rounds 6 --base-url http://localhost:11434/v1 --model llama3.1
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai import OpenAI
+from async_vs_sync import wait_for_port
+from context_window import count_message_tokens
+from ollama.debate_generator import DebateState, refresh_memory
+from ollama.debate_memory import DebateMemory, persona_turns
+
+TOPIC = "AI 기술 발전은 인류에게 궁극적으로 이로운가?"
+PERSONA1 = "당신은 AI 기술의 열렬한 지지자입니다. 긍정적이고 미래지향적인 관점에서 주장을 펼치세요."
+PERSONA2 = "당신은 AI 기술에 대해 신중한 비평가입니다. 현실적이고 비판적인 관점에서 문제점을 지적하세요."
+
+def run_debate(client, model, rounds, memory_factory):
+    """토론을 끝까지 진행하고 턴별 (프롬프트 토큰 수, 지연 시간) 목록을 반환합니다."""
+    state = DebateState(TOPIC, PERSONA1, PERSONA2, rounds, memory_factory=memory_factory)
+    turns = []
+    while not state.finished:
+        start = time.perf_counter()
+        refresh_memory(state, client, model)
+        messages = state.messages_for_api()
+        response = client.chat.completions.create(model=model, messages=messages, stream=False)
+        turns.append((count_message_tokens(messages), time.perf_counter() - start))
+        state.record(response.choices[0].message.content)
+    return turns
+
+def main():
+    parser = argparse.ArgumentParser(description="토론 기억 모드의 턴별 지연 시간 벤치마크")
+    parser.add_argument('--rounds', type=int, default=8, help="토론 라운드 수 (턴 수 = 2 * 라운드)")
+    parser.add_argument('--memory-turns', type=int, default=4,
+                        help="기억 모드에서 그대로 보낼 최근 턴 수 (DEBATE_MEMORY_TURNS와 같이 두 페르소나 합산)")
+    parser.add_argument('--base-url', help="실제 OpenAI 호환 서버 주소 (없으면 모의 서버 사용)")
+    parser.add_argument('--model', default=os.getenv("OLLAMA_MODEL") or 'mock')
+    parser.add_argument('--prompt-rate', type=float, default=2000, help="모의 서버의 초당 프롬프트 토큰 처리량")
+    parser.add_argument('--reply-tokens', type=int, default=400, help="모의 서버의 발언 길이(토큰)")
+    parser.add_argument('--mock-port', type=int, default=9320)
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'), '--port', str(args.mock_port),
+             '--latency', '0.05', '--prompt-rate', str(args.prompt_rate),
+             '--reply-tokens', str(args.reply_tokens)],
+            cwd=ROOT
+        )
+        wait_for_port(args.mock_port)
+        base_url = f"http://127.0.0.1:{args.mock_port}/v1"
+
+    try:
+        client = OpenAI(base_url=base_url, api_key="ollama")
+        full = run_debate(client, args.model, args.rounds, memory_factory=None)
+        summarized = run_debate(client, args.model, args.rounds,
+                                memory_factory=lambda: DebateMemory(persona_turns(args.memory_turns)))
+    finally:
+        if process is not None:
+            process.terminate()
+
+    print(f"토론 {args.rounds}라운드, 기억 모드 최근 {args.memory_turns}턴 유지 ({base_url})")
+    print(f"{'턴':>4}{'라운드':>6}{'전체 토큰':>10}{'전체(s)':>10}{'기억 토큰':>10}{'기억(s)':>10}")
+    for turn, ((full_tokens, full_latency), (memory_tokens, memory_latency)) in enumerate(zip(full, summarized), 1):
+        print(f"{turn:>4}{(turn + 1) // 2:>6}{full_tokens:>10}{full_latency:>10.2f}"
+              f"{memory_tokens:>10}{memory_latency:>10.2f}")
+    print(f"{'합계':>4}{'':>6}{sum(t for t, _ in full):>10}{sum(l for _, l in full):>10.2f}"
+          f"{sum(t for t, _ in summarized):>10}{sum(l for _, l in summarized):>10.2f}")
+
+if __name__ == '__main__':
+    main()
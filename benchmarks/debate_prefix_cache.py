@@ -0,0 +1,112 @@
+"""
+토론 프롬프트 캐시 벤치마크: 턴별 프롬프트 처리(prompt eval) 시간
+
+같은 토론을 두 가지 메시지 구성으로 진행하며, Ollama /api/chat이 돌려주는
+prompt_eval_count(실제로 처리한 프롬프트 토큰 수)와 prompt_eval_duration을 턴별로 비교합니다.
+
+- 공유 기록: 한 대화 기록의 맨 앞 시스템 프롬프트를 턴마다 바꿔 끼움 (이전 방식)
+- 페르소나별 기록: 페르소나마다 시스템 프롬프트가 고정된 기록에 추가만 함 (DebateState)
+
+기본값으로는 프롬프트(KV) 캐시를 흉내 내는 모의 서버(--cache-slots 2)를 띄워 측정하고,
+--ollama-url을 주면 실제 Ollama로 측정합니다. 두 페르소나의 캐시가 서로를 밀어내지 않도록
+Ollama는 OLLAMA_NUM_PARALLEL=2 이상으로 실행하세요.
+
+실행 방법:
+python benchmarks/debate_prefix_cache.py --rounds 4
+python benchmarks/debate_prefix_cache.py --rounds 3 --ollama-url http://localhost:11434 --model llama3.1
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_vs_sync import wait_for_port
+from ollama.debate_generator import DebateState
+
+TOPIC = "AI 기술 발전은 인류에게 궁극적으로 이로운가?"
+PERSONA1 = "당신은 AI 기술의 열렬한 지지자입니다. 긍정적이고 미래지향적인 관점에서 주장을 펼치세요."
+PERSONA2 = "당신은 AI 기술에 대해 신중한 비평가입니다. 현실적이고 비판적인 관점에서 문제점을 지적하세요."
+
+def ollama_chat(base_url, model, messages, num_predict):
+    """Ollama /api/chat을 호출하고 (응답, 처리한 프롬프트 토큰 수, 처리 시간(초))를 반환합니다."""
+    body = json.dumps({
+        'model': model,
+        'messages': messages,
+        'stream': False,
+        'options': {'num_predict': num_predict},
+    }).encode('utf-8')
+    req = urllib.request.Request(f"{base_url}/api/chat", data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=600) as response:
+        data = json.loads(response.read())
+    return data['message']['content'], data.get('prompt_eval_count', 0), data.get('prompt_eval_duration', 0) / 1e9
+
+def run_shared_history(base_url, model, rounds, num_predict):
+    """이전 방식: 공유 기록 앞에 현재 발언자의 시스템 프롬프트를 붙여 보냅니다."""
+    prompts = ({"role": "system", "content": PERSONA1}, {"role": "system", "content": PERSONA2})
+    instructions = ("이러한 우려에 대해 당신의 긍정적인 반박 의견을 제시해주세요.",
+                    "위 주장에 대해 당신의 비판적인 견해를 제시해주세요.")
+    history = [{"role": "user", "content": f"'{TOPIC}'에 대한 당신의 입장을 밝혀주세요. 토론을 시작하겠습니다."}]
+    turns = []
+    for turn in range(rounds * 2):
+        speaker = turn % 2
+        content, evaluated, seconds = ollama_chat(base_url, model, [prompts[speaker]] + history, num_predict)
+        turns.append((evaluated, seconds))
+        history.append({"role": "assistant", "content": content})
+        history.append({"role": "user", "content": instructions[1 - speaker]})
+    return turns
+
+def run_per_persona_history(base_url, model, rounds, num_predict):
+    """DebateState의 페르소나별 추가 전용 기록으로 보냅니다."""
+    state = DebateState(TOPIC, PERSONA1, PERSONA2, rounds)
+    turns = []
+    while not state.finished:
+        content, evaluated, seconds = ollama_chat(base_url, model, state.messages_for_api(), num_predict)
+        turns.append((evaluated, seconds))
+        state.record(content)
+    return turns
+
+def main():
+    parser = argparse.ArgumentParser(description="토론 메시지 구성별 프롬프트 처리 시간 벤치마크")
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--ollama-url', help="실제 Ollama 주소 (없으면 모의 서버 사용)")
+    parser.add_argument('--model', default=os.getenv("OLLAMA_MODEL") or 'mock')
+    parser.add_argument('--num-predict', type=int, default=300, help="발언당 최대 생성 토큰 수")
+    parser.add_argument('--prompt-rate', type=float, default=2000, help="모의 서버의 초당 프롬프트 토큰 처리량")
+    parser.add_argument('--cache-slots', type=int, default=2, help="모의 서버의 프롬프트 캐시 슬롯 수")
+    parser.add_argument('--mock-port', type=int, default=9330)
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.ollama_url
+    if not base_url:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'), '--port', str(args.mock_port),
+             '--latency', '0', '--prompt-rate', str(args.prompt_rate), '--reply-tokens', str(args.num_predict),
+             '--cache-slots', str(args.cache_slots)],
+            cwd=ROOT
+        )
+        wait_for_port(args.mock_port)
+        base_url = f"http://127.0.0.1:{args.mock_port}"
+
+    try:
+        shared = run_shared_history(base_url, args.model, args.rounds, args.num_predict)
+        per_persona = run_per_persona_history(base_url, args.model, args.rounds, args.num_predict)
+    finally:
+        if process is not None:
+            process.terminate()
+
+    print(f"토론 {args.rounds}라운드 ({base_url}, 모델 {args.model})")
+    print(f"{'턴':>4}{'공유 처리 토큰':>14}{'공유(s)':>10}{'분리 처리 토큰':>14}{'분리(s)':>10}")
+    for turn, ((shared_tokens, shared_seconds), (split_tokens, split_seconds)) in enumerate(zip(shared, per_persona), 1):
+        print(f"{turn:>4}{shared_tokens:>14}{shared_seconds:>10.3f}{split_tokens:>14}{split_seconds:>10.3f}")
+    print(f"{'합계':>4}{sum(t for t, _ in shared):>14}{sum(s for _, s in shared):>10.3f}"
+          f"{sum(t for t, _ in per_persona):>14}{sum(s for _, s in per_persona):>10.3f}")
+
+if __name__ == '__main__':
+    main()
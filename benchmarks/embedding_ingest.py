@@ -0,0 +1,88 @@
+"""
+뉴스 기사 임베딩 수집 벤치마크: 기사 하나씩 vs 묶음 요청
+
+NewsClusterer.add_news_article()로 기사를 하나씩 추가할 때와 add_news_articles()로 한꺼번에 추가할 때의
+처리량(기사/초)을 비교합니다. 기본값으로는 요청마다 --latency만큼 지연하는 모의 서버를 띄워 측정하고,
+--base-url을 주면 그 서버로 측정합니다. (실제 OpenAI로 측정하면 요금이 나옵니다)
+
+실행 방법:
+python benchmarks/embedding_ingest.py --articles 2000 --single-articles 200
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_vs_sync import wait_for_port
+
+
+def sample_articles(count):
+    """서로 다른 내용의 모의 기사 목록"""
+    topics = ["자율주행", "전기차 배터리", "코로나19", "메타버스", "반도체", "기후 변화", "금리", "우주 탐사"]
+    return [
+        {
+            'title': f"{topics[i % len(topics)]} 관련 소식 {i}",
+            'content': f"{topics[i % len(topics)]} 분야에서 {i}번째 새로운 발표가 있었다. " * 5,
+            'source': "벤치마크",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="뉴스 기사 임베딩 수집 처리량 벤치마크")
+    parser.add_argument('--articles', type=int, default=2000, help="묶음 수집으로 추가할 기사 수")
+    parser.add_argument('--single-articles', type=int, default=200, help="하나씩 추가할 기사 수 (느리므로 적게)")
+    parser.add_argument('--concurrency', type=int, default=4, help="동시에 보낼 묶음 요청 수")
+    parser.add_argument('--base-url', help="OpenAI 호환 서버 주소 (없으면 모의 서버 사용)")
+    parser.add_argument('--latency', type=float, default=0.05, help="모의 서버의 요청당 지연(초)")
+    parser.add_argument('--mock-port', type=int, default=9330)
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'), '--port', str(args.mock_port),
+             '--latency', str(args.latency)],
+            cwd=ROOT
+        )
+        wait_for_port(args.mock_port)
+        base_url = f"http://127.0.0.1:{args.mock_port}/v1"
+        os.environ.setdefault('OPENAI_API_KEY', 'mock')
+
+    # 봇 모듈의 클라이언트가 벤치마크 서버를 사용하도록 주소를 먼저 설정합니다
+    os.environ['OPENAI_BASE_URL'] = base_url
+    from chatbot.advanced.news_clustering_bot import NewsClusterer
+
+    try:
+        clusterer = NewsClusterer()
+        started = time.perf_counter()
+        for article in sample_articles(args.single_articles):
+            clusterer.add_news_article(article['title'], article['content'], article['source'])
+        single_seconds = time.perf_counter() - started
+
+        clusterer = NewsClusterer()
+        started = time.perf_counter()
+        ids = clusterer.add_news_articles(sample_articles(args.articles), concurrency=args.concurrency)
+        batch_seconds = time.perf_counter() - started
+    finally:
+        if process is not None:
+            process.terminate()
+
+    single_rate = args.single_articles / single_seconds
+    batch_rate = args.articles / batch_seconds
+    print(f"\n임베딩 수집 처리량 ({base_url})")
+    print(f"하나씩:  기사 {args.single_articles}개, {single_seconds:.2f}s, {single_rate:.1f} 기사/s")
+    print(f"묶음:    기사 {args.articles}개, {batch_seconds:.2f}s, {batch_rate:.1f} 기사/s "
+          f"(실패 {ids.count(None)}개, 동시 {args.concurrency}개)")
+    print(f"속도 향상: {batch_rate / single_rate:.1f}배")
+
+
+if __name__ == '__main__':
+    main()
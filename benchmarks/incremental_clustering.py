@@ -0,0 +1,86 @@
+"""
+뉴스 클러스터링 벤치마크: 새 기사 묶음마다 전체 KMeans 재학습 vs 점진적 클러스터링(partial_fit)
+
+주제별로 모인 무작위 임베딩을 기사 묶음으로 계속 흘려보내면서, 묶음이 들어올 때마다
+- 전체: cluster_news()로 모든 기사를 처음부터 다시 클러스터링
+- 점진적: cluster_news(incremental=True) 뒤 add_news_articles()가 새 기사만 배정하고 중심점을 갱신
+하는 데 걸린 시간을 비교합니다. 끝에서 두 결과가 얼마나 일치하는지(ARI)와 전체 재학습 횟수를 출력합니다.
+임베딩 API는 호출하지 않습니다. (미리 만든 벡터를 돌려줌)
+
+실행 방법:
+python benchmarks/incremental_clustering.py --initial 20000 --batches 20 --batch-size 500 --clusters 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')  # 봇 모듈의 클라이언트 생성용 (호출하지 않음)
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+from chatbot.advanced.news_clustering_bot import NewsClusterer
+from similarity_search import make_vectors
+
+
+def feed(clusterer, vectors):
+    """미리 만든 벡터로 add_news_articles()를 호출합니다."""
+    clusterer.get_embeddings = lambda texts, concurrency=None: list(vectors)
+    start = len(clusterer.news_articles)
+    clusterer.add_news_articles(
+        {'title': f"기사 {start + i}", 'content': ""} for i in range(len(vectors))
+    )
+
+
+def labels_of(clusterer):
+    labels = np.empty(len(clusterer.news_articles), dtype=np.int64)
+    for label, articles in clusterer.clusters.items():
+        labels[[article['id'] for article in articles]] = label
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="점진적 클러스터링 벤치마크")
+    parser.add_argument('--initial', type=int, default=20000, help="처음 클러스터링할 기사 수")
+    parser.add_argument('--batches', type=int, default=20, help="이어서 들어올 기사 묶음 수")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--clusters', type=int, default=20)
+    parser.add_argument('--dimensions', type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = make_vectors(args.initial + args.batches * args.batch_size, args.dimensions, rng, topics=args.clusters)
+    batches = np.split(vectors[args.initial:], args.batches)
+
+    full = NewsClusterer()
+    incremental = NewsClusterer()
+    for clusterer in (full, incremental):
+        feed(clusterer, vectors[:args.initial])
+    full.cluster_news(args.clusters)
+    incremental.cluster_news(args.clusters, incremental=True)
+
+    full_seconds = incremental_seconds = 0.0
+    for batch in batches:
+        feed(full, batch)
+        started = time.perf_counter()
+        full.cluster_news(args.clusters)
+        full_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        feed(incremental, batch)
+        incremental_seconds += time.perf_counter() - started
+
+    print(f"\n기사 {args.initial}개 + 묶음 {args.batches}개 x {args.batch_size}개, "
+          f"{args.dimensions}차원, 클러스터 {args.clusters}개")
+    print(f"전체 재학습: 묶음당 {full_seconds / args.batches * 1000:.1f} ms")
+    print(f"점진적:      묶음당 {incremental_seconds / args.batches * 1000:.1f} ms "
+          f"(전체 재학습 {incremental.refits}회, 마지막 유사도 하락 {incremental.cluster_drift():.1%})")
+    print(f"속도 향상: {full_seconds / incremental_seconds:.0f}배, "
+          f"두 결과의 일치도(ARI): {adjusted_rand_score(labels_of(full), labels_of(incremental)):.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+오프라인 부하 테스트
+
+모의 서버(mock_server.py)를 업스트림으로 두고 app.py 또는 asgi_app.py를 띄운 뒤,
+봇 타입별 /api/chat과 /api/debate-stream에 정해진 동시성으로 요청을 보내
+처리량과 p50/p95/p99 지연 시간을 보고합니다. API 비용 없이 같은 조건으로 반복 측정할 수 있어
+성능 변경 전후의 기준선(baseline)으로 사용합니다.
+
+실행 방법:
+python benchmarks/load_test.py --app async --concurrency 50 --requests 200 --latency 0.5 --token-rate 100
+python benchmarks/load_test.py --app sync --threads 16 --json baseline.json
+python benchmarks/load_test.py --target http://127.0.0.1:8000   # 이미 실행 중인 앱에 요청
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_vs_sync import percentile, wait_for_port
+from chatbot.web.bot_registry import BOTS
+
+DEBATE_END_MARKER = '"type": "debate_end"'
+
+def post_json(opener, url, payload, timeout=300):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+    )
+    with opener.open(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def chat_request(base_url, bot_type, index):
+    """/api/chat 요청 하나를 보내고 (성공 여부, 지연 시간)을 반환합니다."""
+    # 응답 캐시에 걸리지 않도록 요청마다 다른 메시지를 보냅니다
+    message = f"부하 테스트 문장 {index} -> 영어" if bot_type == 'translator' else f"부하 테스트 메시지 {index}"
+    opener = urllib.request.build_opener()
+    start = time.perf_counter()
+    try:
+        ok = 'error' not in post_json(opener, f"{base_url}/api/chat", {'bot_type': bot_type, 'message': message})
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def debate_request(base_url, index, debate_format='sequential'):
+    """토론을 준비하고 /api/debate-stream을 끝까지 읽은 뒤 (성공 여부, 지연 시간)을 반환합니다."""
+    # 토론 설정은 세션 쿠키에 저장되므로 요청마다 쿠키 저장소를 따로 둡니다
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    start = time.perf_counter()
+    try:
+        post_json(opener, f"{base_url}/api/prepare-debate", {
+            'topic': f"부하 테스트 주제 {index}",
+            'persona1': "당신은 찬성 측입니다.",
+            'persona2': "당신은 반대 측입니다.",
+            'format': debate_format
+        })
+        with opener.open(f"{base_url}/api/debate-stream", timeout=600) as response:
+            body = response.read().decode('utf-8')
+        ok = DEBATE_END_MARKER in body and '"type": "error"' not in body
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def run_scenario(request_fn, concurrency, total_requests):
+    """동시 요청을 보내고 처리량과 지연 시간 통계를 계산합니다."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(request_fn, range(total_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in results]
+    ok = sum(1 for success, _ in results if success)
+    return {
+        'requests': total_requests,
+        'ok': ok,
+        'errors': total_requests - ok,
+        'elapsed': elapsed,
+        'throughput': total_requests / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+def start_servers(args):
+    """모의 서버와 대상 앱을 하위 프로세스로 실행하고 (프로세스 목록, 앱 주소)를 반환합니다."""
+    mock_port, app_port = args.mock_port, args.app_port
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY='benchmark',
+        OPENAI_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        OLLAMA_MODEL='mock',
+    )
+    processes = [subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'), '--port', str(mock_port),
+         '--latency', str(args.latency), '--token-rate', str(args.token_rate),
+         '--error-rate', str(args.error_rate)],
+        env=env, cwd=ROOT
+    )]
+    if args.app == 'sync':
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'benchmarks', 'async_vs_sync.py'),
+             '--serve-sync', str(app_port), '--threads', str(args.threads)],
+            env=env, cwd=ROOT, stderr=subprocess.DEVNULL
+        ))
+    else:
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'hypercorn', 'asgi_app:app', '--bind', f"127.0.0.1:{app_port}",
+             '--backlog', '4096'],
+            env=env, cwd=ROOT
+        ))
+    wait_for_port(app_port)
+    return processes, f"http://127.0.0.1:{app_port}"
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 업스트림을 사용하는 부하 테스트")
+    parser.add_argument('--app', choices=('sync', 'async'), default='async', help="테스트할 앱 (app.py / asgi_app.py)")
+    parser.add_argument('--target', help="이미 실행 중인 앱 주소 (지정하면 서버를 띄우지 않음)")
+    parser.add_argument('--bots', default=','.join(BOTS), help="테스트할 봇 타입 (쉼표로 구분)")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help="봇 타입별 요청 수")
+    parser.add_argument('--debate-requests', type=int, default=20, help="토론 스트리밍 요청 수 (0이면 생략)")
+    parser.add_argument('--debate-format', choices=('sequential', 'simultaneous'), default='sequential',
+                        help="토론 진행 방식")
+    parser.add_argument('--latency', type=float, default=0.5, help="모의 업스트림 첫 토큰 지연(초)")
+    parser.add_argument('--token-rate', type=float, default=0.0, help="모의 업스트림 초당 토큰 수")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="모의 업스트림 오류 비율")
+    parser.add_argument('--threads', type=int, default=8, help="sync 앱의 워커 스레드 수")
+    parser.add_argument('--mock-port', type=int, default=9300)
+    parser.add_argument('--app-port', type=int, default=9301)
+    parser.add_argument('--json', help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    processes = []
+    base_url = args.target
+    if not base_url:
+        processes, base_url = start_servers(args)
+
+    scenarios = [
+        (f"chat:{bot_type}", lambda i, bot_type=bot_type: chat_request(base_url, bot_type, i), args.requests)
+        for bot_type in args.bots.split(',') if bot_type
+    ]
+    if args.debate_requests:
+        scenarios.append(("debate-stream", lambda i: debate_request(base_url, i, args.debate_format), args.debate_requests))
+
+    results = {}
+    try:
+        print(f"대상 {base_url}, 동시 요청 {args.concurrency}, 업스트림 지연 {args.latency}s, "
+              f"토큰 속도 {args.token_rate}/s, 오류 비율 {args.error_rate}")
+        print(f"{'시나리오':<20}{'요청':>6}{'오류':>6}{'req/s':>10}{'p50(s)':>10}{'p95(s)':>10}{'p99(s)':>10}")
+        for name, request_fn, total_requests in scenarios:
+            stats = run_scenario(request_fn, args.concurrency, total_requests)
+            results[name] = stats
+            print(f"{name:<20}{stats['requests']:>6}{stats['errors']:>6}{stats['throughput']:>10.1f}"
+                  f"{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"결과를 {args.json}에 저장했습니다.")
+
+if __name__ == '__main__':
+    main()
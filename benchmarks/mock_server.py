@@ -0,0 +1,349 @@
+"""
+OpenAI 호환 모의(mock) 서버
+
+실제 API 비용 없이 app.py / asgi_app.py의 성능을 측정하기 위한 로컬 서버입니다.
+다음 엔드포인트를 OpenAI 응답 형식 그대로 흉내 냅니다.
+- /v1/chat/completions: 일반 응답과 stream: true(SSE, stream_options.include_usage 지원)
+- /v1/embeddings: 입력 텍스트마다 결정적인(같은 입력 → 같은 벡터) 단위 벡터
+- /v1/audio/transcriptions: 고정된 전사 결과 (json / text 형식)
+
+지연과 오류 설정:
+- --latency: 첫 토큰(또는 응답)까지의 지연(초)
+- --token-rate: 초당 생성 토큰 수 (0이면 토큰 생성 지연 없음). 모의 응답은 한 글자를 한 토큰으로 셉니다.
+- --error-rate: 이 비율(0~1)의 요청에 오류를 돌려줍니다 (오류 주입)
+- --error-status: 주입할 오류의 HTTP 상태 코드 (기본값: 500)
+- --prompt-rate: 초당 처리하는 프롬프트 토큰 수 (0이면 없음). 프롬프트가 길수록 첫 토큰이 늦어지는 로컬 모델을 흉내 냅니다.
+- --reply-tokens: 채팅 응답 길이 (기본값: 고정 문장 한 개)
+- --cache-slots: 프롬프트(KV) 캐시 슬롯 수 (0이면 캐시 없음). 최근 프롬프트와 겹치는 접두사는 다시 처리하지 않습니다.
+- --load-time: 모델 적재 시간(초, 0이면 없음). 모델이 메모리에 없으면 요청이 이만큼 더 기다리고,
+  마지막 요청 후 keep_alive(기본 5분)가 지나면 다시 내려갑니다.
+
+Ollama 고유 API인 /api/chat(stream: false)도 제공하며, prompt_eval_count / prompt_eval_duration으로
+캐시되지 않아 실제로 처리한 프롬프트 토큰 수와 시간을 돌려줍니다.
+모델 예열용 /api/generate(빈 프롬프트, keep_alive)와 적재된 모델 목록 /api/ps도 흉내 냅니다.
+
+실행 방법:
+python benchmarks/mock_server.py --port 9000 --latency 2.0 --token-rate 50 --error-rate 0.01
+
+앱에서 사용하기:
+OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OLLAMA_BASE_URL=http://127.0.0.1:9000/v1 python app.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import random
+import time
+import json
+import uuid
+from quart import Quart, Response, request, jsonify
+
+MOCK_REPLY = "모의 서버의 응답입니다. 실제 모델은 호출되지 않았습니다."
+MOCK_PERSONAS = '{"persona1": "당신은 찬성 측입니다.", "persona2": "당신은 반대 측입니다."}'
+MOCK_TRANSCRIPT = "모의 서버의 전사 결과입니다. 실제 음성은 인식되지 않았습니다."
+EMBEDDING_DIMENSIONS = 1536
+
+def render_prompt(messages):
+    """메시지 목록을 모델 입력 문자열로 펼칩니다. (한 글자 = 한 토큰으로 셉니다)"""
+    return ''.join(f"<{message.get('role')}>{message.get('content') or ''}" for message in messages)
+
+def parse_keep_alive(value, default=300.0):
+    """Ollama keep_alive 값("10m", "1h", 초 단위 숫자, 음수는 무기한)을 초로 바꿉니다."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        units = {'s': 1, 'm': 60, 'h': 3600}
+        value = value.strip()
+        seconds = float(value[:-1]) * units[value[-1]] if value[-1] in units else float(value)
+    return math.inf if seconds < 0 else seconds
+
+def count_prompt_tokens(messages):
+    """프롬프트 토큰 수를 어림합니다."""
+    return len(render_prompt(messages))
+
+class PromptCache:
+    """
+    로컬 모델의 프롬프트(KV) 캐시 흉내.
+    슬롯마다 마지막으로 처리한 프롬프트 + 생성 결과를 기억하고, 새 프롬프트와 공통 접두사가 가장 긴 슬롯을
+    재사용합니다. 공통 접두사가 그 슬롯 내용의 절반에 못 미치면(다른 대화) 가장 오래 사용하지 않은 슬롯을 덮어쓰고
+    처음부터 다시 처리합니다. (llama.cpp의 slot prompt similarity와 같은 방식)
+    """
+
+    MIN_SIMILARITY = 0.5
+
+    def __init__(self, slots):
+        self.slots = [''] * slots
+        self.last_used = [0.0] * slots
+
+    def lookup(self, prompt):
+        """(사용할 슬롯 번호, 캐시된 토큰 수)를 반환합니다. 슬롯이 없으면 (None, 0)."""
+        if not self.slots:
+            return None, 0
+        best_slot, best_length = None, 0
+        for slot, cached in enumerate(self.slots):
+            length = len(os.path.commonprefix([cached, prompt]))
+            if cached and length >= len(cached) * self.MIN_SIMILARITY and length > best_length:
+                best_slot, best_length = slot, length
+        if best_slot is None:
+            best_slot = min(range(len(self.slots)), key=lambda slot: self.last_used[slot])
+        return best_slot, best_length
+
+    def store(self, slot, text):
+        if slot is not None:
+            self.slots[slot] = text
+            self.last_used[slot] = time.monotonic()
+
+def mock_embedding(text, dimensions):
+    """텍스트 해시로 시드를 정해 같은 입력에 항상 같은 단위 벡터를 만듭니다."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+def create_app(latency=1.0, token_rate=0.0, error_rate=0.0, error_status=500, prompt_rate=0.0, reply_tokens=0,
+               cache_slots=0, load_time=0.0):
+    """지연 시간, 토큰 생성 속도, 오류 비율이 설정된 모의 서버 앱을 만듭니다."""
+    app = Quart(__name__)
+    loaded_models = {}  # 모델 -> 메모리에서 내려갈 시각
+    loading = {}        # 모델 -> 적재 중인 태스크 (동시에 온 요청은 같은 적재를 기다림)
+    prompt_cache = PromptCache(cache_slots)
+    token_delay = 1.0 / token_rate if token_rate > 0 else 0.0
+    reply = MOCK_REPLY
+    if reply_tokens > 0:
+        reply = (MOCK_REPLY * (reply_tokens // len(MOCK_REPLY) + 1))[:reply_tokens]
+
+    def injected_error():
+        """설정한 비율만큼 OpenAI 형식의 오류 응답을 만듭니다."""
+        if error_rate > 0 and random.random() < error_rate:
+            body = {'error': {'message': '모의 서버가 주입한 오류입니다.', 'type': 'server_error', 'code': None}}
+            return jsonify(body), error_status
+        return None
+
+    async def ensure_loaded(model, keep_alive=None):
+        """모델이 메모리에 없으면 적재 시간만큼 기다리고, 그 시간(초)을 반환합니다."""
+        now = time.time()
+        load_seconds = 0.0
+        if load_time > 0 and loaded_models.get(model, 0) <= now:
+            task = loading.get(model)
+            if task is None:
+                task = asyncio.ensure_future(asyncio.sleep(load_time))
+                loading[model] = task
+                task.add_done_callback(lambda _: loading.pop(model, None))
+            started = time.perf_counter()
+            await asyncio.shield(task)
+            load_seconds = time.perf_counter() - started
+        loaded_models[model] = time.time() + parse_keep_alive(keep_alive)
+        return load_seconds
+
+    async def evaluate_prompt(messages):
+        """
+        프롬프트 중 캐시되지 않은 부분을 처리하는 시간만큼 기다리고
+        (프롬프트 전체, 슬롯 번호, 처리한 토큰 수, 처리 시간)을 반환합니다.
+        """
+        prompt = render_prompt(messages)
+        slot, cached_tokens = prompt_cache.lookup(prompt)
+        evaluated = len(prompt) - cached_tokens
+        eval_seconds = evaluated / prompt_rate if prompt_rate > 0 else 0.0
+        await asyncio.sleep(latency + eval_seconds)
+        return prompt, slot, evaluated, eval_seconds
+
+    def reply_for(data):
+        content = reply
+        if data.get('response_format', {}).get('type') == 'json_object':
+            content = MOCK_PERSONAS
+        elif data.get('max_tokens'):
+            content = content[:data['max_tokens']]
+        return content
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    async def chat_completions():
+        data = await request.get_json()
+        await ensure_loaded(data.get('model') or 'mock')
+        prompt, slot, _, _ = await evaluate_prompt(data.get('messages', []))
+        error = injected_error()
+        if error is not None:
+            return error
+
+        content = reply_for(data)
+        prompt_cache.store(slot, prompt + f"<assistant>{content}")
+        prompt_tokens = len(prompt)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': len(content),
+            'total_tokens': prompt_tokens + len(content)
+        }
+        model = data.get('model') or 'mock'
+
+        if data.get('stream'):
+            include_usage = (data.get('stream_options') or {}).get('include_usage', False)
+            return Response(stream_chunks(model, content, token_delay, usage if include_usage else None),
+                            mimetype='text/event-stream')
+
+        if token_delay:
+            await asyncio.sleep(token_delay * len(content))
+        return jsonify({
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        })
+
+    @app.route('/api/chat', methods=['POST'])
+    async def ollama_chat():
+        """Ollama 고유 API (stream: false만 지원)"""
+        data = await request.get_json()
+        started = time.perf_counter()
+        load_seconds = await ensure_loaded(data.get('model') or 'mock', data.get('keep_alive'))
+        prompt, slot, evaluated, eval_seconds = await evaluate_prompt(data.get('messages', []))
+        error = injected_error()
+        if error is not None:
+            return error
+
+        content = reply_for({'max_tokens': (data.get('options') or {}).get('num_predict')})
+        prompt_cache.store(slot, prompt + f"<assistant>{content}")
+        generate_seconds = token_delay * len(content)
+        if generate_seconds:
+            await asyncio.sleep(generate_seconds)
+        return jsonify({
+            'model': data.get('model') or 'mock',
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'message': {'role': 'assistant', 'content': content},
+            'done': True,
+            'total_duration': int((time.perf_counter() - started) * 1e9),
+            'load_duration': int(load_seconds * 1e9),
+            'prompt_eval_count': evaluated,
+            'prompt_eval_duration': int(eval_seconds * 1e9),
+            'eval_count': len(content),
+            'eval_duration': int(generate_seconds * 1e9),
+        })
+
+    @app.route('/api/generate', methods=['POST'])
+    async def ollama_generate():
+        """Ollama 고유 API. 빈 프롬프트로 모델만 적재(예열)하고 keep_alive를 갱신하는 용도만 흉내 냅니다."""
+        data = await request.get_json()
+        started = time.perf_counter()
+        model = data.get('model') or 'mock'
+        load_seconds = await ensure_loaded(model, data.get('keep_alive'))
+        return jsonify({
+            'model': model,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'response': '',
+            'done': True,
+            'done_reason': 'load',
+            'total_duration': int((time.perf_counter() - started) * 1e9),
+            'load_duration': int(load_seconds * 1e9),
+        })
+
+    @app.route('/api/ps')
+    async def ollama_ps():
+        """메모리에 적재된 모델 목록"""
+        now = time.time()
+        models = [
+            {'name': model, 'model': model, 'expires_at': None if math.isinf(expires_at) else
+             time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(expires_at))}
+            for model, expires_at in loaded_models.items() if expires_at > now
+        ]
+        return jsonify({'models': models})
+
+    @app.route('/v1/embeddings', methods=['POST'])
+    async def embeddings():
+        data = await request.get_json()
+        await asyncio.sleep(latency)
+        error = injected_error()
+        if error is not None:
+            return error
+
+        inputs = data.get('input')
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(data.get('dimensions') or EMBEDDING_DIMENSIONS)
+        prompt_tokens = sum(len(str(text)) for text in inputs)
+        return jsonify({
+            'object': 'list',
+            'data': [
+                {'object': 'embedding', 'index': i, 'embedding': mock_embedding(str(text), dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            'model': data.get('model') or 'mock',
+            'usage': {'prompt_tokens': prompt_tokens, 'total_tokens': prompt_tokens}
+        })
+
+    @app.route('/v1/audio/transcriptions', methods=['POST'])
+    async def transcriptions():
+        form = await request.form
+        await request.files  # 업로드된 오디오는 읽기만 하고 사용하지 않습니다
+        await asyncio.sleep(latency)
+        error = injected_error()
+        if error is not None:
+            return error
+
+        if token_delay:
+            await asyncio.sleep(token_delay * len(MOCK_TRANSCRIPT))
+        if form.get('response_format') in ('text', 'srt', 'vtt'):
+            return Response(MOCK_TRANSCRIPT, mimetype='text/plain')
+        return jsonify({'text': MOCK_TRANSCRIPT})
+
+    return app
+
+async def stream_chunks(model, content, token_delay=0.0, usage=None):
+    """응답을 글자 단위 chat.completion.chunk 이벤트로 나누어 보냅니다."""
+    completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+
+    def chunk_event(choices, **extra):
+        chunk = {
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': choices,
+            **extra
+        }
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+    for char in content:
+        yield chunk_event([{'index': 0, 'delta': {'content': char}, 'finish_reason': None}])
+        await asyncio.sleep(token_delay)
+    yield chunk_event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+    if usage is not None:
+        # stream_options.include_usage 요청에는 마지막에 choices가 빈 사용량 청크를 보냅니다
+        yield chunk_event([], usage=usage)
+    yield "data: [DONE]\n\n"
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 모의 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', type=float, default=1.0, help="첫 토큰까지의 지연 시간(초)")
+    parser.add_argument('--token-rate', type=float, default=0.0, help="초당 생성 토큰 수 (0이면 지연 없음)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="오류를 돌려줄 요청 비율 (0~1)")
+    parser.add_argument('--error-status', type=int, default=500, help="주입할 오류의 HTTP 상태 코드")
+    parser.add_argument('--prompt-rate', type=float, default=0.0, help="초당 처리하는 프롬프트 토큰 수 (0이면 없음)")
+    parser.add_argument('--reply-tokens', type=int, default=0, help="채팅 응답 길이(토큰)")
+    parser.add_argument('--cache-slots', type=int, default=0, help="프롬프트(KV) 캐시 슬롯 수 (0이면 캐시 없음)")
+    parser.add_argument('--load-time', type=float, default=0.0, help="모델 적재 시간(초, 0이면 없음)")
+    args = parser.parse_args()
+
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"{args.host}:{args.port}"]
+    config.backlog = 4096
+    config.accesslog = None
+    app = create_app(args.latency, args.token_rate, args.error_rate, args.error_status,
+                     args.prompt_rate, args.reply_tokens, args.cache_slots, args.load_time)
+    asyncio.run(serve(app, config))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+뉴스 유사 기사 검색 벤치마크: 파이썬 리스트 + 쌍별 cosine_similarity vs float32 행렬 + argpartition
+
+무작위 임베딩으로 NewsClusterer를 채운 뒤 find_similar_articles()의 질의 시간과 임베딩 메모리를
+예전 방식(파이썬 float 리스트, 기사 쌍마다 sklearn cosine_similarity 호출)과 비교합니다.
+예전 방식은 느리므로 --baseline-articles개에서만 재고 기사 수에 비례한다고 보고 환산합니다.
+API를 호출하지 않습니다.
+
+--ann을 주면 IVF 근사 검색 인덱스(build_index)의 n_probe별 질의 시간과 재현율(recall@k)을 전수 검색과 비교합니다.
+(인덱스는 기사가 적으면 전수 검색으로 대신하지만, 여기서는 기사 수와 관계없이 목록 검색을 잽니다)
+실제 기사 임베딩처럼 주제별로 모여 있도록, 임베딩은 무작위 주제 중심점 주변에 만듭니다.
+
+실행 방법:
+python benchmarks/similarity_search.py --articles 100000 --dimensions 1536
+python benchmarks/similarity_search.py --ann --articles 1000000 --dimensions 1536
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')  # 봇 모듈의 클라이언트 생성용 (호출하지 않음)
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from chatbot.advanced.news_clustering_bot import NewsClusterer
+
+
+def make_vectors(count, dimensions, rng, topics=1000, noise=1.5):
+    """주제 중심점 주변에 모인 무작위 임베딩"""
+    centers = rng.standard_normal((topics, dimensions), dtype=np.float32)
+    vectors = np.empty((count, dimensions), dtype=np.float32)
+    for start in range(0, count, 100000):
+        end = min(count, start + 100000)
+        vectors[start:end] = centers[rng.integers(0, topics, end - start)]
+        vectors[start:end] += noise * rng.standard_normal((end - start, dimensions), dtype=np.float32)
+    return vectors
+
+
+def make_clusterer(vectors):
+    clusterer = NewsClusterer()
+    clusterer.news_articles = [{'id': i, 'title': f"기사 {i}", 'content': ""} for i in range(len(vectors))]
+    clusterer.embeddings.extend(vectors)
+    return clusterer
+
+
+def list_search(articles, embeddings, target, threshold):
+    """예전 find_similar_articles: 기사 쌍마다 cosine_similarity를 호출하고 일치한 기사를 모두 복사"""
+    similar = []
+    for i, embedding in enumerate(embeddings):
+        if i != target:
+            similarity = cosine_similarity([embeddings[target]], [embedding])[0][0]
+            if similarity >= threshold:
+                article = articles[i].copy()
+                article['similarity'] = similarity
+                similar.append(article)
+    similar.sort(key=lambda x: x['similarity'], reverse=True)
+    return similar
+
+
+def list_bytes(count, dimensions):
+    """파이썬 float 리스트의 리스트가 차지하는 메모리 (float 객체 24바이트 + 포인터 8바이트)"""
+    return count * (sys.getsizeof([0.0] * dimensions) + dimensions * sys.getsizeof(0.0))
+
+
+def compare_exact(args, clusterer, targets):
+    """전수 검색 두 방식의 질의 시간과 메모리를 비교합니다."""
+    started = time.perf_counter()
+    for target in targets:
+        clusterer.find_similar_articles(int(target), threshold=0.0, top_k=args.top_k)
+    matrix_seconds = (time.perf_counter() - started) / args.queries
+
+    baseline = clusterer.embeddings.array[:args.baseline_articles].tolist()
+    started = time.perf_counter()
+    list_search(clusterer.news_articles, baseline, 0, threshold=0.0)
+    list_seconds = (time.perf_counter() - started) * args.articles / args.baseline_articles
+
+    matrix_bytes = clusterer.embeddings.array.nbytes
+    print(f"{'':<24}{'질의(ms)':>12}{'메모리(MB)':>14}")
+    print(f"{'리스트 + 쌍별 비교':<24}{list_seconds * 1000:>12.1f}{list_bytes(args.articles, args.dimensions) / 1e6:>14.1f}"
+          f"  (질의 시간은 {args.baseline_articles}개에서 잰 값을 환산)")
+    print(f"{'float32 행렬':<24}{matrix_seconds * 1000:>12.1f}{matrix_bytes / 1e6:>14.1f}")
+    print(f"질의 {list_seconds / matrix_seconds:.0f}배 빠름, 메모리 "
+          f"{list_bytes(args.articles, args.dimensions) / matrix_bytes:.1f}배 적음")
+
+
+def compare_ann(args, clusterer, targets):
+    """IVF 인덱스의 n_probe별 질의 시간과 재현율을 전수 검색과 비교합니다."""
+    started = time.perf_counter()
+    exact = []
+    for target in targets:
+        exact.append({a['id'] for a in clusterer.find_similar_articles(int(target), -1.0, args.top_k, exact=True)})
+    exact_seconds = (time.perf_counter() - started) / args.queries
+
+    started = time.perf_counter()
+    clusterer.build_index(args.n_lists)
+    clusterer.index.exact_below = 0
+    index_bytes = clusterer.index._all().nbytes + clusterer.index.centroids.nbytes
+    print(f"인덱스 생성: {time.perf_counter() - started:.1f}s (목록 {clusterer.index.n_lists}개, "
+          f"{index_bytes / 1e6:.1f}MB, 임베딩 {clusterer.embeddings.array.nbytes / 1e6:.1f}MB는 공유)")
+
+    print(f"{'방식':<16}{'질의(ms)':>12}{f'recall@{args.top_k}':>14}{'속도 향상':>12}")
+    print(f"{'전수 검색':<16}{exact_seconds * 1000:>12.2f}{1.0:>14.3f}{1.0:>12.1f}")
+    for n_probe in args.n_probe:
+        clusterer.index.n_probe = n_probe
+        found = 0
+        started = time.perf_counter()
+        results = [clusterer.find_similar_articles(int(target), -1.0, args.top_k) for target in targets]
+        seconds = (time.perf_counter() - started) / args.queries
+        for result, truth in zip(results, exact):
+            found += len({a['id'] for a in result} & truth)
+        recall = found / sum(len(truth) for truth in exact)
+        print(f"{f'IVF n_probe={n_probe}':<16}{seconds * 1000:>12.2f}{recall:>14.3f}{exact_seconds / seconds:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유사 기사 검색 벤치마크")
+    parser.add_argument('--articles', type=int, default=100000, help="기사 수")
+    parser.add_argument('--dimensions', type=int, default=1536, help="임베딩 차원")
+    parser.add_argument('--baseline-articles', type=int, default=2000, help="예전 방식을 잴 기사 수")
+    parser.add_argument('--queries', type=int, default=20, help="질의 횟수")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--ann', action='store_true', help="IVF 근사 검색과 전수 검색을 비교")
+    parser.add_argument('--n-lists', type=int, help="IVF 목록 수 (기본값: 약 4 * sqrt(기사 수))")
+    parser.add_argument('--n-probe', type=int, nargs='+', default=[1, 4, 8, 16, 32], help="비교할 n_probe 값들")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    clusterer = make_clusterer(make_vectors(args.articles, args.dimensions, rng))
+    targets = rng.integers(0, args.articles, args.queries)
+
+    print(f"기사 {args.articles}개, {args.dimensions}차원, top-{args.top_k}")
+    if args.ann:
+        compare_ann(args, clusterer, targets)
+    else:
+        compare_exact(args, clusterer, targets)
+
+
+if __name__ == '__main__':
+    main()
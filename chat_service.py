@@ -0,0 +1,396 @@
+"""
+/api/chat 공용 처리 로직
+
+Flask 앱(app.py)과 비동기 앱(asgi_app.py)이 함께 사용하는 대화 턴 관리와 SSE 도우미 함수,
+그리고 /api/chat, /api/chat-stream의 처리(ChatService, AsyncChatService)입니다.
+두 앱의 라우트는 요청 본문과 세션을 넘기고 결과를 JSON/SSE 응답으로 감싸기만 하므로,
+대화 내역, 응답 캐시, 요청 합치기(single-flight), 지표 기록 규칙은 여기 한 곳에만 있습니다.
+봇별 프롬프트와 모델 설정은 chatbot/web/bot_registry.py에 선언되어 있습니다.
+"""
+
+import asyncio
+import json
+import time
+
+from chatbot.web.bot_registry import get_bot
+from conversation_store import get_session_id
+from metrics import metrics
+from response_cache import make_cache_key
+
+# 10줄 대화 챗봇의 최대 대화 턴 수 (user + assistant = 1턴)
+MAX_CHAT_TURNS = 10
+
+FINISHED_RESPONSE = {
+    'response': '10줄 대화가 완료되었습니다. 새로운 대화를 시작하려면 페이지를 새로고침하세요.',
+    'finished': True
+}
+
+UNSUPPORTED_BOT_ERROR = '지원하지 않는 봇 타입입니다.'
+
+
+def is_conversation_finished(conversation):
+    """10줄 대화가 모두 끝났는지 확인합니다."""
+    return len(conversation) >= MAX_CHAT_TURNS * 2
+
+
+def turn_messages(message, ai_response):
+    """대화 내역에 추가할 한 턴(사용자 메시지 + AI 응답)의 메시지 목록을 만듭니다."""
+    return [
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": ai_response}
+    ]
+
+
+def turn_count_label(conversation):
+    """'3/10' 형식의 대화 횟수 문자열을 만듭니다."""
+    return f"{len(conversation) // 2}/{MAX_CHAT_TURNS}"
+
+
+def sse_event(payload, event_id=None):
+    """
+    사전을 Server-Sent Events 형식의 한 이벤트 문자열로 변환합니다.
+    event_id를 주면 id 필드를 붙여, 재연결한 브라우저가 Last-Event-ID로 이어 받을 수 있게 합니다.
+    """
+    data = f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    return data if event_id is None else f"id: {event_id}\n{data}"
+
+
+def delta_text(chunk):
+    """스트리밍 청크에서 새로 생성된 텍스트 조각을 꺼냅니다."""
+    if chunk.choices and chunk.choices[0].delta.content:
+        return chunk.choices[0].delta.content
+    return ''
+
+
+def error_payload(error):
+    return {'error': f'오류가 발생했습니다: {str(error)}'}
+
+
+class ChatRequest:
+    """
+    /api/chat, /api/chat-stream 요청 하나 (봇, 메시지, 대화 내역, 업스트림 호출 인자)
+    동기/비동기 서비스가 저장소와 API를 부르는 방식만 다르고 나머지 규칙은 이 클래스를 함께 씁니다.
+    """
+
+    def __init__(self, data):
+        self.bot_type = data.get('bot_type')
+        self.message = data.get('message')
+        self.bot = get_bot(self.bot_type)
+        self.conversation_key = f'conversation_{self.bot_type}'
+        self.session_id = None
+        self.conversation = []
+        self.completion_kwargs = None
+        self.request_key = None
+
+    @property
+    def keeps_history(self):
+        return self.bot.keeps_history
+
+    @property
+    def cache_ttl(self):
+        return self.bot.cache_ttl
+
+    def finished_reply(self):
+        """10줄 대화가 끝났으면 바로 돌려줄 응답, 아니면 None"""
+        if self.keeps_history and is_conversation_finished(self.conversation):
+            return FINISHED_RESPONSE
+        return None
+
+    def prepare(self, prompt_history):
+        """업스트림 호출 인자와 응답 캐시/요청 합치기에 쓸 키를 만듭니다."""
+        self.completion_kwargs = self.bot.build_completion_kwargs(self.message, prompt_history)
+        self.request_key = make_cache_key(self.completion_kwargs)
+
+    def cache_hit(self):
+        metrics.record_cache_hit(self.bot_type)
+
+    def new_turn(self, ai_response):
+        """대화 내역에 추가할 메시지와 추가한 뒤의 대화 횟수 문자열"""
+        new_messages = turn_messages(self.message, ai_response)
+        return new_messages, turn_count_label(self.conversation + new_messages)
+
+    def observe_error(self):
+        metrics.record_error(self.bot_type, self.bot.model)
+
+    def observe_first_token(self, started):
+        metrics.observe_first_token(self.bot_type, self.bot.model, time.perf_counter() - started)
+
+    def observe_request(self, started, usage):
+        metrics.observe_request(self.bot_type, self.bot.model, time.perf_counter() - started, usage)
+
+
+def cached_stream(cached_response):
+    """캐시된 응답을 한 번에 보내는 SSE 본문"""
+    return sse_event({'delta': cached_response}) + sse_event({'done': True, 'cached': True})
+
+
+class ChatService:
+    """
+    /api/chat, /api/chat-stream 처리 (app.py)
+    대화 내역은 conversation_store, 토큰 예산은 context_window, 번역/요약 등의 응답은 response_cache에 두고,
+    동시에 들어온 같은 요청은 single_flight로 하나의 업스트림 호출로 합칩니다.
+    """
+
+    def __init__(self, client, conversation_store, context_window, response_cache, single_flight):
+        self.client = client
+        self.conversation_store = conversation_store
+        self.context_window = context_window
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+
+    def _load(self, chat, session):
+        """세션의 대화 내역을 읽고, 대화형 봇이면 오래된 턴을 토큰 예산에 맞춰 접은 뒤 호출 인자를 만듭니다."""
+        chat.session_id = get_session_id(session)
+        if chat.keeps_history:
+            chat.conversation = self.conversation_store.get(chat.session_id, chat.conversation_key)
+        if chat.finished_reply() is not None:
+            return
+        prompt_history = self.context_window.fit(chat.conversation, self.client) if chat.keeps_history else []
+        chat.prepare(prompt_history)
+
+    def _cached(self, chat):
+        if not chat.cache_ttl:
+            return None
+        cached_response = self.response_cache.get(chat.request_key)
+        if cached_response is not None:
+            chat.cache_hit()
+        return cached_response
+
+    def _save_turn(self, chat, ai_response):
+        new_messages, turn_count = chat.new_turn(ai_response)
+        self.conversation_store.append(chat.session_id, chat.conversation_key, new_messages)
+        return turn_count
+
+    def chat(self, data, session):
+        """/api/chat 요청을 처리하고 JSON으로 보낼 사전을 반환합니다."""
+        chat = ChatRequest(data)
+        if chat.bot is None:
+            return {'error': UNSUPPORTED_BOT_ERROR}
+
+        try:
+            self._load(chat, session)
+            if chat.finished_reply() is not None:
+                return chat.finished_reply()
+
+            # 같은 요청의 응답이 캐시되어 있으면 API를 호출하지 않습니다
+            cached_response = self._cached(chat)
+            if cached_response is not None:
+                return {'response': cached_response, 'cached': True}
+
+            def request_completion():
+                started = time.perf_counter()
+                try:
+                    response = self.client.chat.completions.create(**chat.completion_kwargs)
+                except Exception:
+                    chat.observe_error()
+                    raise
+                chat.observe_request(started, response.usage)
+                ai_response = response.choices[0].message.content
+                if chat.cache_ttl:
+                    self.response_cache.set(chat.request_key, ai_response, chat.cache_ttl)
+                return ai_response
+
+            if chat.keeps_history:
+                ai_response = request_completion()
+                return {'response': ai_response, 'turn_count': self._save_turn(chat, ai_response)}
+
+            # 같은 요청이 이미 진행 중이면 그 결과를 함께 받습니다
+            return {'response': self.single_flight.do(chat.request_key, request_completion)}
+
+        except Exception as e:
+            return error_payload(e)
+
+    def chat_stream(self, data, session):
+        """
+        /api/chat-stream 요청을 처리하고 SSE 본문(문자열 또는 이벤트 문자열을 생성하는 이터레이터)을 반환합니다.
+        대화 내역을 읽는 준비 단계는 요청 안에서 바로 하고, 업스트림 스트림은 응답을 보내면서 읽습니다.
+        """
+        chat = ChatRequest(data)
+        if chat.bot is None:
+            return sse_event({'error': UNSUPPORTED_BOT_ERROR})
+
+        self._load(chat, session)
+        if chat.finished_reply() is not None:
+            return sse_event(chat.finished_reply())
+
+        cached_response = self._cached(chat)
+        if cached_response is not None:
+            return cached_stream(cached_response)
+
+        def upstream_deltas():
+            parts = []
+            usage = None
+            started = time.perf_counter()
+            try:
+                stream = self.client.chat.completions.create(
+                    **chat.completion_kwargs, stream=True, stream_options={'include_usage': True}
+                )
+                for chunk in stream:
+                    # include_usage를 켜면 마지막 청크에 토큰 사용량이 담겨 옵니다
+                    if getattr(chunk, 'usage', None) is not None:
+                        usage = chunk.usage
+                    delta = delta_text(chunk)
+                    if delta:
+                        if not parts:
+                            chat.observe_first_token(started)
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                chat.observe_error()
+                raise
+            chat.observe_request(started, usage)
+            if chat.cache_ttl:
+                self.response_cache.set(chat.request_key, ''.join(parts), chat.cache_ttl)
+
+        # 같은 요청의 스트림이 이미 진행 중이면 그 스트림을 함께 받습니다
+        deltas = upstream_deltas() if chat.keeps_history else self.single_flight.stream(chat.request_key, upstream_deltas)
+
+        def generate():
+            parts = []
+            try:
+                for delta in deltas:
+                    parts.append(delta)
+                    yield sse_event({'delta': delta})
+            except Exception as e:
+                yield sse_event(error_payload(e))
+                return
+
+            done = {'done': True}
+            if chat.keeps_history:
+                # 스트림이 끝난 뒤 완성된 턴을 대화 내역에 추가합니다
+                done['turn_count'] = self._save_turn(chat, ''.join(parts))
+            yield sse_event(done)
+
+        return generate()
+
+    def reset(self, session, bot_type):
+        """봇의 대화 내역을 지웁니다."""
+        if 'sid' in session:
+            self.conversation_store.clear(session['sid'], f'conversation_{bot_type}')
+
+
+class AsyncChatService(ChatService):
+    """
+    ChatService의 asyncio 버전 (asgi_app.py). client는 AsyncOpenAI, single_flight는 AsyncSingleFlight입니다.
+    SQLite 대화 저장소와 응답 캐시의 디스크 계층은 동기 I/O이므로 asyncio.to_thread로 호출하여 이벤트 루프를 막지 않습니다.
+    """
+
+    async def _load(self, chat, session):
+        chat.session_id = get_session_id(session)
+        if chat.keeps_history:
+            chat.conversation = await asyncio.to_thread(
+                self.conversation_store.get, chat.session_id, chat.conversation_key
+            )
+        if chat.finished_reply() is not None:
+            return
+        prompt_history = await self.context_window.afit(chat.conversation, self.client) if chat.keeps_history else []
+        chat.prepare(prompt_history)
+
+    async def _cached(self, chat):
+        if not chat.cache_ttl:
+            return None
+        cached_response = await asyncio.to_thread(self.response_cache.get, chat.request_key)
+        if cached_response is not None:
+            chat.cache_hit()
+        return cached_response
+
+    async def _save_turn(self, chat, ai_response):
+        new_messages, turn_count = chat.new_turn(ai_response)
+        await asyncio.to_thread(self.conversation_store.append, chat.session_id, chat.conversation_key, new_messages)
+        return turn_count
+
+    async def chat(self, data, session):
+        chat = ChatRequest(data)
+        if chat.bot is None:
+            return {'error': UNSUPPORTED_BOT_ERROR}
+
+        try:
+            await self._load(chat, session)
+            if chat.finished_reply() is not None:
+                return chat.finished_reply()
+
+            cached_response = await self._cached(chat)
+            if cached_response is not None:
+                return {'response': cached_response, 'cached': True}
+
+            async def request_completion():
+                started = time.perf_counter()
+                try:
+                    response = await self.client.chat.completions.create(**chat.completion_kwargs)
+                except Exception:
+                    chat.observe_error()
+                    raise
+                chat.observe_request(started, response.usage)
+                ai_response = response.choices[0].message.content
+                if chat.cache_ttl:
+                    await asyncio.to_thread(self.response_cache.set, chat.request_key, ai_response, chat.cache_ttl)
+                return ai_response
+
+            if chat.keeps_history:
+                ai_response = await request_completion()
+                return {'response': ai_response, 'turn_count': await self._save_turn(chat, ai_response)}
+
+            return {'response': await self.single_flight.do(chat.request_key, request_completion)}
+
+        except Exception as e:
+            return error_payload(e)
+
+    async def chat_stream(self, data, session):
+        chat = ChatRequest(data)
+        if chat.bot is None:
+            return sse_event({'error': UNSUPPORTED_BOT_ERROR})
+
+        await self._load(chat, session)
+        if chat.finished_reply() is not None:
+            return sse_event(chat.finished_reply())
+
+        cached_response = await self._cached(chat)
+        if cached_response is not None:
+            return cached_stream(cached_response)
+
+        async def upstream_deltas():
+            parts = []
+            usage = None
+            started = time.perf_counter()
+            try:
+                stream = await self.client.chat.completions.create(
+                    **chat.completion_kwargs, stream=True, stream_options={'include_usage': True}
+                )
+                async for chunk in stream:
+                    if getattr(chunk, 'usage', None) is not None:
+                        usage = chunk.usage
+                    delta = delta_text(chunk)
+                    if delta:
+                        if not parts:
+                            chat.observe_first_token(started)
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                chat.observe_error()
+                raise
+            chat.observe_request(started, usage)
+            if chat.cache_ttl:
+                await asyncio.to_thread(self.response_cache.set, chat.request_key, ''.join(parts), chat.cache_ttl)
+
+        deltas = upstream_deltas() if chat.keeps_history else self.single_flight.stream(chat.request_key, upstream_deltas)
+
+        async def generate():
+            parts = []
+            try:
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield sse_event({'delta': delta})
+            except Exception as e:
+                yield sse_event(error_payload(e))
+                return
+
+            done = {'done': True}
+            if chat.keeps_history:
+                done['turn_count'] = await self._save_turn(chat, ''.join(parts))
+            yield sse_event(done)
+
+        return generate()
+
+    async def reset(self, session, bot_type):
+        if 'sid' in session:
+            await asyncio.to_thread(self.conversation_store.clear, session['sid'], f'conversation_{bot_type}')
@@ -17,9 +17,13 @@
 - 헬프데스크 티켓 우선순위 결정
 - 고객 서비스 담당자 배정
 - FAQ 자동 추천 시스템
+
+EMBEDDING_CACHE_DIR을 설정하면 카테고리 샘플처럼 이미 임베딩한 텍스트는 디스크 캐시(embedding_cache.py)에서
+꺼내 쓰고 API를 다시 호출하지 않습니다.
 """
 
 import os
+import sys
 from openai import OpenAI
 import numpy as np
 from dotenv import load_dotenv
@@ -27,6 +31,13 @@ from sklearn.cluster import KMeans
 from sklearn.metrics.pairwise import cosine_similarity
 import json
 
+# 상위 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.advanced.embedding_cache import create_embedding_cache
+
+EMBEDDING_MODEL = "text-embedding-ada-002"  # 임베딩 모델 지정
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -35,6 +46,9 @@ client = OpenAI(
     api_key=os.getenv('OPENAI_API_KEY')
 )
 
+# 디스크 임베딩 캐시 (EMBEDDING_CACHE_DIR이 없으면 None)
+embedding_cache = create_embedding_cache()
+
 class EmailClassifier:
     def __init__(self):
         # 미리 정의된 이메일 카테고리
@@ -65,14 +79,25 @@ class EmailClassifier:
         Embeddings API를 사용하여 텍스트의 의미를 수치화합니다
         """
         try:
+            text = text.replace("\n", " ")  # 개행 문자 제거
+
+            # 이미 임베딩한 텍스트면 캐시에서 꺼냅니다
+            if embedding_cache is not None:
+                cached = embedding_cache.get(EMBEDDING_MODEL, text)
+                if cached is not None:
+                    return cached
+
             # OpenAI Embeddings API 호출
             response = client.embeddings.create(
-                model="text-embedding-ada-002",  # 임베딩 모델 지정
-                input=text.replace("\n", " ")  # 개행 문자 제거
+                model=EMBEDDING_MODEL,
+                input=text
             )
 
             # 임베딩 벡터 반환
-            return response['data'][0]['embedding']
+            embedding = response.data[0].embedding
+            if embedding_cache is not None:
+                embedding_cache.set(EMBEDDING_MODEL, text, embedding)
+            return embedding
 
         except Exception as e:
             print(f"임베딩 생성 중 오류 발생: {e}")
@@ -0,0 +1,203 @@
+"""
+디스크 임베딩 캐시 (내용 주소 방식, 메모리 맵)
+
+뉴스 클러스터링 봇과 이메일 분류 봇은 실행할 때마다 이미 임베딩했던 텍스트를 다시 임베딩합니다.
+(같은 카테고리 샘플, 같은 기사) 이 캐시는 (모델, 정규화한 텍스트)의 해시를 키로 임베딩을 디스크에 보관하여
+다음 실행부터는 API를 호출하지 않고 바로 돌려줍니다.
+
+- vectors.f32: 임베딩을 float32로 이어 붙이기만 하는(append-only) 파일. 읽을 때는 메모리 맵으로 열어
+  복사하지 않고 그 위치의 읽기 전용 배열 뷰를 돌려줍니다.
+- index.db: 키 -> (파일 위치, 차원) SQLite 색인
+- 벡터를 파일에 다 쓰고 flush한 뒤에 색인에 넣으므로, 다른 프로세스가 읽는 중에도 덜 쓰인 벡터를 보지 않습니다.
+  쓰기는 잠금 파일(fcntl.flock, 없는 환경에서는 프로세스 안의 잠금만)로 한 번에 하나씩 진행합니다.
+
+환경 변수:
+- EMBEDDING_CACHE_DIR: 캐시 디렉토리 (없으면 캐시 사용 안 함)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+VECTOR_FILE = 'vectors.f32'
+INDEX_FILE = 'index.db'
+LOCK_FILE = 'write.lock'
+ITEM_SIZE = np.dtype(np.float32).itemsize
+
+
+def normalize_text(text):
+    """캐시 키용 텍스트: 유니코드 정규화, 연속된 공백과 줄바꿈을 공백 하나로"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def make_embedding_key(model, text):
+    """(모델, 정규화한 텍스트)의 SHA-256 해시"""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """메모리 맵 파일에 임베딩을 보관하는 디스크 캐시"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.vector_path = os.path.join(directory, VECTOR_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        open(self.vector_path, 'ab').close()
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._map = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                dimensions INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _vectors(self, end):
+        """end(원소 수)까지 담긴 메모리 맵. 파일이 그 뒤로 자랐으면 다시 엽니다."""
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                self._map = np.memmap(self.vector_path, dtype=np.float32, mode='r')
+            return self._map
+
+    def _lookup(self, keys):
+        """색인에서 키 -> (위치, 차원)을 찾습니다."""
+        rows = {}
+        connection = self._connection()
+        # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회합니다
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows.update((key, (offset, dimensions)) for key, offset, dimensions in connection.execute(
+                f"SELECT key, offset, dimensions FROM embeddings WHERE key IN ({placeholders})", chunk
+            ))
+        return rows
+
+    def get_many(self, model, texts):
+        """텍스트마다 캐시된 임베딩(읽기 전용 float32 뷰, 없으면 None) 목록을 반환합니다."""
+        keys = [make_embedding_key(model, text) for text in texts]
+        rows = self._lookup(keys)
+
+        results = [None] * len(keys)
+        if rows:
+            vectors = self._vectors(max(offset + dimensions for offset, dimensions in rows.values()))
+            for i, key in enumerate(keys):
+                if key in rows:
+                    offset, dimensions = rows[key]
+                    results[i] = vectors[offset:offset + dimensions]
+
+        with self._lock:
+            found = sum(result is not None for result in results)
+            self.hits += found
+            self.misses += len(results) - found
+        return results
+
+    def get(self, model, text):
+        """캐시된 임베딩을 반환합니다. 없으면 None."""
+        return self.get_many(model, [text])[0]
+
+    def set_many(self, model, texts, embeddings):
+        """임베딩 여러 개를 파일 끝에 이어 쓰고 색인에 추가합니다. (이미 있는 키는 건너뜀)"""
+        items = {}
+        for text, embedding in zip(texts, embeddings):
+            if embedding is not None:
+                items.setdefault(make_embedding_key(model, text), embedding)
+        if not items:
+            return
+
+        with self._write_lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # 잠금을 얻은 뒤에 다시 확인하여 다른 프로세스가 먼저 쓴 임베딩은 중복해서 쓰지 않습니다
+                existing = self._lookup(list(items))
+                new_items = [(key, np.asarray(embedding, dtype=np.float32))
+                             for key, embedding in items.items() if key not in existing]
+                if not new_items:
+                    return
+
+                rows = []
+                with open(self.vector_path, 'r+b') as f:
+                    # 이전 쓰기가 도중에 멈춰 남은 조각(색인에 없는 바이트)은 잘라내어 위치를 float32 단위로 맞춥니다
+                    size = f.seek(0, os.SEEK_END)
+                    aligned = size - size % ITEM_SIZE
+                    if aligned != size:
+                        f.truncate(aligned)
+                        f.seek(aligned)
+                    offset = aligned // ITEM_SIZE
+                    for key, vector in new_items:
+                        f.write(vector.tobytes())
+                        rows.append((key, offset, len(vector)))
+                        offset += len(vector)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                # 벡터를 다 쓴 뒤에 색인에 넣어야 읽는 쪽이 덜 쓰인 벡터를 보지 않습니다
+                connection = self._connection()
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO embeddings (key, offset, dimensions) VALUES (?, ?, ?)", rows
+                    )
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+                with self._lock:
+                    self.stored += len(rows)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def set(self, model, text, embedding):
+        self.set_many(model, [text], [embedding])
+
+    def stats(self):
+        row = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': row[0],
+                'bytes': os.path.getsize(self.vector_path),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def create_embedding_cache():
+    """환경 변수 설정에 맞는 임베딩 캐시를 만듭니다. EMBEDDING_CACHE_DIR이 없으면 None."""
+    directory = os.getenv('EMBEDDING_CACHE_DIR')
+    if not directory:
+        return None
+    return EmbeddingCache(directory)
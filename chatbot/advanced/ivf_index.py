@@ -0,0 +1,236 @@
+"""
+IVF(Inverted File) 근사 최근접 이웃 인덱스 - 순수 NumPy 구현
+
+기사가 수십만~수백만 개가 되면 모든 임베딩과 유사도를 구하는 전수 검색도 질의마다 수백 ms~수 초가 걸립니다.
+IVF는 임베딩을 k-means 중심점(coarse quantizer) 주위의 목록(list)으로 나눠 두고, 질의와 가까운
+중심점 n_probe개의 목록만 비교하므로 비교할 벡터 수가 n_probe / n_lists 비율로 줄어듭니다.
+
+- 벡터는 복사하지 않습니다. 인덱스는 공유 행렬(예: EmbeddingMatrix)의 행 번호만 목록마다 보관하고,
+  검색할 때 확인할 목록의 행만 공유 행렬에서 모아 비교합니다. (1536차원 100만 개면 float32로 약 6GB를 아낌)
+- 공유 행렬의 행은 길이 1로 정규화되어 있어야 합니다 (내적 = 코사인 유사도)
+- train() 전에 추가한 행은 전수 검색하고, train()하면 모든 행을 목록에 배정합니다
+- train() 뒤의 add()는 가장 가까운 중심점의 목록에 바로 추가합니다 (증분 추가)
+- 기사 분포가 많이 바뀌면 train()을 다시 호출해 중심점을 새로 구할 수 있습니다
+- save() / load()로 중심점과 목록(행 번호)을 .npz 파일 하나에 저장하고 불러옵니다 (벡터는 저장하지 않음)
+- 행이 exact_below개보다 적으면 목록을 고르지 않고 전수 검색합니다 (그 정도면 전수 검색도 충분히 빠름)
+
+재현율과 n_probe:
+가까운 이웃이 확인하지 않은 목록에 있으면 놓치므로 재현율(recall)이 1보다 낮아집니다.
+질의 시간은 n_probe에 거의 비례합니다. 주제별로 모인 무작위 임베딩(benchmarks/similarity_search.py --ann)의 recall@10:
+
+    기사 수 x 차원      n_probe=1   4      16     64
+    100,000 x 1536      0.89       1.00   1.00   1.00   (전수 59.5ms -> n_probe=16에서 2.9ms)
+    100,000 x 256       0.94       1.00   1.00   1.00
+    20,000 x 256        0.82       0.86   0.89   0.93
+
+기사가 적으면 주제당 기사 수도 적어 상위 k개에 주제와 무관한 기사가 섞이고, 이런 이웃은 어느 목록에 있을지
+알 수 없어 n_probe를 올려도 재현율이 잘 오르지 않습니다. 그래서 행이 exact_below(기본값 50,000)개보다 적으면
+전수 검색하고(256차원 5만 개에 수 ms), 그보다 많을 때 기본값 n_probe=16으로 목록의 약 1%만 확인합니다.
+놓치면 안 되는 검색은 n_probe를 올리거나 find_similar_articles(exact=True)를 쓰세요.
+
+사용 예:
+embeddings = EmbeddingMatrix()
+embeddings.extend(vectors)
+index = IVFIndex(embeddings)
+index.add(np.arange(len(embeddings)))
+index.train()
+ids, scores = index.search(query, k=10, threshold=0.7)
+"""
+
+import numpy as np
+
+KMEANS_ITERATIONS = 10
+TRAIN_SAMPLES_PER_LIST = 64  # 중심점을 구할 때 목록 하나당 사용할 표본 수 (많을수록 정확하지만 느림)
+DEFAULT_N_PROBE = 16
+EXACT_SEARCH_BELOW = 50000  # 행이 이보다 적으면 목록을 고르지 않고 전수 검색합니다
+
+
+def normalize_rows(vectors):
+    """행마다 길이 1로 정규화한 float32 배열"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=KMEANS_ITERATIONS, seed=42):
+    """정규화한 벡터의 k-means (코사인 유사도 기준). 길이 1인 중심점 (n_clusters, 차원)을 반환합니다."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_clusters)
+        # 비어 있는 중심점은 무작위 벡터로 다시 뽑습니다
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class _InvertedList:
+    """목록 하나에 속한 행 번호. 용량이 모자라면 두 배로 늘립니다."""
+
+    def __init__(self, capacity=16):
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    def extend(self, ids):
+        end = self.size + len(ids)
+        if end > len(self.ids):
+            grown = np.empty(max(len(self.ids) * 2, end), dtype=np.int64)
+            grown[:self.size] = self.ids[:self.size]
+            self.ids = grown
+        self.ids[self.size:end] = ids
+        self.size = end
+
+    def view(self):
+        return self.ids[:self.size]
+
+
+class IVFIndex:
+    """
+    IVF 근사 최근접 이웃 인덱스
+
+    Args:
+        vectors: 길이 1로 정규화한 벡터를 행으로 가진 공유 행렬. array 속성이 있으면(EmbeddingMatrix)
+            검색할 때마다 그 속성을 읽으므로, 행렬이 커지며 다시 할당되어도 그대로 사용할 수 있습니다.
+        n_lists: 목록(중심점) 수. None이면 train() 때 벡터 수에 맞춰 정합니다 (약 4 * sqrt(N))
+        n_probe: 질의마다 확인할 목록 수. 클수록 재현율이 높고 느려집니다. (모듈 설명의 재현율 참고)
+        exact_below: 행이 이보다 적으면 전수 검색합니다 (0이면 항상 목록만 확인)
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=DEFAULT_N_PROBE, exact_below=EXACT_SEARCH_BELOW):
+        self.vectors = vectors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.exact_below = exact_below
+        self.centroids = None
+        self._lists = []
+        # train() 전에 추가한 행 (전수 검색)
+        self._pending = _InvertedList()
+
+    def __len__(self):
+        return self._pending.size + sum(inverted_list.size for inverted_list in self._lists)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def _matrix(self):
+        return getattr(self.vectors, 'array', self.vectors)
+
+    def _assign(self, ids):
+        labels = np.argmax(self._matrix()[ids] @ self.centroids.T, axis=1)
+        order = np.argsort(labels, kind='stable')
+        labels, ids = labels[order], ids[order]
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        for start, end in zip(starts, np.r_[starts[1:], len(labels)]):
+            self._lists[labels[start]].extend(ids[start:end])
+
+    def add(self, ids):
+        """공유 행렬의 행 번호(ids)를 인덱스에 추가합니다. 학습한 뒤라면 가장 가까운 목록에 바로 배정합니다."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        if self.trained:
+            self._assign(ids)
+        else:
+            self._pending.extend(ids)
+
+    def _all(self):
+        """지금까지 추가한 모든 행 번호"""
+        return np.concatenate([part.view() for part in [self._pending] + self._lists])
+
+    def train(self, n_lists=None, seed=42):
+        """추가한 행으로 중심점을 구하고(k-means) 모든 행을 목록에 다시 배정합니다."""
+        ids = self._all()
+        n_lists = n_lists or self.n_lists or max(1, int(4 * np.sqrt(len(ids))))
+        n_lists = min(n_lists, len(ids))
+        if n_lists == 0:
+            raise ValueError("인덱스를 학습하려면 벡터가 하나 이상 필요합니다.")
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(ids), n_lists * TRAIN_SAMPLES_PER_LIST)
+        sample = self._matrix()[np.sort(rng.choice(ids, sample_size, replace=False))]
+
+        self.n_lists = n_lists
+        self.centroids = spherical_kmeans(sample, n_lists, seed=seed)
+        self._lists = [_InvertedList() for _ in range(n_lists)]
+        self._pending = _InvertedList()
+        self._assign(ids)
+
+    def search(self, query, k=10, threshold=None, n_probe=None, exclude=None):
+        """
+        query와 코사인 유사도가 높은 최대 k개의 (id 배열, 유사도 배열)을 높은 순으로 반환합니다.
+        threshold가 있으면 그 이상인 것만, exclude가 있으면 그 id는 빼고 반환합니다.
+        """
+        query = normalize_rows(query)[0]
+        n_probe = min(n_probe or self.n_probe, self.n_lists or 0)
+
+        matrix = self._matrix()
+        if len(self) == len(matrix) and (not self.trained or len(self) < self.exact_below):
+            # 공유 행렬의 모든 행이 인덱스에 있으면 행을 모으지 않고 행렬 전체와 바로 비교합니다
+            ids = np.arange(len(matrix))
+            scores = matrix @ query
+        else:
+            candidates = [self._pending]
+            if self.trained and len(self) < self.exact_below:
+                candidates += self._lists
+            elif self.trained and n_probe:
+                nearest = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+                candidates += [self._lists[i] for i in nearest]
+
+            # 확인할 목록의 행만 공유 행렬에서 모아 유사도를 구합니다
+            ids = np.concatenate([c.view() for c in candidates])
+            scores = matrix[ids] @ query
+        if not len(ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+        if threshold is not None:
+            keep = scores >= threshold
+            scores, ids = scores[keep], ids[keep]
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        keep = np.isfinite(scores[top])
+        return ids[top][keep], scores[top][keep]
+
+    def save(self, path):
+        """중심점과 목록(행 번호)을 .npz 파일 하나에 저장합니다. 벡터는 공유 행렬에 있으므로 저장하지 않습니다."""
+        parts = [self._pending] + self._lists
+        np.savez(
+            path,
+            n_lists=-1 if self.n_lists is None else self.n_lists,
+            n_probe=self.n_probe,
+            exact_below=self.exact_below,
+            centroids=self.centroids if self.trained else np.empty((0, 0), dtype=np.float32),
+            sizes=np.array([part.size for part in parts], dtype=np.int64),
+            ids=self._all(),
+        )
+
+    @classmethod
+    def load(cls, path, vectors):
+        """save()로 저장한 인덱스를 불러옵니다. vectors는 인덱스를 만들 때와 같은 순서의 공유 행렬이어야 합니다."""
+        with np.load(path) as data:
+            n_lists = int(data['n_lists'])
+            index = cls(vectors, None if n_lists < 0 else n_lists, int(data['n_probe']), int(data['exact_below']))
+            if len(data['centroids']):
+                index.centroids = data['centroids']
+                index._lists = [_InvertedList() for _ in range(len(index.centroids))]
+
+            offsets = np.r_[0, np.cumsum(data['sizes'])]
+            ids = data['ids']
+            for part, start, end in zip([index._pending] + index._lists, offsets[:-1], offsets[1:]):
+                if end > start:
+                    part.extend(ids[start:end])
+        return index
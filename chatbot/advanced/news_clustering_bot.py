@@ -25,19 +25,49 @@
 - 코사인 유사도를 통한 기사 간 관련성 측정
 - 클러스터별 대표 기사 선정
 - 주요 키워드 및 토픽 추출
+
+대량 수집:
+- add_news_articles()는 여러 기사를 임베딩 요청 하나에 묶어(입력 수와 토큰 수 한도 안에서)
+  여러 묶음을 동시에 요청합니다. 기사 하나씩 요청하는 add_news_article()보다 왕복 횟수가 묶음 크기만큼 줄어듭니다.
+  (속도 비교: python benchmarks/embedding_ingest.py)
+
+근사 검색:
+- 기사가 아주 많으면 build_index()로 IVF 근사 최근접 이웃 인덱스(ivf_index.py)를 만들어
+  find_similar_articles()가 전수 검색 대신 인덱스를 사용하게 할 수 있습니다. 인덱스는 self.embeddings의 행 번호만
+  보관하고, 기사가 5만 개보다 적으면 재현율을 위해 전수 검색합니다.
+  (재현율과 질의 시간 비교: python benchmarks/similarity_search.py --ann)
+
+점진적 클러스터링:
+- cluster_news(incremental=True)로 한 번 클러스터링하면, 이후 추가하는 기사는 가장 가까운 중심점에 바로 배정되고
+  (기사당 O(k·d)) 중심점은 MiniBatchKMeans.partial_fit으로 조금씩 갱신됩니다. 전체 기사로 다시 학습하는 것은
+  새 기사들이 배정된 중심점과 닮은 정도(평균 코사인 유사도)가 마지막 전체 학습 때보다 drift_threshold 비율 이상
+  떨어졌을 때(기존 클러스터로 설명되지 않는 새 주제가 늘었을 때)뿐입니다.
+  (비교: python benchmarks/incremental_clustering.py)
+
+임베딩 캐시:
+- EMBEDDING_CACHE_DIR을 설정하면 한 번 임베딩한 기사는 디스크 캐시(embedding_cache.py)에서 꺼내 쓰고
+  API를 다시 호출하지 않습니다.
 """
 
 import os
-from openai import OpenAI
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, APIConnectionError, BadRequestError, InternalServerError, RateLimitError
 import numpy as np
 from dotenv import load_dotenv
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.cluster import KMeans, MiniBatchKMeans
 import json
 from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 상위 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.advanced.embedding_cache import create_embedding_cache
+from chatbot.advanced.ivf_index import DEFAULT_N_PROBE, IVFIndex
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -46,11 +76,127 @@ client = OpenAI(
     api_key=os.getenv('OPENAI_API_KEY')
 )
 
+# 디스크 임베딩 캐시 (EMBEDDING_CACHE_DIR이 없으면 None)
+embedding_cache = create_embedding_cache()
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_MAX_CHARS = 8000        # 기사 하나의 최대 글자 수 (API 입력 길이 제한을 고려)
+EMBEDDING_BATCH_INPUTS = 512      # 요청 하나에 담을 최대 기사 수 (API 한도 2048)
+EMBEDDING_BATCH_TOKENS = 100000   # 요청 하나에 담을 최대 토큰 수 (API 한도 300,000)
+EMBEDDING_CONCURRENCY = 4         # 동시에 보낼 임베딩 요청 수
+CLUSTER_DRIFT_THRESHOLD = 0.2     # 점진적 클러스터링에서 전체 재학습을 시작할 새 기사의 중심점 유사도 하락 비율
+CLUSTER_DRIFT_MIN_ARTICLES = 100  # 하락 비율을 판단하기 전에 모을 새 기사 수
+EMBEDDING_MAX_RETRIES = 3         # 일시적인 오류(요청 한도, 서버 오류, 연결 끊김)로 묶음을 다시 시도할 횟수
+
+def prepare_text(text):
+    """임베딩 전 텍스트 전처리 (줄바꿈 제거, 길이 제한)"""
+    return text.replace('\n', ' ').strip()[:EMBEDDING_MAX_CHARS]
+
+def estimate_tokens(text):
+    """토큰 수 어림값. 한도를 넘지 않도록 넉넉하게 셉니다 (한글은 약 1글자, 영어는 약 3~4글자당 1토큰)"""
+    return max(1, (len(text.encode('utf-8')) + 2) // 3)
+
+def pack_batches(texts, max_inputs=EMBEDDING_BATCH_INPUTS, max_tokens=EMBEDDING_BATCH_TOKENS):
+    """텍스트를 순서대로 요청 묶음으로 나눕니다. 묶음마다 입력 수와 토큰 수 한도를 지킵니다. (인덱스 목록의 목록)"""
+    batches, batch, batch_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+class EmbeddingMatrix:
+    """
+    길이 1로 정규화한 임베딩을 행으로 쌓는 float32 행렬
+
+    파이썬 float 리스트 대신 연속된 float32 배열 하나에 보관하므로 메모리가 크게 줄고,
+    코사인 유사도를 행렬-벡터 곱 한 번으로 구할 수 있습니다.
+    용량이 모자라면 두 배로 늘리므로 하나씩 추가해도 복사 비용은 평균 상수 시간입니다.
+    """
+
+    def __init__(self, dimensions=None, capacity=1024):
+        self._data = None if dimensions is None else np.empty((capacity, dimensions), dtype=np.float32)
+        self._initial_capacity = capacity
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    @property
+    def array(self):
+        """채워진 행만 보여주는 (기사 수, 차원) 뷰"""
+        if self._data is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._data[:self._size]
+
+    def _reserve(self, rows, dimensions):
+        if self._data is None:
+            self._data = np.empty((max(self._initial_capacity, rows), dimensions), dtype=np.float32)
+        elif dimensions != self._data.shape[1]:
+            raise ValueError(f"임베딩 차원이 다릅니다: {dimensions} (기존 {self._data.shape[1]})")
+        if self._size + rows > len(self._data):
+            capacity = max(len(self._data) * 2, self._size + rows)
+            data = np.empty((capacity, self._data.shape[1]), dtype=np.float32)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def extend(self, vectors):
+        """임베딩 여러 개를 정규화하여 추가합니다."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return
+        self._reserve(len(vectors), vectors.shape[1])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._data[self._size:self._size + len(vectors)] = vectors / norms
+        self._size += len(vectors)
+
+    def append(self, vector):
+        """임베딩 하나를 정규화하여 추가합니다."""
+        self.extend([vector])
+
+    def similarities(self, query):
+        """모든 행과 query의 코사인 유사도"""
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return self.array @ (query / norm if norm else query)
+
+    def top_k(self, query, k=None, exclude=None, threshold=None):
+        """
+        유사도가 높은 k개(None이면 모두)의 (인덱스 배열, 유사도 배열)을 높은 순으로 반환합니다.
+        threshold가 있으면 그 이상인 행만 후보로 삼습니다.
+        전체를 정렬하지 않고 argpartition으로 상위 k개만 고른 뒤 그 k개만 정렬합니다.
+        """
+        scores = self.similarities(query)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        candidates = np.flatnonzero(scores >= threshold) if threshold is not None else np.flatnonzero(np.isfinite(scores))
+        k = len(candidates) if k is None else min(k, len(candidates))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
 class NewsClusterer:
     def __init__(self):
         self.news_articles = []  # 뉴스 기사 저장
-        self.embeddings = []     # 임베딩 벡터 저장
+        self.embeddings = EmbeddingMatrix()  # 정규화한 임베딩 벡터 (float32 행렬)
+        self.index = None                    # 근사 검색 인덱스 (build_index() 또는 load_index() 후 사용)
         self.clusters = {}       # 클러스터 결과 저장
+        self.kmeans = None                   # 점진적 클러스터링 모델 (cluster_news(incremental=True) 후 사용)
+        self.drift_threshold = CLUSTER_DRIFT_THRESHOLD
+        self.refits = 0                      # 점진적 클러스터링 중 전체 재학습 횟수
+        self._fitted_similarity = None       # 마지막 전체 학습 때 기사와 중심점의 평균 유사도
+        self._new_similarity = []            # 그 뒤 추가한 기사와 배정된 중심점의 유사도
 
     def get_embedding(self, text):
         """
@@ -59,22 +205,122 @@ class NewsClusterer:
         """
         try:
             # 텍스트 전처리 (줄바꿈 제거, 길이 제한)
-            text = text.replace('\n', ' ').strip()
-            if len(text) > 8000:  # API 제한을 고려한 길이 제한
-                text = text[:8000]
+            text = prepare_text(text)
+
+            # 이미 임베딩한 텍스트면 캐시에서 꺼냅니다
+            if embedding_cache is not None:
+                cached = embedding_cache.get(EMBEDDING_MODEL, text)
+                if cached is not None:
+                    return cached
 
             # OpenAI Embeddings API 호출
             response = client.embeddings.create(
-                model="text-embedding-ada-002",
+                model=EMBEDDING_MODEL,
                 input=text
             )
 
-            return response['data'][0]['embedding']
+            embedding = response.data[0].embedding
+            if embedding_cache is not None:
+                embedding_cache.set(EMBEDDING_MODEL, text, embedding)
+            return embedding
 
         except Exception as e:
             print(f"임베딩 생성 중 오류 발생: {e}")
             return None
 
+    def _embed_batch(self, texts):
+        """
+        텍스트 묶음을 요청 하나로 임베딩합니다. 입력 순서대로 임베딩(실패하면 None) 목록을 반환합니다.
+        - 입력 오류(400)는 묶음을 반으로 나눠 다시 요청하므로, 문제가 있는 기사만 실패하고 나머지는 살아남습니다.
+        - 일시적인 오류는 잠시 기다렸다가 묶음을 다시 요청합니다.
+        - 그 밖의 오류(인증, 주소 등)는 다시 시도해도 같으므로 묶음 전체를 실패로 돌려줍니다.
+        """
+        for attempt in range(EMBEDDING_MAX_RETRIES):
+            try:
+                response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+                # 응답 순서가 아니라 index로 입력과 맞춥니다
+                embeddings = [None] * len(texts)
+                for item in response.data:
+                    embeddings[item.index] = item.embedding
+                return embeddings
+            except BadRequestError as e:
+                if len(texts) == 1:
+                    print(f"임베딩 생성 중 오류 발생: {e}")
+                    return [None]
+                middle = len(texts) // 2
+                return self._embed_batch(texts[:middle]) + self._embed_batch(texts[middle:])
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                error = e
+                if attempt + 1 < EMBEDDING_MAX_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+            except Exception as e:
+                error = e
+                break
+        print(f"임베딩 생성 중 오류 발생 (기사 {len(texts)}개): {error}")
+        return [None] * len(texts)
+
+    def get_embeddings(self, texts, concurrency=EMBEDDING_CONCURRENCY):
+        """
+        여러 텍스트를 묶음 요청으로 임베딩하는 함수
+        묶음을 최대 concurrency개씩 동시에 요청하며, 입력 순서대로 임베딩(실패하면 None) 목록을 반환합니다.
+        """
+        texts = [prepare_text(text) for text in texts]
+        if embedding_cache is not None:
+            embeddings = embedding_cache.get_many(EMBEDDING_MODEL, texts)
+        else:
+            embeddings = [None] * len(texts)
+
+        # 캐시에 없는 텍스트만 요청합니다
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        batches = [[missing[j] for j in batch] for batch in pack_batches([texts[i] for i in missing])]
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = pool.map(lambda batch: self._embed_batch([texts[i] for i in batch]), batches)
+            for batch, batch_embeddings in zip(batches, results):
+                for i, embedding in zip(batch, batch_embeddings):
+                    embeddings[i] = embedding
+
+        if embedding_cache is not None and missing:
+            embedding_cache.set_many(EMBEDDING_MODEL, [texts[i] for i in missing], [embeddings[i] for i in missing])
+        return embeddings
+
+    def add_news_articles(self, articles, concurrency=EMBEDDING_CONCURRENCY):
+        """
+        뉴스 기사 여러 개를 한꺼번에 추가하는 함수
+        articles: {'title', 'content', 'source'(선택), 'date'(선택)} 딕셔너리의 이터러블
+
+        기사는 입력 순서대로 추가되고 id도 그 순서로 붙습니다.
+        입력 순서대로 붙은 id(임베딩에 실패한 기사는 None) 목록을 반환합니다.
+        """
+        articles = list(articles)
+        full_texts = [f"{article['title']}. {article['content']}" for article in articles]
+
+        print(f"기사 {len(articles)}개 임베딩 생성 중...")
+        embeddings = self.get_embeddings(full_texts, concurrency)
+
+        ids = []
+        added = []
+        start = len(self.embeddings)
+        for article, full_text, embedding in zip(articles, full_texts, embeddings):
+            if embedding is None:
+                print(f"기사 추가 실패: {article['title']}")
+                ids.append(None)
+                continue
+            article_id = len(self.news_articles)
+            self.news_articles.append({
+                'id': article_id,
+                'title': article['title'],
+                'content': article['content'],
+                'source': article.get('source', ""),
+                'date': article.get('date', ""),
+                'full_text': full_text
+            })
+            added.append(embedding)
+            ids.append(article_id)
+        self.embeddings.extend(added)
+        self._articles_added(start)
+        return ids
+
     def add_news_article(self, title, content, source="", date=""):
         """
         뉴스 기사를 추가하는 함수
@@ -86,7 +332,7 @@ class NewsClusterer:
         print(f"기사 임베딩 생성 중: {title[:50]}...")
         embedding = self.get_embedding(full_text)
 
-        if embedding:
+        if embedding is not None:
             article_data = {
                 'id': len(self.news_articles),
                 'title': title,
@@ -98,14 +344,73 @@ class NewsClusterer:
 
             self.news_articles.append(article_data)
             self.embeddings.append(embedding)
+            self._articles_added(article_data['id'])
             return True
         else:
             print(f"기사 추가 실패: {title}")
             return False
 
-    def cluster_news(self, num_clusters=None):
+    def _articles_added(self, start):
+        """start번째부터 새로 추가한 기사를 검색 인덱스와 점진적 클러스터에 반영합니다."""
+        vectors = self.embeddings.array[start:]
+        if not len(vectors):
+            return
+        ids = np.arange(start, start + len(vectors))
+        if self.index is not None:
+            self.index.add(ids)
+        if self.kmeans is not None:
+            self._update_clusters(vectors, ids)
+
+    def _set_clusters(self, cluster_labels):
+        self.clusters = {}
+        for i, label in enumerate(cluster_labels):
+            self.clusters.setdefault(int(label), []).append(self.news_articles[i])
+
+    def _centroid_similarity(self, vectors, labels):
+        """(정규화한) 기사와 배정된 중심점의 코사인 유사도"""
+        centroids = self.kmeans.cluster_centers_
+        centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return np.sum(vectors * centroids[labels], axis=1)
+
+    def _fit_incremental(self, num_clusters):
+        """모든 기사로 MiniBatchKMeans를 학습하고 클러스터를 새로 만듭니다."""
+        self.kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=42, batch_size=1024, n_init=3)
+        labels = self.kmeans.fit_predict(self.embeddings.array)
+        self._set_clusters(labels)
+        self._fitted_similarity = float(np.mean(self._centroid_similarity(self.embeddings.array, labels)))
+        self._new_similarity = []
+
+    def cluster_drift(self):
+        """
+        마지막 전체 학습 이후 추가한 기사가 배정된 중심점과 닮은 정도가 얼마나 떨어졌는지 (비율)
+        0이면 학습 때와 같고, 기존 클러스터에 맞지 않는 새 주제의 기사가 많을수록 커집니다.
+        """
+        if self.kmeans is None or not self._new_similarity or self._fitted_similarity <= 0:
+            return 0.0
+        recent = float(np.mean(np.concatenate(self._new_similarity)))
+        return max(0.0, 1.0 - recent / self._fitted_similarity)
+
+    def _update_clusters(self, vectors, ids):
+        """새 기사를 가장 가까운 중심점의 클러스터에 넣고 중심점을 조금씩 갱신합니다."""
+        # 새 기사마다 중심점 k개와만 비교합니다
+        labels = self.kmeans.predict(vectors)
+        for article_id, label in zip(ids, labels):
+            self.clusters.setdefault(int(label), []).append(self.news_articles[article_id])
+        self._new_similarity.append(self._centroid_similarity(vectors, labels))
+        self.kmeans.partial_fit(vectors)
+
+        # 새 기사가 기존 클러스터에 잘 맞지 않게 되었으면 전체를 다시 학습합니다
+        new_articles = sum(len(similarity) for similarity in self._new_similarity)
+        drift = self.cluster_drift()
+        if new_articles >= CLUSTER_DRIFT_MIN_ARTICLES and drift > self.drift_threshold:
+            print(f"새 기사의 중심점 유사도가 {drift:.0%} 떨어졌습니다: 전체 기사로 다시 클러스터링합니다...")
+            self._fit_incremental(self.kmeans.n_clusters)
+            self.refits += 1
+
+    def cluster_news(self, num_clusters=None, incremental=False):
         """
         뉴스 기사들을 클러스터링하는 함수
+        incremental=True이면 이후 추가하는 기사를 다시 클러스터링하지 않고 바로 클러스터에 배정합니다.
         """
         if len(self.news_articles) < 2:
             print("클러스터링을 위해 최소 2개의 기사가 필요합니다.")
@@ -118,16 +423,17 @@ class NewsClusterer:
         print(f"{len(self.news_articles)}개 기사를 {num_clusters}개 그룹으로 클러스터링 중...")
 
         try:
+            if incremental:
+                self._fit_incremental(num_clusters)
+                return True
+
             # K-means 클러스터링 실행
+            self.kmeans = None
             kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-            cluster_labels = kmeans.fit_predict(self.embeddings)
+            cluster_labels = kmeans.fit_predict(self.embeddings.array)
 
             # 클러스터 결과 저장
-            self.clusters = {}
-            for i, label in enumerate(cluster_labels):
-                if label not in self.clusters:
-                    self.clusters[label] = []
-                self.clusters[label].append(self.news_articles[i])
+            self._set_clusters(cluster_labels)
 
             return True
 
@@ -135,27 +441,54 @@ class NewsClusterer:
             print(f"클러스터링 중 오류 발생: {e}")
             return False
 
-    def find_similar_articles(self, target_article_id, threshold=0.7):
+    def build_index(self, n_lists=None, n_probe=DEFAULT_N_PROBE):
+        """
+        지금까지 추가한 기사로 IVF 근사 검색 인덱스를 만드는 함수
+        인덱스는 self.embeddings의 행 번호만 보관하므로 임베딩을 한 벌 더 쓰지 않습니다.
+        이후 추가하는 기사는 인덱스에도 바로 들어가고, find_similar_articles()는 인덱스로 검색합니다.
+        """
+        if not len(self.embeddings):
+            print("인덱스를 만들려면 기사가 하나 이상 필요합니다.")
+            return False
+        index = IVFIndex(self.embeddings, n_lists, n_probe)
+        index.add(np.arange(len(self.embeddings)))
+        index.train()
+        self.index = index
+        return True
+
+    def save_index(self, path):
+        """근사 검색 인덱스를 .npz 파일로 저장하는 함수"""
+        if self.index is not None:
+            self.index.save(path)
+
+    def load_index(self, path):
+        """저장한 근사 검색 인덱스를 불러오는 함수 (같은 순서로 추가한 기사에 대해 만든 인덱스여야 합니다)"""
+        self.index = IVFIndex.load(path, self.embeddings)
+
+    def find_similar_articles(self, target_article_id, threshold=0.7, top_k=None, exact=False):
         """
         특정 기사와 유사한 기사들을 찾는 함수
+        유사도가 threshold 이상인 기사 중 가장 비슷한 top_k개를 유사도 순으로 반환합니다. (top_k=None이면 모두)
+        인덱스가 있으면 근사 검색을 하고, exact=True이면 인덱스가 있어도 전수 검색을 합니다.
         """
         if target_article_id >= len(self.news_articles):
             return []
 
         target_embedding = self.embeddings[target_article_id]
-        similar_articles = []
-
-        for i, embedding in enumerate(self.embeddings):
-            if i != target_article_id:
-                similarity = cosine_similarity([target_embedding], [embedding])[0][0]
-                if similarity >= threshold:
-                    article = self.news_articles[i].copy()
-                    article['similarity'] = similarity
-                    similar_articles.append(article)
+        if self.index is not None and not exact:
+            k = len(self.news_articles) if top_k is None else top_k
+            indices, scores = self.index.search(target_embedding, k, threshold, exclude=target_article_id)
+        else:
+            # 모든 기사와의 코사인 유사도를 행렬-벡터 곱 한 번으로 구합니다
+            indices, scores = self.embeddings.top_k(target_embedding, top_k, exclude=target_article_id,
+                                                    threshold=threshold)
 
-        # 유사도 순으로 정렬
-        similar_articles.sort(key=lambda x: x['similarity'], reverse=True)
-        return similar_articles
+        # 반환할 기사만 유사도를 붙여 새 딕셔너리로 만듭니다
+        return [
+            {**self.news_articles[i], 'similarity': float(score)}
+            for i, score in zip(indices, scores)
+            if score >= threshold
+        ]
 
     def analyze_cluster(self, cluster_id):
         """
@@ -397,12 +730,7 @@ def demo_mode():
     ]
 
     print("샘플 뉴스 기사를 추가하는 중...")
-    for news in sample_news:
-        success = clusterer.add_news_article(
-            news['title'],
-            news['content'],
-            news['source']
-        )
+    clusterer.add_news_articles(sample_news)
 
     print(f"\n{len(sample_news)}개 샘플 기사 추가 완료!")
 
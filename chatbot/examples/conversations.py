@@ -1,18 +1,26 @@
 # conversation.py
 from openai import OpenAI
 import os
+import sys
 from dotenv import load_dotenv
 
+# 상위 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from context_window import ContextWindow, count_message_tokens
+
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# 대화가 길어져도 매 턴 보내는 내역은 토큰 예산 안으로 유지합니다 (오래된 턴은 요약)
+context_window = ContextWindow(token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000")), model="gpt-4o-mini")
+
 def chat_with_ai():
     """AI와 대화하기"""
 
     # 대화 기록 저장
-    messages = [
-        {"role": "system", "content": "당신은 친절한 학습 도우미입니다."}
-    ]
+    system_message = {"role": "system", "content": "당신은 친절한 학습 도우미입니다."}
+    history = []
 
     print("AI 도우미: 안녕하세요! 무엇이 궁금하신가요?")
     print("(종료하려면 'quit' 입력)")
@@ -27,8 +35,9 @@ def chat_with_ai():
             print("AI 도우미: 안녕히 가세요!")
             break
 
-        # 사용자 메시지 추가
-        messages.append({"role": "user", "content": user_input})
+        # 사용자 메시지 (예산을 넘는 이전 대화는 요약으로 접어서 보냅니다)
+        user_message = {"role": "user", "content": user_input}
+        messages = [system_message] + context_window.fit(history, client) + [user_message]
 
         # AI 응답 생성
         response = client.chat.completions.create(
@@ -39,11 +48,13 @@ def chat_with_ai():
         # AI 응답 추출
         ai_message = response.choices[0].message.content
 
-        # AI 메시지 기록
-        messages.append({"role": "assistant", "content": ai_message})
+        # 대화 기록 (전체 내역은 그대로 보관)
+        history.append(user_message)
+        history.append({"role": "assistant", "content": ai_message})
 
         # 응답 출력
         print(f"AI 도우미: {ai_message}")
+        print(f"(보낸 내역: {count_message_tokens(messages)} 토큰)")
         print("-" * 50)
 
 # 실행
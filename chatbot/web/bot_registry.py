@@ -0,0 +1,219 @@
+"""
+챗봇 레지스트리
+
+웹(app.py, asgi_app.py)과 터미널(chatbot/web/*_bot.py)에서 사용하는 챗봇을 한 곳에 선언합니다.
+각 봇의 프롬프트 템플릿, 모델, max_tokens, temperature, 스트리밍/캐시 설정을 BotSpec으로 정의하면
+서버 시작 시 템플릿이 미리 컴파일되고 페이지 설정이 계산됩니다.
+
+새 봇 추가 방법:
+register_bot(BotSpec(name='my_bot', title='...', system_prompt='...', user_template='... {message}'))
+"""
+
+import string
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+def compile_template(template):
+    """
+    프롬프트 템플릿을 미리 분석하여 렌더링 함수로 만듭니다.
+    치환할 변수가 없는 템플릿은 매번 포맷하지 않고 문자열을 그대로 돌려줍니다.
+    """
+    fields = [field for _, field, _, _ in string.Formatter().parse(template) if field]
+    if not fields:
+        return lambda variables: template
+    return template.format_map
+
+
+def parse_translation_request(message):
+    """'텍스트 -> 언어' 형식의 입력에서 번역할 텍스트와 목표 언어를 꺼냅니다."""
+    if '->' in message:
+        parts = message.split('->')
+        return {'text': parts[0].strip(), 'target_language': parts[1].strip()}
+    return {'text': message, 'target_language': "영어"}  # 기본값
+
+
+class BotSpec:
+    """
+    챗봇 하나의 선언
+
+    Args:
+        name: 봇 타입 (URL과 API의 bot_type)
+        title, description, placeholder: 챗봇 페이지 표시 내용
+        system_prompt: 시스템 프롬프트 템플릿
+        user_template: 사용자 메시지 템플릿 (기본값: 입력 그대로)
+        model, max_tokens, temperature: Chat Completions 호출 설정
+        parse_input: 사용자 입력을 템플릿 변수 사전으로 바꾸는 함수 (기본값: {'message': 입력})
+        defaults: 입력에서 오지 않는 템플릿 변수의 기본값 (터미널 봇이 메뉴 선택에 따라 바꿔 넣습니다)
+        keeps_history: 이전 대화 내역을 함께 보내는 대화형 봇인지 여부
+        streaming: 웹 페이지에서 토큰 스트리밍(/api/chat-stream)을 사용할지 여부
+        cache_ttl: 응답 캐시 유지 시간(초). None이면 캐시하지 않습니다.
+    """
+
+    def __init__(self, name, title, description, placeholder, system_prompt,
+                 user_template="{message}", model=DEFAULT_MODEL, max_tokens=300,
+                 temperature=0.7, parse_input=None, defaults=None, keeps_history=False,
+                 streaming=True, cache_ttl=None):
+        self.name = name
+        self.system_prompt = system_prompt
+        self.user_template = user_template
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.parse_input = parse_input
+        self.defaults = defaults or {}
+        self.keeps_history = keeps_history
+        self.streaming = streaming
+        self.cache_ttl = cache_ttl
+
+        # 요청마다 다시 만들지 않도록 템플릿과 페이지 설정을 미리 준비합니다
+        self._render_system = compile_template(system_prompt)
+        self._render_user = compile_template(user_template)
+        self.page_config = {
+            'title': title,
+            'description': description,
+            'placeholder': placeholder,
+            'streaming': streaming
+        }
+
+    def template_variables(self, message):
+        if self.parse_input is not None:
+            return self.parse_input(message)
+        return {'message': message}
+
+    def build_messages(self, variables, conversation=None):
+        """시스템 프롬프트, (대화형 봇이면) 이전 대화, 사용자 메시지로 메시지 목록을 만듭니다."""
+        messages = [{"role": "system", "content": self._render_system(variables)}]
+        if self.keeps_history and conversation:
+            messages.extend(conversation)
+        messages.append({"role": "user", "content": self._render_user(variables)})
+        return messages
+
+    def build_completion_kwargs(self, message, conversation=None):
+        """사용자 입력으로 chat.completions.create 호출 인자를 만듭니다."""
+        return self.completion_kwargs_from(self.template_variables(message), conversation)
+
+    def completion_kwargs_from(self, variables, conversation=None):
+        """템플릿 변수 사전으로 호출 인자를 만듭니다. (터미널 봇처럼 입력을 따로 받는 경우)"""
+        return {
+            'model': self.model,
+            'messages': self.build_messages({**self.defaults, **variables}, conversation),
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        }
+
+
+BOTS = {}  # bot_type -> BotSpec
+
+# bot_type -> 챗봇 페이지 설정 (서버 시작 시 계산)
+PAGE_CONFIGS = {
+    'debate': {
+        'title': 'AI 토론 봇',
+        'description': '두 AI가 주어진 주제에 대해 토론하는 것을 지켜보세요.',
+        'placeholder': '',
+        'streaming': False
+    }
+}
+
+DEFAULT_PAGE_CONFIG = {
+    'title': '챗봇',
+    'description': '챗봇 서비스',
+    'placeholder': '메시지를 입력하세요.',
+    'streaming': False
+}
+
+
+def register_bot(spec):
+    """봇을 레지스트리에 등록합니다."""
+    BOTS[spec.name] = spec
+    PAGE_CONFIGS[spec.name] = spec.page_config
+    return spec
+
+
+def get_bot(bot_type):
+    """등록된 봇을 반환합니다. 없으면 None."""
+    return BOTS.get(bot_type)
+
+
+def get_page_config(bot_type):
+    """봇 타입에 맞는 페이지 설정을 반환합니다."""
+    return PAGE_CONFIGS.get(bot_type, DEFAULT_PAGE_CONFIG)
+
+
+# --- 기본 챗봇 선언 ---
+
+register_bot(BotSpec(
+    name='chat',
+    title='10줄 대화 챗봇',
+    description='최대 10줄까지 자연스러운 대화를 나눌 수 있습니다.',
+    placeholder='안녕하세요! 무엇이든 물어보세요.',
+    system_prompt="당신은 친근하고 도움이 되는 한국어 대화 파트너입니다. 간단하고 명확하게 답변해주세요.",
+    max_tokens=150,
+    temperature=0.7,
+    keeps_history=True,
+))
+
+register_bot(BotSpec(
+    name='translator',
+    title='번역 봇',
+    description='다양한 언어로 텍스트를 번역해드립니다.',
+    placeholder='번역할 텍스트를 입력하세요. 예: "안녕하세요" -> 영어',
+    system_prompt="당신은 전문 번역가입니다. 주어진 텍스트를 {target_language}로 정확하게 번역해주세요. 번역 결과만 제공하고, 추가 설명은 하지 마세요.",
+    user_template="다음 텍스트를 {target_language}로 번역해주세요: {text}",
+    max_tokens=200,
+    temperature=0.3,
+    parse_input=parse_translation_request,
+    cache_ttl=7 * 24 * 3600,
+))
+
+register_bot(BotSpec(
+    name='summarizer',
+    title='요약 봇',
+    description='긴 텍스트를 핵심 내용으로 요약해드립니다.',
+    placeholder='요약할 텍스트를 입력하세요.',
+    system_prompt="당신은 텍스트 요약 전문가입니다. 주어진 텍스트의 핵심 내용을 {summary_length} 요약해주세요. 중요한 정보는 빠뜨리지 말고, 불필요한 세부사항은 제거해주세요.",
+    user_template="다음 텍스트를 요약해주세요: {message}",
+    max_tokens=300,
+    temperature=0.5,
+    defaults={'summary_length': "3-5문장으로"},
+    cache_ttl=24 * 3600,
+))
+
+register_bot(BotSpec(
+    name='question',
+    title='질문 생성 봇',
+    description='주어진 주제로 다양한 질문을 생성합니다.',
+    placeholder='질문을 생성할 주제나 텍스트를 입력하세요.',
+    system_prompt="당신은 교육 전문가이자 질문 생성 전문가입니다. 주어진 텍스트나 주제를 바탕으로 {instruction}을 5-7개 생성해주세요.",
+    user_template="다음 내용을 바탕으로 {question_type}을 생성해주세요: {message}",
+    max_tokens=500,
+    temperature=0.7,
+    defaults={
+        'instruction': "이해도 확인, 토론 유도, 창의적 사고 등 다양한 목적의 질문",
+        'question_type': "다양한 질문들",
+    },
+    cache_ttl=3600,
+))
+
+register_bot(BotSpec(
+    name='coding',
+    title='코딩 도우미 봇',
+    description='프로그래밍 질문에 답하고 코드 도움을 제공합니다.',
+    placeholder='프로그래밍 질문을 입력하세요.',
+    system_prompt="당신은 {languages}에 능통한 코딩 멘토입니다. 명확하고 이해하기 쉬운 설명과 함께 실제 동작하는 코드 예시, 모범 사례를 제공해주세요. 초보자도 이해할 수 있도록 단계별로 설명해주세요.",
+    max_tokens=800,
+    temperature=0.3,
+    defaults={'languages': "다양한 프로그래밍 언어"},
+))
+
+register_bot(BotSpec(
+    name='diary',
+    title='일기 작성 봇',
+    description='하루 경험을 바탕으로 아름다운 일기를 작성해줍니다.',
+    placeholder='오늘 하루 있었던 일을 말해주세요.',
+    system_prompt="당신은 감정적으로 공감하고 아름다운 글을 쓰는 일기 작성 도우미입니다. 사용자의 하루 경험을 바탕으로 {style}를 작성해주세요. 사용자의 경험과 감정을 진정성 있게 담아내고, 읽었을 때 따뜻하고 위로가 되는 느낌으로 작성해주세요.",
+    user_template="오늘의 경험을 바탕으로 일기를 작성해주세요: {message}",
+    max_tokens=600,
+    temperature=0.7,
+    defaults={'style': "자연스럽고 따뜻한 느낌의 개인적인 일기"},
+))
@@ -1,7 +1,13 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -17,6 +23,7 @@ def chat_10_lines():
     """
     # 대화 내역을 저장할 리스트 (최대 10줄까지만 유지)
     conversation = []
+    chat_bot = get_bot('chat')
 
     print("=== 10줄 대화 챗봇 ===")
     print("최대 10줄까지 대화할 수 있습니다. 'quit'를 입력하면 종료됩니다.")
@@ -45,15 +52,10 @@ def chat_10_lines():
             conversation.append({"role": "user", "content": user_input})
 
         try:
-            # OpenAI API 호출
+            # OpenAI API 호출 (웹 버전과 같은 봇 설정 사용)
+            # 마지막 사용자 메시지를 제외한 내역을 이전 대화로 전달합니다
             response = client.chat.completions.create(
-                model="gpt-3.5-turbo",  # 사용할 모델 지정
-                messages=[
-                    # system role: AI의 역할과 행동 방식을 정의
-                    {"role": "system", "content": "당신은 친근하고 도움이 되는 한국어 대화 파트너입니다. 간단하고 명확하게 답변해주세요."},
-                ] + conversation,  # 기존 대화 내역과 합치기
-                max_tokens=150,  # 응답 길이 제한
-                temperature=0.7  # 창의성 수준 (0-1, 높을수록 창의적)
+                **chat_bot.build_completion_kwargs(conversation[-1]["content"], conversation[:-1])
             )
 
             # AI 응답 추출
@@ -1,7 +1,13 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -33,43 +39,12 @@ def coding_assistant_bot():
     programming_language = input("언어명 (모르겠다면 Enter): ").strip()
 
     try:
-        # 프로그래밍 언어가 지정된 경우와 아닌 경우에 따른 프롬프트 조정
+        # 언어를 지정하면 코딩 도우미 봇 설정의 {languages}에 넣습니다 (없으면 기본값: 다양한 프로그래밍 언어)
+        variables = {'message': coding_question}
         if programming_language:
-            system_prompt = f"""당신은 {programming_language} 전문가이자 친절한 코딩 멘토입니다.
-            다음을 제공해주세요:
-            1. 명확하고 이해하기 쉬운 설명
-            2. 실제 동작하는 코드 예시 (가능한 경우)
-            3. 모범 사례와 주의사항
-            4. 관련된 개념이나 대안 방법
-
-            초보자도 이해할 수 있도록 단계별로 설명해주세요."""
-        else:
-            system_prompt = """당신은 다양한 프로그래밍 언어에 능통한 코딩 멘토입니다.
-            질문에 가장 적합한 언어를 선택하여 다음을 제공해주세요:
-            1. 명확하고 이해하기 쉬운 설명
-            2. 실제 동작하는 코드 예시 (가능한 경우)
-            3. 모범 사례와 주의사항
-            4. 관련된 개념이나 대안 방법
-
-            초보자도 이해할 수 있도록 단계별로 설명해주세요."""
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    # system role: 코딩 멘토 역할 정의
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    # user role: 코딩 질문
-                    "role": "user",
-                    "content": coding_question
-                }
-            ],
-            max_tokens=800,
-            temperature=0.3  # 정확한 기술적 답변을 위해 낮은 창의성
-        )
+            variables['languages'] = programming_language
+        spec = get_bot('coding')
+        response = client.chat.completions.create(**spec.completion_kwargs_from(variables))
 
         coding_help = response.choices[0].message.content
 
@@ -85,29 +60,14 @@ def coding_assistant_bot():
         if follow_up and follow_up.lower() != 'quit':
             print("\n📝 추가 답변을 생성 중...")
 
-            follow_up_response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": coding_question
-                    },
-                    {
-                        "role": "assistant",
-                        "content": coding_help
-                    },
-                    {
-                        "role": "user",
-                        "content": follow_up
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
+            # 첫 질문과 답변을 시스템 프롬프트와 추가 질문 사이에 넣어 이어서 답하게 합니다
+            follow_up_kwargs = spec.completion_kwargs_from({**variables, 'message': follow_up})
+            follow_up_kwargs['messages'][1:1] = [
+                {"role": "user", "content": coding_question},
+                {"role": "assistant", "content": coding_help}
+            ]
+            follow_up_kwargs['max_tokens'] = 500
+            follow_up_response = client.chat.completions.create(**follow_up_kwargs)
 
             print("\n" + "="*70)
             print("🔍 추가 답변")
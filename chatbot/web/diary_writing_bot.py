@@ -1,6 +1,12 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
+
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
 from datetime import datetime
 
 # .env 파일에서 환경변수를 로드합니다
@@ -43,54 +49,27 @@ def diary_writing_bot():
 
     style_choice = input("선택 (1-4): ").strip()
 
-    # 스타일에 따른 설정
-    if style_choice == "1":
-        style_instruction = "감성적이고 문학적인 표현을 사용하여 시적인 느낌의 일기"
-    elif style_choice == "2":
-        style_instruction = "간단하고 솔직한 표현으로 일상적이고 자연스러운 일기"
-    elif style_choice == "3":
-        style_instruction = "성찰적이고 철학적인 관점에서 깊이 있는 사고가 담긴 일기"
-    elif style_choice == "4":
-        style_instruction = "유머러스하고 밝은 톤으로 재미있고 긍정적인 일기"
-    else:
-        style_instruction = "자연스럽고 따뜻한 느낌의 개인적인 일기"
+    # 스타일에 따른 설정 (일기 작성 봇 설정의 {style}에 들어갑니다. 없으면 기본 스타일)
+    styles = {
+        "1": "감성적이고 문학적인 표현을 사용하여 시적인 느낌의 일기",
+        "2": "간단하고 솔직한 표현으로 일상적이고 자연스러운 일기",
+        "3": "성찰적이고 철학적인 관점에서 깊이 있는 사고가 담긴 일기",
+        "4": "유머러스하고 밝은 톤으로 재미있고 긍정적인 일기",
+    }
+    variables = {'style': styles[style_choice]} if style_choice in styles else {}
 
     try:
         # 오늘 날짜 가져오기
         today = datetime.now().strftime("%Y년 %m월 %d일")
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    # system role: 일기 작성 도우미 역할 정의
-                    "role": "system",
-                    "content": f"""당신은 감정적으로 공감하고 아름다운 글을 쓰는 일기 작성 도우미입니다.
-                    사용자의 하루 경험을 바탕으로 {style_instruction}를 작성해주세요.
-
-                    일기 작성 가이드라인:
-                    1. 사용자의 경험과 감정을 진정성 있게 담아내기
-                    2. 하루의 의미와 가치를 발견하도록 도움
-                    3. 읽었을 때 따뜻하고 위로가 되는 느낌
-                    4. 개인적이고 내밀한 톤 유지
-                    5. 날짜를 포함하여 완성된 일기 형태로 작성
-
-                    일기는 300-500자 정도의 적당한 길이로 작성해주세요."""
-                },
-                {
-                    # user role: 일기 작성 요청
-                    "role": "user",
-                    "content": f"""오늘 날짜: {today}
-                    하루 일과: {daily_experience}
-                    오늘의 기분: {emotion}
-                    특별한 순간: {special_moment}
-
-                    이 정보를 바탕으로 아름다운 일기를 작성해주세요."""
-                }
-            ],
-            max_tokens=600,
-            temperature=0.7  # 창의적이고 감성적인 표현을 위해 적절한 창의성
+        # 날짜와 입력받은 내용을 하나의 메시지로 묶어 웹 일기 작성 봇과 같은 프롬프트로 보냅니다
+        variables['message'] = (
+            f"오늘 날짜: {today}\n"
+            f"하루 일과: {daily_experience}\n"
+            f"오늘의 기분: {emotion}\n"
+            f"특별한 순간: {special_moment}"
         )
+        response = client.chat.completions.create(**get_bot('diary').completion_kwargs_from(variables))
 
         diary_content = response.choices[0].message.content
 
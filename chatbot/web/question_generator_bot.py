@@ -1,7 +1,13 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -36,7 +42,7 @@ def question_generator_bot():
 
     choice = input("선택 (1-4): ")
 
-    # 질문 유형에 따른 프롬프트 설정
+    # 질문 유형에 따른 프롬프트 변수
     if choice == "1":
         question_type = "이해도를 확인할 수 있는 질문들"
         instruction = "주요 내용의 이해 정도를 평가할 수 있는 질문"
@@ -51,30 +57,13 @@ def question_generator_bot():
         instruction = "이해도 확인, 토론 유도, 창의적 사고 등 다양한 목적의 질문"
 
     try:
+        # 질문 유형은 질문 생성 봇 설정의 {instruction}, {question_type}에 들어갑니다
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    # system role: 질문 생성 전문가 역할 정의
-                    "role": "system",
-                    "content": f"""당신은 교육 전문가이자 질문 생성 전문가입니다.
-                    주어진 텍스트나 주제를 바탕으로 {instruction}을 생성해주세요.
-
-                    다음 형식으로 10개의 질문을 생성해주세요:
-                    1. [질문]
-                    2. [질문]
-                    ...
-
-                    질문은 명확하고 구체적이며 흥미로워야 합니다."""
-                },
-                {
-                    # user role: 질문 생성 요청
-                    "role": "user",
-                    "content": f"다음 내용을 바탕으로 {question_type}을 생성해주세요:\n\n{input_text}"
-                }
-            ],
-            max_tokens=500,
-            temperature=0.7  # 창의적인 질문 생성을 위해 높은 창의성
+            **get_bot('question').completion_kwargs_from({
+                'message': input_text,
+                'instruction': instruction,
+                'question_type': question_type
+            })
         )
 
         questions = response.choices[0].message.content
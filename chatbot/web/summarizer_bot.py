@@ -1,7 +1,13 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -40,52 +46,35 @@ def text_summarizer():
 
     choice = input("선택 (1-3): ")
 
-        # 요약 길이에 따른 설정
-        if choice == "1":
-            summary_type = "매우 간단하게 1-2문장으로"
-            max_tokens = 100
-        elif choice == "2":
-            summary_type = "적당히 3-5문장으로"
-            max_tokens = 200
-        elif choice == "3":
-            summary_type = "자세히 6-10문장으로"
-            max_tokens = 300
-        else:
-            summary_type = "적당히 3-5문장으로"
-            max_tokens = 200
-
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        # system role: 요약 전문가 역할 정의
-                        "role": "system",
-                        "content": f"""당신은 텍스트 요약 전문가입니다.
-                        주어진 텍스트의 핵심 내용을 {summary_type} 요약해주세요.
-                        중요한 정보는 빠뜨리지 말고, 불필요한 세부사항은 제거해주세요.
-                        한국어로 명확하고 이해하기 쉽게 작성해주세요."""
-                    },
-                    {
-                        # user role: 요약할 텍스트 제공
-                        "role": "user",
-                        "content": f"다음 텍스트를 요약해주세요:\n\n{text_to_summarize}"
-                    }
-                ],
-                max_tokens=max_tokens,
-                temperature=0.5  # 중간 정도의 창의성으로 자연스러운 요약
-            )
-
-            summary = response.choices[0].message.content
-
-            print("\n" + "="*50)
-            print("📝 요약 결과")
-            print("="*50)
-            print(summary)
-            print("="*50 + "\n")
-
-        except Exception as e:
-            print(f"요약 중 오류가 발생했습니다: {e}")
+    # 요약 길이에 따른 설정 (프롬프트는 요약 봇 설정의 {summary_length}에 들어갑니다)
+    if choice == "1":
+        summary_length = "1-2문장으로"
+        max_tokens = 100
+    elif choice == "3":
+        summary_length = "6-10문장으로"
+        max_tokens = 300
+    else:
+        summary_length = "3-5문장으로"
+        max_tokens = 200
+
+    try:
+        completion_kwargs = get_bot('summarizer').completion_kwargs_from({
+            'message': text_to_summarize,
+            'summary_length': summary_length
+        })
+        completion_kwargs['max_tokens'] = max_tokens
+        response = client.chat.completions.create(**completion_kwargs)
+
+        summary = response.choices[0].message.content
+
+        print("\n" + "="*50)
+        print("📝 요약 결과")
+        print("="*50)
+        print(summary)
+        print("="*50 + "\n")
+
+    except Exception as e:
+        print(f"요약 중 오류가 발생했습니다: {e}")
 
 def file_summarizer():
     """
@@ -110,28 +99,10 @@ def file_summarizer():
             print("⚠️  텍스트가 매우 깁니다. 처음 3000자만 요약합니다.")
             file_content = file_content[:3000]
 
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """당신은 문서 요약 전문가입니다.
-                    파일의 내용을 읽고 다음과 같이 구조화된 요약을 제공해주세요:
-
-                    1. 주제/제목
-                    2. 핵심 내용 (3-5개 bullet point)
-                    3. 결론 또는 중요한 시사점
-
-                    한국어로 명확하게 작성해주세요."""
-                },
-                {
-                    "role": "user",
-                    "content": f"다음 파일 내용을 요약해주세요:\n\n{file_content}"
-                }
-            ],
-            max_tokens=400,
-            temperature=0.5
-        )
+        # 웹 요약 봇과 같은 프롬프트로 요약합니다 (파일은 길어서 응답 길이를 늘림)
+        completion_kwargs = get_bot('summarizer').completion_kwargs_from({'message': file_content})
+        completion_kwargs['max_tokens'] = 400
+        response = client.chat.completions.create(**completion_kwargs)
 
         summary = response.choices[0].message.content
 
@@ -1,7 +1,13 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# 프로젝트 루트를 Python 경로에 추가 (봇 레지스트리 사용)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chatbot.web.bot_registry import get_bot
+
 # .env 파일에서 환경변수를 로드합니다
 load_dotenv()
 
@@ -31,27 +37,13 @@ def translator_bot():
     target_language = input("어떤 언어로 번역할까요? (예: 영어, 중국어, 일본어, 프랑스어 등): ")
 
     try:
-        # OpenAI API 호출
+        # OpenAI API 호출 (웹 버전과 같은 번역 봇 설정 사용)
         response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        # system role: 번역 전문가 역할을 정의
-                        "role": "system",
-                        "content": f"""당신은 전문 번역가입니다.
-                        사용자가 제공한 텍스트를 {target_language}로 정확하게 번역해주세요.
-                        번역 결과만 제공하고, 추가 설명은 하지 마세요.
-                        만약 번역이 불가능한 경우에만 이유를 설명해주세요."""
-                    },
-                    {
-                        # user role: 사용자의 번역 요청
-                        "role": "user",
-                        "content": f"다음 텍스트를 {target_language}로 번역해주세요: {text_to_translate}"
-                    }
-                ],
-                max_tokens=200,  # 번역 결과 길이 제한
-                temperature=0.3  # 낮은 창의성으로 정확한 번역
-            )
+            **get_bot('translator').completion_kwargs_from({
+                'text': text_to_translate,
+                'target_language': target_language
+            })
+        )
 
         # 번역 결과 출력
         translation = response.choices[0].message.content
@@ -82,26 +74,15 @@ def batch_translator():
         return
 
     try:
-        # 여러 문장을 한 번에 번역하도록 프롬프트 구성
+        # 번호를 붙인 문장들을 하나의 텍스트로 묶어 번역 봇 설정 그대로 번역합니다
         text_to_translate = "\n".join([f"{i+1}. {sentence}" for i, sentence in enumerate(sentences)])
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""당신은 전문 번역가입니다.
-                    다음 문장들을 {target_language}로 번역해주세요.
-                    번호와 함께 각 문장을 번역하여 결과를 제공해주세요."""
-                },
-                {
-                    "role": "user",
-                    "content": text_to_translate
-                }
-            ],
-            max_tokens=500,
-            temperature=0.3
-        )
+        completion_kwargs = get_bot('translator').completion_kwargs_from({
+            'text': text_to_translate,
+            'target_language': target_language
+        })
+        completion_kwargs['max_tokens'] = 500  # 문장이 여러 개이므로 응답 길이를 늘립니다
+        response = client.chat.completions.create(**completion_kwargs)
 
         print(f"\n=== {target_language} 번역 결과 ===")
         print(response.choices[0].message.content)
@@ -0,0 +1,207 @@
+"""
+토큰 예산 기반 대화 컨텍스트 관리
+
+대화형 봇이 매 턴마다 전체 대화 내역을 보내면 프롬프트 토큰과 지연 시간이 턴 수에 비례해 늘어납니다.
+ContextWindow는 토큰 수를 로컬에서 세고, 예산을 넘는 오래된 턴을
+- 'summarize': 누적 요약(rolling summary) 하나로 접거나
+- 'truncate': 그냥 버려서
+매 턴 보내는 대화 내역의 크기를 (예산 + 요약 길이) 이하로 일정하게 유지합니다.
+
+오래된 턴은 FOLD_BLOCK_TURNS 턴 단위로 접으므로 접는 위치가 몇 턴 동안 그대로이고,
+요약은 접힌 메시지 내용의 해시로 캐시되어 매 턴 다시 생성하지 않습니다.
+새 블록이 접힐 때는 이전 요약 + 새로 접힌 턴만으로 요약을 갱신합니다.
+
+토큰 수는 tiktoken이 설치되어 있으면 tiktoken으로, 없으면 UTF-8 바이트 수로 어림합니다.
+
+환경 변수:
+- CONTEXT_TOKEN_BUDGET: 대화 내역에 쓸 최대 토큰 수 (기본값: 1000)
+- CONTEXT_POLICY: 'summarize'(기본값) 또는 'truncate'
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+
+from metrics import metrics
+from response_cache import CompletionCache
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken이 없거나 인코딩 파일을 받을 수 없는 환경
+    _encoding = None
+
+# 메시지마다 역할/구분자로 붙는 토큰 수 (OpenAI chat 형식 기준)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_MODEL = "gpt-3.5-turbo"
+SUMMARY_MAX_TOKENS = 200
+SUMMARY_PREFIX = "이전 대화 요약: "
+SUMMARY_SYSTEM_PROMPT = (
+    "당신은 대화 요약 도우미입니다. 이전 요약과 새 대화를 합쳐, 이후 대화에 필요한 사실·요청·결정 사항을 "
+    "빠뜨리지 않고 5문장 이내로 요약해주세요. 요약만 출력하세요."
+)
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """텍스트의 토큰 수를 셉니다. (같은 메시지를 매 턴 다시 세지 않도록 캐시)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # 어림값: 영어는 약 4바이트, 한글은 약 1글자(3바이트)당 1토큰
+    return max(1, (len(text.encode('utf-8')) + 2) // 3)
+
+
+def count_message_tokens(messages):
+    """메시지 목록의 토큰 수를 셉니다."""
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def _prefix_key(messages):
+    """접힌 메시지 목록의 요약 캐시 키"""
+    encoded = json.dumps([[m["role"], m["content"]] for m in messages], ensure_ascii=False)
+    return "summary:" + hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def summary_completion_kwargs(previous_summary, messages, model=SUMMARY_MODEL):
+    """이전 요약과 새로 접힌 메시지로 요약 요청 인자를 만듭니다."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    user_content = f"새 대화:\n{transcript}"
+    if previous_summary:
+        user_content = f"이전 요약:\n{previous_summary}\n\n{user_content}"
+    return {
+        'model': model,
+        'messages': [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": user_content}
+        ],
+        'max_tokens': SUMMARY_MAX_TOKENS,
+        'temperature': 0.3
+    }
+
+
+class ContextWindow:
+    """
+    대화 내역을 토큰 예산 안으로 줄이는 관리자
+
+    Args:
+        token_budget: 대화 내역(요약 제외)에 쓸 최대 토큰 수
+        policy: 'summarize' 또는 'truncate'
+        model: 요약에 사용할 모델
+    """
+
+    # 오래된 턴을 이 턴 수 단위로 접습니다 (요약 재사용 간격)
+    FOLD_BLOCK_TURNS = 3
+    # 요약 캐시 유지 시간(초)
+    SUMMARY_TTL = 86400
+
+    def __init__(self, token_budget=1000, policy='summarize', model=SUMMARY_MODEL):
+        if policy not in ('summarize', 'truncate'):
+            raise ValueError(f"지원하지 않는 컨텍스트 정책입니다: {policy}")
+        self.token_budget = token_budget
+        self.policy = policy
+        self.model = model
+        self.summaries = CompletionCache(max_entries=1000)
+
+    def fold_index(self, history):
+        """
+        앞에서부터 접을 메시지 수를 반환합니다.
+        최근 메시지들이 예산 안에 들어가도록 접는 위치를 블록 단위로 올림하여 몇 턴 동안 고정합니다.
+        올림한 위치가 대화 끝을 넘으면 한 블록 앞에서 접으므로, 그동안은 예산을 최대 한 블록만큼 넘을 수 있습니다.
+        """
+        kept_tokens = 0
+        minimum = len(history)
+        while minimum > 0:
+            tokens = count_tokens(history[minimum - 1]["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if kept_tokens + tokens > self.token_budget:
+                break
+            kept_tokens += tokens
+            minimum -= 1
+
+        if minimum == 0:
+            return 0
+        block = self.FOLD_BLOCK_TURNS * 2  # 한 턴 = 사용자 + 어시스턴트 메시지
+        fold = -(-minimum // block) * block
+        if fold > len(history):
+            fold -= block
+        return fold
+
+    def _summary_plan(self, history, fold):
+        """
+        접힌 메시지의 요약이 캐시에 있으면 (요약, None)을,
+        없으면 (None, 요약 요청 인자)를 반환합니다. 직전 블록의 요약이 있으면 그 위에 갱신합니다.
+        """
+        cached = self.summaries.get(_prefix_key(history[:fold]))
+        if cached is not None:
+            return cached, None
+
+        block = self.FOLD_BLOCK_TURNS * 2
+        previous_fold = fold - block
+        previous_summary = None
+        if previous_fold > 0:
+            previous_summary = self.summaries.get(_prefix_key(history[:previous_fold]))
+        if previous_summary is None:
+            previous_fold = 0
+        return None, summary_completion_kwargs(previous_summary, history[previous_fold:fold], self.model)
+
+    def _with_summary(self, summary, recent):
+        return [{"role": "system", "content": SUMMARY_PREFIX + summary}] + recent
+
+    def _store_summary(self, history, fold, response, started):
+        metrics.observe_request('context_summary', self.model, time.perf_counter() - started, response.usage)
+        summary = response.choices[0].message.content
+        self.summaries.set(_prefix_key(history[:fold]), summary, self.SUMMARY_TTL)
+        return summary
+
+    def fit(self, history, client):
+        """
+        예산에 맞춘 대화 내역을 반환합니다. (OpenAI 클라이언트 사용)
+        요약에 실패하면 오래된 턴을 버리는 방식으로 대신합니다.
+        """
+        fold = self.fold_index(history)
+        if fold == 0:
+            return history
+        recent = history[fold:]
+        if self.policy == 'truncate':
+            return recent
+
+        summary, completion_kwargs = self._summary_plan(history, fold)
+        if summary is None:
+            started = time.perf_counter()
+            try:
+                response = client.chat.completions.create(**completion_kwargs)
+            except Exception:
+                metrics.record_error('context_summary', self.model)
+                return recent
+            summary = self._store_summary(history, fold, response, started)
+        return self._with_summary(summary, recent)
+
+    async def afit(self, history, client):
+        """fit의 비동기 버전입니다. (AsyncOpenAI 클라이언트 사용)"""
+        fold = self.fold_index(history)
+        if fold == 0:
+            return history
+        recent = history[fold:]
+        if self.policy == 'truncate':
+            return recent
+
+        summary, completion_kwargs = self._summary_plan(history, fold)
+        if summary is None:
+            started = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**completion_kwargs)
+            except Exception:
+                metrics.record_error('context_summary', self.model)
+                return recent
+            summary = self._store_summary(history, fold, response, started)
+        return self._with_summary(summary, recent)
+
+
+def create_context_window():
+    """환경 변수 설정에 맞는 컨텍스트 관리자를 만듭니다."""
+    return ContextWindow(
+        token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '1000')),
+        policy=os.getenv('CONTEXT_POLICY', 'summarize'),
+    )
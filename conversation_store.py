@@ -0,0 +1,230 @@
+"""
+서버 측 대화 저장소
+
+대화 내역을 Flask 쿠키 세션에 통째로 넣으면 요청마다 서명·전송되고 4KB 쿠키 한도에 걸립니다.
+이 모듈은 대화 내역을 서버에 저장하고, 쿠키에는 세션 ID만 남기도록 합니다.
+
+제공하는 저장소:
+- MemoryConversationStore: 프로세스 메모리에 보관 (LRU + TTL)
+- SQLiteConversationStore: SQLite 파일에 메시지 단위로 추가 저장 (여러 워커가 공유)
+
+환경 변수:
+- CONVERSATION_STORE: 'memory'(기본값) 또는 'sqlite'
+- CONVERSATION_DB_PATH: SQLite 파일 경로 (기본값: conversations.db)
+- CONVERSATION_TTL: 마지막 사용 후 대화를 보관할 시간(초, 기본값: 86400)
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+def get_session_id(session):
+    """세션 쿠키에 저장된 세션 ID를 반환합니다. 없으면 새로 만듭니다."""
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+    return session['sid']
+
+
+class ConversationStore(ABC):
+    """대화 저장소의 공통 인터페이스 (메서드를 빠뜨린 저장소는 만들 때 TypeError가 납니다)"""
+
+    @abstractmethod
+    def get(self, session_id, key):
+        """저장된 대화 내역(메시지 사전 목록)을 반환합니다. 없으면 빈 목록."""
+
+    @abstractmethod
+    def append(self, session_id, key, messages):
+        """대화 내역 끝에 메시지들을 추가합니다."""
+
+    @abstractmethod
+    def clear(self, session_id, key):
+        """대화 내역을 삭제합니다."""
+
+
+class MemoryConversationStore(ConversationStore):
+    """
+    프로세스 메모리 저장소.
+    세션 수가 max_sessions를 넘으면 가장 오래 사용하지 않은 세션부터 지우고,
+    ttl초 동안 사용하지 않은 세션은 만료됩니다.
+    """
+
+    def __init__(self, max_sessions=10000, ttl=86400):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # session_id -> (마지막 사용 시각, {key: 메시지 목록})
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id, create=False):
+        """세션을 가장 최근 사용으로 표시하고 대화 사전을 반환합니다."""
+        now = time.time()
+        entry = self._sessions.get(session_id)
+        if entry is not None and now - entry[0] > self.ttl:
+            del self._sessions[session_id]
+            entry = None
+
+        if entry is None:
+            if not create:
+                return None
+            entry = (now, {})
+        else:
+            entry = (now, entry[1])
+
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return entry[1]
+
+    def get(self, session_id, key):
+        with self._lock:
+            conversations = self._touch(session_id)
+            if conversations is None:
+                return []
+            return list(conversations.get(key, []))
+
+    def append(self, session_id, key, messages):
+        with self._lock:
+            conversations = self._touch(session_id, create=True)
+            conversations.setdefault(key, []).extend(messages)
+
+    def clear(self, session_id, key):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[1].pop(key, None)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite 저장소.
+    메시지를 한 행씩 추가(append)하므로 대화 전체를 다시 직렬화하지 않으며,
+    같은 파일을 여러 gunicorn 워커가 함께 사용할 수 있습니다.
+    """
+
+    # 이 횟수만큼 추가할 때마다 만료된 대화를 정리합니다
+    PURGE_INTERVAL = 200
+
+    def __init__(self, path='conversations.db', ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        # 여러 요청 스레드가 함께 세므로 원자적으로 증가하는 카운터를 사용합니다
+        self._append_count = itertools.count(1)
+
+        connection = self._connection()
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                session_id TEXT NOT NULL,
+                conv_key TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (session_id, conv_key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                conv_key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, conv_key, seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_conversations_last_used ON conversations (last_used);
+        """)
+
+    def _connection(self):
+        """스레드마다 별도의 연결을 사용합니다."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, session_id, key):
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT last_used FROM conversations WHERE session_id = ? AND conv_key = ?",
+            (session_id, key)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl:
+            return []
+
+        rows = connection.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? AND conv_key = ? ORDER BY seq",
+            (session_id, key)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id, key, messages):
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT last_used FROM conversations WHERE session_id = ? AND conv_key = ?",
+                (session_id, key)
+            ).fetchone()
+            if row is not None and now - row[0] > self.ttl:
+                # 만료된 대화에 이어 쓰지 않도록 먼저 비웁니다
+                connection.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND conv_key = ?", (session_id, key)
+                )
+
+            next_seq = connection.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ? AND conv_key = ?",
+                (session_id, key)
+            ).fetchone()[0]
+            connection.executemany(
+                "INSERT INTO messages (session_id, conv_key, seq, role, content) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, key, next_seq + i, message["role"], message["content"])
+                 for i, message in enumerate(messages)]
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO conversations (session_id, conv_key, last_used) VALUES (?, ?, ?)",
+                (session_id, key, now)
+            )
+
+        if next(self._append_count) % self.PURGE_INTERVAL == 0:
+            self.purge_expired()
+
+    def clear(self, session_id, key):
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "DELETE FROM messages WHERE session_id = ? AND conv_key = ?", (session_id, key)
+            )
+            connection.execute(
+                "DELETE FROM conversations WHERE session_id = ? AND conv_key = ?", (session_id, key)
+            )
+
+    def purge_expired(self):
+        """ttl이 지난 대화를 삭제합니다."""
+        connection = self._connection()
+        cutoff = time.time() - self.ttl
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("""
+                DELETE FROM messages WHERE (session_id, conv_key) IN (
+                    SELECT session_id, conv_key FROM conversations WHERE last_used < ?
+                )
+            """, (cutoff,))
+            connection.execute("DELETE FROM conversations WHERE last_used < ?", (cutoff,))
+
+
+def create_conversation_store():
+    """환경 변수 설정에 맞는 대화 저장소를 만듭니다."""
+    backend = os.getenv('CONVERSATION_STORE', 'memory')
+    ttl = int(os.getenv('CONVERSATION_TTL', '86400'))
+
+    if backend == 'sqlite':
+        return SQLiteConversationStore(os.getenv('CONVERSATION_DB_PATH', 'conversations.db'), ttl)
+    if backend == 'memory':
+        return MemoryConversationStore(ttl=ttl)
+    raise ValueError(f"지원하지 않는 CONVERSATION_STORE 값입니다: {backend}")
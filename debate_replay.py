@@ -0,0 +1,207 @@
+"""
+끝난 토론의 재생 캐시
+
+같은 (모델, 주제, 페르소나, 진행 옵션)의 토론을 다시 요청하면 여섯 번의 생성을 다시 하는 대신,
+처음 토론의 이벤트를 디스크에서 꺼내 생성하던 속도와 비슷하게 나눠 보내 줍니다. (재생)
+수업이나 시연처럼 같은 설정이 반복되면 첫 토론 이후에는 업스트림 비용이 들지 않습니다.
+
+- 저장 형식: 연속된 같은 발언의 토큰 조각(delta)을 하나로 합친 이벤트 목록을 zlib으로 압축해 SQLite에 보관
+- 오류 없이 debate_end까지 끝난 토론만 저장합니다
+- 전체 크기가 max_bytes를 넘으면 가장 오래 재생하지 않은 토론부터 지웁니다 (크기 기준 LRU)
+
+환경 변수:
+- DEBATE_REPLAY_PATH: SQLite 파일 경로 (없으면 재생 캐시 사용 안 함)
+- DEBATE_REPLAY_MAX_MB: 보관할 최대 크기(MB) (기본값: 64)
+- DEBATE_REPLAY_CPS: 재생 속도(초당 글자 수, 기본값: 200, 0이면 지연 없이 보냄)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# 재생할 때 한 번에 보내는 글자 수
+REPLAY_CHUNK_CHARS = 8
+
+
+def make_debate_key(model, settings):
+    """모델과 토론 설정(주제, 페르소나, 라운드 수, 형식)으로 재생 캐시 키를 만듭니다."""
+    normalized = [
+        model,
+        ' '.join((settings.get('topic') or '').split()),
+        (settings.get('persona1') or '').strip(),
+        (settings.get('persona2') or '').strip(),
+        settings.get('rounds', 3),
+        settings.get('format', 'sequential'),
+    ]
+    encoded = json.dumps(normalized, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def compact_events(events):
+    """연속된 같은 발언의 delta 이벤트를 하나로 합칩니다. (순서는 그대로)"""
+    compacted = []
+    for event in events:
+        previous = compacted[-1] if compacted else None
+        if (event['type'] == 'delta' and previous is not None and previous['type'] == 'delta'
+                and previous['turn'] == event['turn']):
+            compacted[-1] = {**previous, 'text': previous['text'] + event['text']}
+        else:
+            compacted.append(event)
+    return compacted
+
+
+def _replay_steps(events, chars_per_second):
+    """(보내기 전 기다릴 시간, 이벤트) 목록. 합쳐 둔 delta는 작은 조각으로 다시 나눕니다."""
+    for event in events:
+        if event['type'] != 'delta':
+            yield 0, event
+            continue
+        text = event['text']
+        for start in range(0, len(text), REPLAY_CHUNK_CHARS):
+            piece = text[start:start + REPLAY_CHUNK_CHARS]
+            delay = len(piece) / chars_per_second if chars_per_second > 0 else 0
+            yield delay, {**event, 'text': piece}
+
+
+def replay_events(events, chars_per_second=200):
+    """저장된 토론 이벤트를 생성 속도와 비슷하게 나눠 생성(yield)합니다."""
+    for delay, event in _replay_steps(events, chars_per_second):
+        if delay:
+            time.sleep(delay)
+        yield event
+
+
+async def areplay_events(events, chars_per_second=200):
+    """replay_events의 비동기 버전입니다."""
+    for delay, event in _replay_steps(events, chars_per_second):
+        if delay:
+            await asyncio.sleep(delay)
+        yield event
+
+
+def _completed(events):
+    return (events and events[-1]['type'] == 'debate_end'
+            and not any(event['type'] == 'error' for event in events))
+
+
+class DebateReplayCache:
+    """크기 기준 LRU로 관리하는 SQLite 토론 재생 캐시"""
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS debate_replay (
+                key TEXT PRIMARY KEY,
+                events BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """저장된 토론 이벤트 목록을 반환합니다. 없으면 None."""
+        connection = self._connection()
+        row = connection.execute("SELECT events FROM debate_replay WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        connection.execute("UPDATE debate_replay SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, events):
+        """끝까지 진행된 토론의 이벤트를 압축해 저장하고, 크기를 넘으면 오래된 토론부터 지웁니다."""
+        data = zlib.compress(json.dumps(compact_events(events), ensure_ascii=False).encode('utf-8'))
+        if len(data) > self.max_bytes:
+            return
+        connection = self._connection()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO debate_replay (key, events, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time())
+                )
+                total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM debate_replay").fetchone()[0]
+                rows = connection.execute("SELECT key, size FROM debate_replay ORDER BY last_used").fetchall()
+                for old_key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    connection.execute("DELETE FROM debate_replay WHERE key = ?", (old_key,))
+                    total -= size
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            self.stored += 1
+
+    def record(self, key, iterator):
+        """이벤트를 그대로 생성(yield)하면서 모아 두었다가, 토론이 끝까지 진행되면 저장합니다."""
+        events = []
+        for event in iterator:
+            events.append(event)
+            yield event
+        if _completed(events):
+            self.set(key, events)
+
+    async def arecord(self, key, aiterator):
+        """record의 비동기 버전입니다."""
+        events = []
+        async for event in aiterator:
+            events.append(event)
+            yield event
+        if _completed(events):
+            await asyncio.to_thread(self.set, key, events)
+
+    def stats(self):
+        row = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM debate_replay"
+        ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': row[0],
+                'bytes': row[1],
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def create_debate_replay_cache():
+    """환경 변수 설정에 맞는 재생 캐시를 만듭니다. DEBATE_REPLAY_PATH가 없으면 None."""
+    path = os.getenv('DEBATE_REPLAY_PATH')
+    if not path:
+        return None
+    max_bytes = int(float(os.getenv('DEBATE_REPLAY_MAX_MB', '64')) * 1024 * 1024)
+    return DebateReplayCache(path, max_bytes)
+
+
+def replay_speed():
+    """재생 속도 (초당 글자 수)"""
+    return float(os.getenv('DEBATE_REPLAY_CPS', '200'))
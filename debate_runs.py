@@ -0,0 +1,391 @@
+"""
+재개 가능한 토론 실행 (debate run)
+
+EventSource가 다시 연결되면(프록시 타임아웃, 모바일 네트워크 끊김 등) 예전에는 /api/debate-stream이
+토론을 처음부터 새로 시작해, 여섯 번의 생성 비용을 다시 치르고 화면의 기록도 어긋났습니다.
+
+토론 하나를 id가 있는 실행(DebateRun)으로 만들어 생성은 백그라운드에서 진행하고,
+생성된 이벤트는 1부터 증가하는 id와 함께 크기가 제한된 재생 버퍼에 보관합니다.
+재연결한 클라이언트는 Last-Event-ID 이후의 이벤트를 버퍼에서 받은 뒤, 아직 진행 중이면
+같은 생성에 이어 붙으므로 업스트림 호출이 새로 생기지 않습니다.
+놓친 이벤트가 이미 버퍼에서 밀려났으면 발언이 중간부터 이어져 화면이 어긋나므로,
+건너뛰지 않고 오류와 토론 종료 이벤트를 보내 다시 시작하도록 알립니다.
+
+스케줄러(debate_scheduler.py)를 주면 토론은 모델의 업스트림 슬롯을 얻은 뒤에 생성을 시작하고,
+기다리는 동안에는 queued 이벤트로 대기 순번을 보냅니다.
+붙어 있는 구독자 중 가장 느린 쪽이 max_lag 이벤트 이상 뒤처지면 따라올 때까지 생성을 멈춥니다. (역압)
+연결은 살아 있지만 읽지 않는 구독자가 stall_timeout초 넘게 따라오지 못하면 그 구독자를 떼어 내고 생성을 이어가므로,
+멈춘 브라우저 하나가 업스트림 슬롯을 계속 붙잡지 않습니다. 떼어 낸 구독자의 스트림은 끝나고,
+브라우저가 Last-Event-ID로 재연결하면 재생 버퍼에서 이어 받습니다.
+구독자가 모두 떠나면 생성은 계속되어, 나중에 재연결하면 이어 받을 수 있습니다.
+
+- DebateRuns: 스레드 기반 (app.py)
+- AsyncDebateRuns: asyncio 기반 (asgi_app.py)
+
+환경 변수:
+- DEBATE_REPLAY_EVENTS: 토론 하나가 보관할 최근 이벤트 수 (기본값: 5000)
+- DEBATE_RUN_TTL: 끝난 토론을 재연결용으로 보관하는 시간(초) (기본값: 600)
+- DEBATE_BACKPRESSURE_EVENTS: 생성을 멈추기 전까지 구독자가 뒤처질 수 있는 이벤트 수 (기본값: 256)
+- DEBATE_STALL_TIMEOUT: 뒤처진 구독자를 기다리는 최대 시간(초), 넘으면 떼어 냄 (기본값: 30, 0이면 계속 기다림)
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from debate_scheduler import create_debate_scheduler
+
+
+def parse_last_event_id(value):
+    """Last-Event-ID 헤더 값을 이벤트 id(정수)로 바꿉니다. 없거나 잘못되었으면 0 (처음부터)."""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _failure_events(error):
+    """생성기가 예외로 끝났을 때 클라이언트가 토론을 닫을 수 있도록 덧붙이는 이벤트"""
+    return [
+        {'type': 'error', 'message': f"토론 진행 중 오류가 발생했습니다: {error}"},
+        {'type': 'debate_end'},
+    ]
+
+
+def _replay_gap_events():
+    """재연결한 클라이언트가 놓친 이벤트가 재생 버퍼에서 이미 밀려났을 때 보내는 이벤트"""
+    return [
+        {'type': 'error', 'message': "놓친 토론 내용이 보관 범위를 벗어나 이어 받을 수 없습니다. 토론을 다시 시작해주세요."},
+        {'type': 'debate_end'},
+    ]
+
+
+class _ReplayBuffer:
+    """이벤트에 1부터 증가하는 id를 붙여 최근 max_events개만 보관하는 버퍼"""
+
+    def __init__(self, max_events):
+        self.events = deque(maxlen=max_events)  # (id, 이벤트)
+        self.last_id = 0
+        self.done = False
+        self.finished_at = None
+
+    def append(self, event):
+        self.last_id += 1
+        self.events.append((self.last_id, event))
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.monotonic()
+
+    def missed(self, last_id):
+        """last_id 바로 다음 이벤트가 이미 버퍼에서 밀려났는지 여부"""
+        return bool(self.events) and self.events[0][0] > last_id + 1
+
+    def after(self, last_id):
+        """last_id 이후의 이벤트 목록. 버퍼에서 이미 밀려난 이벤트는 건너뜁니다. (missed()로 먼저 확인)"""
+        if not self.events or last_id >= self.last_id:
+            return []
+        start = max(last_id + 1 - self.events[0][0], 0)
+        return list(itertools.islice(self.events, start, None))
+
+
+class DebateRun:
+    """id가 있는 토론 실행 하나. 백그라운드 스레드가 이벤트를 채우고 구독자는 원하는 위치부터 읽습니다."""
+
+    def __init__(self, max_events, max_lag=256, stall_timeout=30):
+        self.id = uuid.uuid4().hex
+        self.buffer = _ReplayBuffer(max_events)
+        # 붙어 있는 구독자는 버퍼 크기보다 뒤처지지 않으므로, 이벤트를 놓치는 것은 연결이 끊긴 동안뿐입니다
+        self.max_lag = min(max_lag, max_events)
+        self.stall_timeout = stall_timeout
+        self.detached = 0  # 따라오지 못해 떼어 낸 구독자 수
+        self._readers = {}  # 구독자별 마지막으로 보낸 이벤트 id
+        self._condition = threading.Condition()
+
+    def publish(self, event):
+        with self._condition:
+            self.buffer.append(event)
+            self._condition.notify_all()
+
+    def _lagging(self):
+        return self._readers and self.buffer.last_id - min(self._readers.values()) >= self.max_lag
+
+    def _detach_lagging(self):
+        """max_lag 이상 뒤처진 구독자를 떼어 냅니다. 그 구독자는 다음 확인에서 스트림을 끝냅니다."""
+        for reader, last_id in list(self._readers.items()):
+            if self.buffer.last_id - last_id >= self.max_lag:
+                del self._readers[reader]
+                self.detached += 1
+
+    def feed(self, iterator):
+        try:
+            for event in iterator:
+                with self._condition:
+                    self.buffer.append(event)
+                    self._condition.notify_all()
+                    # 가장 느린 구독자가 따라올 때까지 업스트림 스트림을 더 읽지 않습니다
+                    # (stall_timeout초 안에 따라오지 못하면 떼어 내고 계속 진행)
+                    deadline = time.monotonic() + self.stall_timeout if self.stall_timeout else None
+                    while self._lagging():
+                        if deadline is None:
+                            self._condition.wait()
+                            continue
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._detach_lagging()
+                        else:
+                            self._condition.wait(remaining)
+        except Exception as e:
+            with self._condition:
+                for event in _failure_events(e):
+                    self.buffer.append(event)
+        finally:
+            with self._condition:
+                self.buffer.finish()
+                self._condition.notify_all()
+
+    def subscribe(self, last_id=0):
+        """
+        last_id 이후의 (이벤트 id, 이벤트)를 생성(yield)합니다. 토론이 진행 중이면 끝날 때까지 기다립니다.
+        놓친 이벤트가 버퍼에서 밀려났으면 id가 None인 오류/종료 이벤트를 보내고 끝냅니다.
+        너무 오래 뒤처져 떼어 내졌으면 그대로 끝내므로, 클라이언트는 Last-Event-ID로 재연결하면 됩니다.
+        """
+        reader = object()
+        with self._condition:
+            self._readers[reader] = last_id
+        try:
+            while True:
+                with self._condition:
+                    while self.buffer.last_id <= last_id and not self.buffer.done:
+                        self._condition.wait()
+                    missed = self.buffer.missed(last_id)
+                    pending = self.buffer.after(last_id)
+                    finished = self.buffer.done
+
+                if missed:
+                    for event in _replay_gap_events():
+                        yield None, event
+                    return
+                for event_id, event in pending:
+                    yield event_id, event
+                    last_id = event_id
+                with self._condition:
+                    if reader not in self._readers:
+                        return
+                    self._readers[reader] = last_id
+                    self._condition.notify_all()
+                if finished:
+                    return
+        finally:
+            with self._condition:
+                self._readers.pop(reader, None)
+                self._condition.notify_all()
+
+
+class DebateRuns:
+    """진행 중이거나 최근에 끝난 토론 실행을 id로 보관하는 스레드 기반 저장소"""
+
+    def __init__(self, max_events=5000, ttl=600, max_lag=256, stall_timeout=30, scheduler=None):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.max_lag = max_lag
+        self.stall_timeout = stall_timeout
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def start(self, start, model=None, slots=1):
+        """
+        start()가 반환하는 이벤트 이터레이터를 백그라운드 스레드에서 읽는 새 토론 실행을 만듭니다.
+        스케줄러가 있으면 model의 슬롯 slots개를 얻은 뒤에 start()를 호출합니다. (0이면 바로 시작)
+        """
+        run = DebateRun(self.max_events, self.max_lag, self.stall_timeout)
+        with self._lock:
+            self._prune()
+            self._runs[run.id] = run
+        threading.Thread(target=self._run, args=(run, start, model, slots), daemon=True).start()
+        return run
+
+    def _run(self, run, start, model, slots):
+        # 슬롯이 0이면(저장된 토론 재생 등) 업스트림을 쓰지 않으므로 스케줄러를 거치지 않습니다
+        if self.scheduler is None or slots == 0:
+            run.feed(start())
+            return
+        acquired = self.scheduler.acquire(
+            model, slots, on_position=lambda position: run.publish({'type': 'queued', 'position': position})
+        )
+        try:
+            run.feed(start())
+        finally:
+            self.scheduler.release(model, acquired)
+
+    def get(self, run_id):
+        """보관 중인 토론 실행을 반환합니다. 없거나 만료되었으면 None."""
+        with self._lock:
+            self._prune()
+            return self._runs.get(run_id)
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [
+            run_id for run_id, run in self._runs.items()
+            if run.buffer.done and now - run.buffer.finished_at > self.ttl
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for run in self._runs.values() if not run.buffer.done)
+            detached = sum(run.detached for run in self._runs.values())
+            stats = {'running': running, 'finished': len(self._runs) - running, 'detached': detached}
+        if self.scheduler is not None:
+            stats['scheduler'] = self.scheduler.stats()
+        return stats
+
+
+class AsyncDebateRun:
+    """DebateRun의 asyncio 버전"""
+
+    def __init__(self, max_events, max_lag=256, stall_timeout=30):
+        self.id = uuid.uuid4().hex
+        self.buffer = _ReplayBuffer(max_events)
+        self.max_lag = min(max_lag, max_events)
+        self.stall_timeout = stall_timeout
+        self.detached = 0
+        self._readers = {}
+        self._condition = asyncio.Condition()
+
+    def publish(self, event):
+        # 이벤트 루프 안에서만 호출되므로, 깨울 구독자는 다음 대기 확인에서 새 이벤트를 봅니다
+        self.buffer.append(event)
+        asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _lagging(self):
+        return self._readers and self.buffer.last_id - min(self._readers.values()) >= self.max_lag
+
+    def _detach_lagging(self):
+        for reader, last_id in list(self._readers.items()):
+            if self.buffer.last_id - last_id >= self.max_lag:
+                del self._readers[reader]
+                self.detached += 1
+
+    async def feed(self, aiterator):
+        try:
+            async for event in aiterator:
+                async with self._condition:
+                    self.buffer.append(event)
+                    self._condition.notify_all()
+                    try:
+                        await asyncio.wait_for(self._condition.wait_for(lambda: not self._lagging()),
+                                               self.stall_timeout or None)
+                    except asyncio.TimeoutError:
+                        self._detach_lagging()
+        except Exception as e:
+            for event in _failure_events(e):
+                self.buffer.append(event)
+        finally:
+            async with self._condition:
+                self.buffer.finish()
+                self._condition.notify_all()
+
+    async def subscribe(self, last_id=0):
+        reader = object()
+        self._readers[reader] = last_id
+        try:
+            while True:
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self.buffer.last_id > last_id or self.buffer.done)
+                    missed = self.buffer.missed(last_id)
+                    pending = self.buffer.after(last_id)
+                    finished = self.buffer.done
+
+                if missed:
+                    for event in _replay_gap_events():
+                        yield None, event
+                    return
+                for event_id, event in pending:
+                    yield event_id, event
+                    last_id = event_id
+                async with self._condition:
+                    if reader not in self._readers:
+                        return
+                    self._readers[reader] = last_id
+                    self._condition.notify_all()
+                if finished:
+                    return
+        finally:
+            self._readers.pop(reader, None)
+            await self._notify()
+
+
+class AsyncDebateRuns:
+    """DebateRuns의 asyncio 버전. 생성은 별도 태스크에서 진행되므로 클라이언트가 끊어도 계속됩니다."""
+
+    def __init__(self, max_events=5000, ttl=600, max_lag=256, stall_timeout=30, scheduler=None):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.max_lag = max_lag
+        self.stall_timeout = stall_timeout
+        self.scheduler = scheduler
+        self._runs = {}
+
+    def start(self, start, model=None, slots=1):
+        """start()는 비동기 이벤트 이터레이터를 반환해야 합니다."""
+        self._prune()
+        run = AsyncDebateRun(self.max_events, self.max_lag, self.stall_timeout)
+        self._runs[run.id] = run
+        asyncio.ensure_future(self._run(run, start, model, slots))
+        return run
+
+    async def _run(self, run, start, model, slots):
+        if self.scheduler is None or slots == 0:
+            await run.feed(start())
+            return
+        acquired = await self.scheduler.acquire(
+            model, slots, on_position=lambda position: run.publish({'type': 'queued', 'position': position})
+        )
+        try:
+            await run.feed(start())
+        finally:
+            await self.scheduler.release(model, acquired)
+
+    def get(self, run_id):
+        self._prune()
+        return self._runs.get(run_id)
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [
+            run_id for run_id, run in self._runs.items()
+            if run.buffer.done and now - run.buffer.finished_at > self.ttl
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+
+    def stats(self):
+        running = sum(1 for run in self._runs.values() if not run.buffer.done)
+        detached = sum(run.detached for run in self._runs.values())
+        stats = {'running': running, 'finished': len(self._runs) - running, 'detached': detached}
+        if self.scheduler is not None:
+            stats['scheduler'] = self.scheduler.stats()
+        return stats
+
+
+def create_debate_runs(use_async=False):
+    """환경 변수 설정에 맞는 토론 실행 저장소를 (모델별 스케줄러와 함께) 만듭니다."""
+    max_events = int(os.getenv('DEBATE_REPLAY_EVENTS', '5000'))
+    ttl = float(os.getenv('DEBATE_RUN_TTL', '600'))
+    max_lag = int(os.getenv('DEBATE_BACKPRESSURE_EVENTS', '256'))
+    stall_timeout = float(os.getenv('DEBATE_STALL_TIMEOUT', '30'))
+    runs_class = AsyncDebateRuns if use_async else DebateRuns
+    return runs_class(max_events=max_events, ttl=ttl, max_lag=max_lag, stall_timeout=stall_timeout,
+                      scheduler=create_debate_scheduler(use_async))
@@ -0,0 +1,166 @@
+"""
+토론 스케줄러: 모델별 동시 실행 제한과 대기열
+
+로컬 Ollama 서버 하나에 토론 열 개가 한꺼번에 들어오면 모든 토론의 지연 시간이 함께 무너집니다.
+스케줄러는 모델마다 업스트림 슬롯 수를 정해 두고, 슬롯이 모자라면 토론을 도착 순서대로(FIFO) 줄 세웁니다.
+동시 발언 형식처럼 슬롯을 둘 쓰는 토론이 와도, 줄의 맨 앞이 들어가기 전에는 뒤의 토론이 끼어들지 않습니다.
+기다리는 동안 대기 순번이 바뀔 때마다 on_position 콜백으로 알려줍니다. (SSE의 queued 이벤트)
+
+- DebateScheduler: 스레드 기반 (app.py)
+- AsyncDebateScheduler: asyncio 기반 (asgi_app.py)
+
+환경 변수:
+- DEBATE_MAX_CONCURRENT: 모델별 기본 슬롯 수 (기본값: 2)
+- DEBATE_MODEL_LIMITS: 모델별 슬롯 수 (예: "llama3.1=1,qwen2.5:14b=2")
+"""
+
+import asyncio
+import os
+import threading
+from collections import deque
+
+
+def parse_model_limits(value):
+    """'모델=슬롯 수,...' 형식의 문자열을 사전으로 바꿉니다."""
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        model, limit = item.rsplit('=', 1)
+        limits[model.strip()] = max(int(limit), 1)
+    return limits
+
+
+class _SlotPool:
+    """한 모델의 슬롯 사용량과 대기열"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self.waiting = deque()
+
+
+class _SchedulerBase:
+    def __init__(self, default_limit=2, limits=None):
+        self.default_limit = default_limit
+        self.limits = limits or {}
+        self._pools = {}
+        self.admitted = 0  # 실행을 시작한 토론 수
+        self.queued = 0    # 대기열을 거친 토론 수
+
+    def _pool(self, model):
+        pool = self._pools.get(model)
+        if pool is None:
+            pool = _SlotPool(self.limits.get(model, self.default_limit))
+            self._pools[model] = pool
+        return pool
+
+    def _try_admit(self, pool, ticket, slots):
+        """ticket이 줄의 맨 앞이고 슬롯이 남으면 입장시키고 True를 반환합니다."""
+        if pool.waiting[0] is ticket and pool.in_use + slots <= pool.limit:
+            pool.waiting.popleft()
+            pool.in_use += slots
+            self.admitted += 1
+            return True
+        return False
+
+    def _stats(self):
+        return {
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'models': {
+                model: {'limit': pool.limit, 'in_use': pool.in_use, 'waiting': len(pool.waiting)}
+                for model, pool in self._pools.items()
+            },
+        }
+
+
+class DebateScheduler(_SchedulerBase):
+    """모델별 슬롯을 나눠 주는 스레드 기반 스케줄러"""
+
+    def __init__(self, default_limit=2, limits=None):
+        super().__init__(default_limit, limits)
+        self._condition = threading.Condition()
+
+    def acquire(self, model, slots=1, on_position=None):
+        """
+        model의 슬롯을 slots개 얻을 때까지 기다리고, 실제로 얻은 슬롯 수를 반환합니다. (release에 넘겨주세요)
+        기다리는 동안 대기 순번(1부터)이 바뀌면 on_position(순번)을 호출합니다.
+        """
+        ticket = object()
+        announced = None
+        with self._condition:
+            pool = self._pool(model)
+            slots = min(slots, pool.limit)
+            pool.waiting.append(ticket)
+            while not self._try_admit(pool, ticket, slots):
+                position = pool.waiting.index(ticket) + 1
+                if position != announced:
+                    if announced is None:
+                        self.queued += 1
+                    announced = position
+                    if on_position is not None:
+                        on_position(position)
+                self._condition.wait()
+            # 맨 앞이 빠졌으므로 뒤에서 기다리는 토론들도 순번을 다시 확인합니다
+            self._condition.notify_all()
+        return slots
+
+    def release(self, model, slots):
+        with self._condition:
+            self._pool(model).in_use -= slots
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return self._stats()
+
+
+class AsyncDebateScheduler(_SchedulerBase):
+    """DebateScheduler의 asyncio 버전"""
+
+    def __init__(self, default_limit=2, limits=None):
+        super().__init__(default_limit, limits)
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, model, slots=1, on_position=None):
+        ticket = object()
+        announced = None
+        async with self._condition:
+            pool = self._pool(model)
+            slots = min(slots, pool.limit)
+            pool.waiting.append(ticket)
+            try:
+                while not self._try_admit(pool, ticket, slots):
+                    position = pool.waiting.index(ticket) + 1
+                    if position != announced:
+                        if announced is None:
+                            self.queued += 1
+                        announced = position
+                        if on_position is not None:
+                            on_position(position)
+                    await self._condition.wait()
+            except asyncio.CancelledError:
+                # 기다리다 취소되면 줄에서 빠집니다
+                if ticket in pool.waiting:
+                    pool.waiting.remove(ticket)
+                    self._condition.notify_all()
+                raise
+            self._condition.notify_all()
+        return slots
+
+    async def release(self, model, slots):
+        async with self._condition:
+            self._pool(model).in_use -= slots
+            self._condition.notify_all()
+
+    def stats(self):
+        return self._stats()
+
+
+def create_debate_scheduler(use_async=False):
+    """환경 변수 설정에 맞는 토론 스케줄러를 만듭니다."""
+    default_limit = max(int(os.getenv('DEBATE_MAX_CONCURRENT', '2')), 1)
+    limits = parse_model_limits(os.getenv('DEBATE_MODEL_LIMITS'))
+    scheduler_class = AsyncDebateScheduler if use_async else DebateScheduler
+    return scheduler_class(default_limit=default_limit, limits=limits)
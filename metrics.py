@@ -0,0 +1,152 @@
+"""
+LLM 호출 계측 (Prometheus 텍스트 형식)
+
+봇 타입과 모델별로 다음을 프로세스 메모리에 기록하고 /metrics에서 내보냅니다.
+- 업스트림 호출 시간 히스토그램
+- 스트리밍 첫 토큰까지의 시간(TTFT) 히스토그램
+- 프롬프트/완성 토큰 수 (응답의 usage)
+- 응답 캐시 적중 수, 호출 오류 수
+
+기록 한 번은 잠금 한 번과 버킷 이분 탐색 정도이므로 요청당 오버헤드는 마이크로초 단위입니다.
+외부 라이브러리(prometheus_client) 없이 동작하며, 여러 워커를 띄우면 워커별 값이 노출됩니다.
+"""
+
+import bisect
+import threading
+
+# 초 단위 히스토그램 버킷 (LLM 호출은 수백 ms ~ 수십 초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FIRST_TOKEN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """레이블별로 누적되는 카운터"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}  # 레이블 값 튜플 -> 누적 값
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    """레이블별 고정 버킷 히스토그램"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}  # 레이블 값 튜플 -> [버킷별 개수(+Inf 포함), 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+
+        bucket_names = self.label_names + ('le',)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _format_number(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class LLMMetrics:
+    """챗봇 서버에서 사용하는 LLM 호출 지표 모음"""
+
+    def __init__(self):
+        labels = ('bot', 'model')
+        self.request_duration = Histogram(
+            'llm_request_duration_seconds', 'Upstream LLM call duration in seconds.', labels, LATENCY_BUCKETS
+        )
+        self.first_token = Histogram(
+            'llm_time_to_first_token_seconds', 'Time until the first streamed token in seconds.', labels,
+            FIRST_TOKEN_BUCKETS
+        )
+        self.requests = Counter('llm_requests_total', 'Upstream LLM calls.', labels)
+        self.errors = Counter('llm_errors_total', 'Failed upstream LLM calls.', labels)
+        self.prompt_tokens = Counter('llm_prompt_tokens_total', 'Prompt tokens reported by the API.', labels)
+        self.completion_tokens = Counter(
+            'llm_completion_tokens_total', 'Completion tokens reported by the API.', labels
+        )
+        self.cache_hits = Counter('llm_cache_hits_total', 'Responses served from the response cache.', ('bot',))
+        self._all = (
+            self.request_duration, self.first_token, self.requests, self.errors,
+            self.prompt_tokens, self.completion_tokens, self.cache_hits
+        )
+
+    def observe_request(self, bot, model, seconds, usage=None):
+        """끝난 업스트림 호출 하나를 기록합니다. usage는 응답의 usage 객체(없으면 None)."""
+        labels = (bot, model or '')
+        self.requests.inc(labels)
+        self.request_duration.observe(labels, seconds)
+        if usage is not None:
+            self.prompt_tokens.inc(labels, getattr(usage, 'prompt_tokens', 0) or 0)
+            self.completion_tokens.inc(labels, getattr(usage, 'completion_tokens', 0) or 0)
+
+    def observe_first_token(self, bot, model, seconds):
+        self.first_token.observe((bot, model or ''), seconds)
+
+    def record_error(self, bot, model):
+        self.errors.inc((bot, model or ''))
+
+    def record_cache_hit(self, bot):
+        self.cache_hits.inc((bot,))
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식(0.0.4)으로 모든 지표를 반환합니다."""
+        lines = []
+        for metric in self._all:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 전체에서 공유하는 지표 (app.py, asgi_app.py, ollama/*에서 사용)
+metrics = LLMMetrics()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,158 @@
+"""
+토론 일괄 생성 (오프라인)
+
+JSONL 파일의 주제마다 페르소나를 만들고(generate_personas) 토론을 끝까지 진행하여,
+토론 하나당 한 줄씩 결과 JSONL에 기록합니다. 여러 토론을 --workers개씩 동시에 진행합니다.
+
+입력 JSONL 한 줄: {"topic": "...", "id": "선택", "persona1": "선택", "persona2": "선택", "rounds": 3, "format": "sequential"}
+(페르소나를 주면 생성하지 않고 그대로 사용합니다)
+
+결과 파일이 곧 체크포인트입니다. 토론이 하나 끝날 때마다 바로 기록하므로,
+중간에 멈춰도 같은 명령을 다시 실행하면 이미 성공한 id는 건너뛰고 나머지부터 이어서 진행합니다.
+(실패한 토론은 error와 함께 기록되고, 다시 실행하면 재시도합니다)
+
+실행 방법:
+python ollama/batch_debate.py topics.jsonl debates.jsonl --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 상위 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ollama.debate_generator import parse_debate_options, stream_debate
+from ollama.persona_generator import generate_personas
+
+
+def load_topics(path):
+    """입력 JSONL을 읽어 id가 붙은 주제 목록을 반환합니다. (id가 없으면 줄 번호)"""
+    topics = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            item.setdefault('id', str(line_number))
+            topics.append(item)
+    return topics
+
+
+def load_finished_ids(path):
+    """결과 JSONL에서 이미 성공한 토론의 id를 읽습니다. 마지막 줄이 잘렸거나 id가 없는 줄은 무시합니다."""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or record.get('id') is None:
+                continue
+            if not record.get('error'):
+                finished.add(str(record['id']))
+    return finished
+
+
+def run_one(item):
+    """주제 하나의 페르소나 생성과 토론을 진행하고 결과 레코드를 반환합니다."""
+    started = time.perf_counter()
+    record = {'id': str(item['id']), 'topic': item['topic'], 'error': None}
+
+    persona1, persona2 = item.get('persona1'), item.get('persona2')
+    if not (persona1 and persona2):
+        personas = generate_personas(item['topic'])
+        if personas.get('error'):
+            record['error'] = personas['error']
+            record['timing'] = {'total_s': round(time.perf_counter() - started, 3)}
+            return record
+        persona1, persona2 = personas['persona1'], personas['persona2']
+    personas_done = time.perf_counter()
+
+    options = parse_debate_options(item)
+    record.update(persona1=persona1, persona2=persona2, rounds=options['rounds'], format=options['format'])
+
+    turns = {}
+    first_token_at = {}
+    for event in stream_debate(item['topic'], persona1, persona2, options['rounds'],
+                               options['format'], options['parallelism']):
+        if event['type'] == 'turn_start':
+            turns[event['turn']] = {'turn': event['turn'], 'speaker': event['speaker'],
+                                    'round': event['round'], 'text': ''}
+            first_token_at[event['turn']] = None
+        elif event['type'] == 'delta':
+            turns[event['turn']]['text'] += event['text']
+            if first_token_at[event['turn']] is None:
+                first_token_at[event['turn']] = time.perf_counter()
+        elif event['type'] == 'turn_end':
+            turns[event['turn']].update(event.get('usage') or {})
+        elif event['type'] == 'error':
+            record['error'] = event['message']
+    finished = time.perf_counter()
+
+    record['turns'] = [turns[turn] for turn in sorted(turns)]
+    record['tokens'] = {
+        'prompt': sum(turn.get('prompt_tokens', 0) for turn in record['turns']),
+        'completion': sum(turn.get('completion_tokens', 0) for turn in record['turns']),
+    }
+    record['timing'] = {
+        'personas_s': round(personas_done - started, 3),
+        'debate_s': round(finished - personas_done, 3),
+        'total_s': round(finished - started, 3),
+    }
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 주제 목록으로 토론을 일괄 생성합니다")
+    parser.add_argument('input', help="주제 JSONL 파일")
+    parser.add_argument('output', help="결과 JSONL 파일 (체크포인트 겸용, 이어서 기록)")
+    parser.add_argument('--workers', type=int, default=2, help="동시에 진행할 토론 수")
+    args = parser.parse_args()
+
+    topics = load_topics(args.input)
+    finished_ids = load_finished_ids(args.output)
+    pending = [item for item in topics if str(item['id']) not in finished_ids]
+    print(f"주제 {len(topics)}개 중 완료 {len(topics) - len(pending)}개, 남은 토론 {len(pending)}개 (동시 {args.workers}개)")
+
+    started = time.perf_counter()
+    succeeded = failed = prompt_tokens = completion_tokens = 0
+    with open(args.output, 'a', encoding='utf-8') as output, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_one, item): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {'id': str(item['id']), 'topic': item['topic'], 'error': str(e)}
+
+            # 토론이 끝날 때마다 바로 기록하여 체크포인트로 남깁니다
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            os.fsync(output.fileno())
+
+            if record['error']:
+                failed += 1
+                print(f"[실패] {record['id']}: {record['error']}")
+            else:
+                succeeded += 1
+                prompt_tokens += record['tokens']['prompt']
+                completion_tokens += record['tokens']['completion']
+                print(f"[완료] {record['id']} ({record['timing']['total_s']:.1f}s, "
+                      f"프롬프트 {record['tokens']['prompt']} / 생성 {record['tokens']['completion']} 토큰)")
+
+    elapsed = time.perf_counter() - started
+    print(f"\n성공 {succeeded}개, 실패 {failed}개, {elapsed:.1f}s "
+          f"({succeeded / elapsed if elapsed else 0:.2f} 토론/s), "
+          f"프롬프트 {prompt_tokens} / 생성 {completion_tokens} 토큰")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+from openai import AsyncOpenAI, OpenAI
+
+_clients = {}
+_async_clients = {}
+
+def backend_urls() -> list:
+    """
+    토론에 쓸 Ollama 엔드포인트 목록을 반환합니다.
+
+    OLLAMA_BASE_URLS에 쉼표로 여러 주소를 주면 페르소나마다 번갈아 다른 백엔드를 사용하고,
+    없으면 OLLAMA_BASE_URL 하나를 사용합니다.
+    """
+    urls = [url.strip() for url in os.getenv("OLLAMA_BASE_URLS", "").split(",") if url.strip()]
+    return urls or [os.getenv("OLLAMA_BASE_URL")]
+
+def get_client(base_url: str = None) -> OpenAI:
+    """
+    Ollama 엔드포인트용 OpenAI(동기) 클라이언트를 반환합니다.
+
+    호출마다 클라이언트를 만들지 않도록 주소별로 한 번만 만들어 재사용합니다. (기본값: OLLAMA_BASE_URL)
+    """
+    base_url = base_url or os.getenv("OLLAMA_BASE_URL")
+    if base_url not in _clients:
+        _clients[base_url] = OpenAI(
+            base_url=base_url,
+            api_key="ollama",
+        )
+    return _clients[base_url]
+
+def get_async_client(base_url: str = None) -> AsyncOpenAI:
+    """
+    Ollama 엔드포인트용 AsyncOpenAI 클라이언트를 반환합니다.
+
+    비동기 앱에서는 요청마다 클라이언트를 만들면 커넥션 풀이 매번 새로 생기므로,
+    주소별로 처음 호출될 때 한 번만 만들어 재사용합니다. (기본값: OLLAMA_BASE_URL)
+    """
+    base_url = base_url or os.getenv("OLLAMA_BASE_URL")
+    if base_url not in _async_clients:
+        _async_clients[base_url] = AsyncOpenAI(
+            base_url=base_url,
+            api_key="ollama",
+        )
+    return _async_clients[base_url]
@@ -1,6 +1,12 @@
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
+import sys
+
+# 상위 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ollama.debate_memory import create_debate_memory
 
 # .env 파일에서 환경 변수 로드
 load_dotenv(override=True)
@@ -14,6 +20,11 @@ client = OpenAI(
 # --- 토론 설정 ---
 DEBATE_TOPIC = "AI 기술 발전은 인류에게 궁극적으로 이로운가?"
 DEBATE_ROUNDS = 3
+# 한 대화 기록에 두 페르소나의 발언이 번갈아 쌓이므로, 요약할 때 발언 순서대로 붙일 이름
+DEBATE_SPEAKERS = ("찬성 측(AI 지지자)", "반대 측(AI 비평가)")
+
+# 최근 턴만 그대로 보내고 오래된 턴은 요약합니다 (DEBATE_MEMORY_TURNS=0이면 전체 기록)
+memory = create_debate_memory()
 
 # 페르소나 정의
 persona_1_system_prompt = {
@@ -48,8 +59,13 @@ def run_debate():
     conversation_history.append(initial_message)
 
     for i in range(DEBATE_ROUNDS * 2):
-        # 현재 발언자의 시스템 프롬프트를 대화 기록 맨 앞에 추가
-        messages_for_api = [current_speaker_prompt] + conversation_history
+        # 현재 발언자의 시스템 프롬프트를 대화 기록 맨 앞에 추가 (기억 모드면 오래된 턴은 요약으로)
+        if memory is not None:
+            memory.refresh(conversation_history, client, os.getenv("OLLAMA_MODEL"),
+                           speakers=DEBATE_SPEAKERS, others="진행자")
+            messages_for_api = [current_speaker_prompt] + memory.messages(conversation_history)
+        else:
+            messages_for_api = [current_speaker_prompt] + conversation_history
 
         print(f"--- {current_speaker_name}의 발언 ---")
 
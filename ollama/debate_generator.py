@@ -1,69 +1,505 @@
+import asyncio
+import contextlib
 import os
-from openai import OpenAI
+import queue
+import threading
+import time
 from dotenv import load_dotenv
+from ollama.client import backend_urls, get_async_client, get_client
+from ollama.debate_memory import create_debate_memory
+from chat_service import delta_text
+from metrics import metrics
 
-def stream_debate(topic: str, persona1: str, persona2: str):
+# .env 파일에서 환경 변수 로드 (모듈을 불러올 때 한 번만)
+load_dotenv()
+
+# 토론 형식: 차례대로 발언(sequential) / 라운드마다 두 페르소나가 동시에 발언(simultaneous)
+DEBATE_FORMATS = ('sequential', 'simultaneous')
+MAX_DEBATE_ROUNDS = 10
+MAX_PARALLELISM = 2  # 한 라운드의 발언은 두 개이므로 그 이상은 의미가 없습니다
+# 동시 발언 이벤트 큐의 크기. 클라이언트가 뒤처지면 생성 스레드/태스크가 큐에 자리가 날 때까지 기다립니다
+DEBATE_EVENT_QUEUE_SIZE = 64
+
+def parse_debate_options(data: dict) -> dict:
+    """
+    /api/prepare-debate 요청에서 토론 진행 옵션(라운드 수, 형식, 동시 호출 수)을 꺼냅니다.
+    숫자는 허용 범위로 맞추고, 알 수 없는 형식이면 ValueError를 발생시킵니다.
+    """
+    debate_format = data.get('format') or 'sequential'
+    if debate_format not in DEBATE_FORMATS:
+        raise ValueError(f"지원하지 않는 토론 형식입니다: {debate_format}")
+    try:
+        rounds = int(data.get('rounds') or 3)
+        parallelism = int(data.get('parallelism') or MAX_PARALLELISM)
+    except (TypeError, ValueError):
+        raise ValueError("라운드 수와 동시 호출 수는 숫자여야 합니다.")
+    return {
+        'rounds': min(max(rounds, 1), MAX_DEBATE_ROUNDS),
+        'format': debate_format,
+        'parallelism': min(max(parallelism, 1), MAX_PARALLELISM),
+    }
+
+def debate_settings(data: dict) -> dict:
     """
-    주어진 주제와 페르소나로 AI 토론을 실행하고, 
-    대화의 각 부분을 간단한 HTML 태그가 포함된 문자열로 생성(yield)합니다.
+    /api/prepare-debate 요청으로 세션에 저장할 토론 설정(주제, 페르소나, 진행 옵션)을 만듭니다.
+    진행 옵션이 잘못되었으면 parse_debate_options처럼 ValueError를 발생시킵니다.
+    """
+    return {
+        'topic': data.get('topic'),
+        'persona1': data.get('persona1'),
+        'persona2': data.get('persona2'),
+        **parse_debate_options(data),
+        # 저장된 같은 토론이 있어도 새로 생성할지 여부
+        'fresh': bool(data.get('fresh'))
+    }
+
+def debate_arguments(settings: dict) -> dict:
+    """세션의 토론 설정을 stream_debate / astream_debate 인자로 바꿉니다."""
+    return {
+        'topic': settings['topic'],
+        'persona1': settings['persona1'],
+        'persona2': settings['persona2'],
+        'debate_rounds': settings.get('rounds', 3),
+        'debate_format': settings.get('format', 'sequential'),
+        'parallelism': settings.get('parallelism', 2),
+    }
+
+class DebateState:
     """
-    # .env 로드 및 클라이언트 설정
-    load_dotenv(override=True)
-    client = OpenAI(
-        base_url=os.getenv("OLLAMA_BASE_URL"),
-        api_key="ollama",
+    토론의 발언 순서와 대화 기록을 관리하는 클래스.
+    동기(stream_debate)와 비동기(astream_debate) 스트리밍이 같은 진행 규칙을 공유합니다.
+
+    페르소나마다 자신의 시스템 프롬프트가 맨 앞에 고정된 대화 기록을 따로 두고, 뒤에 추가만 합니다.
+    (자신의 발언은 assistant, 상대 발언과 진행 지시는 user 메시지)
+    한 기록을 공유하면서 맨 앞 시스템 프롬프트를 턴마다 바꾸면 백엔드의 프롬프트(KV) 캐시가
+    매번 무효화되지만, 이렇게 하면 각 호출이 이미 처리한 접두사(prefix)를 이어 붙이게 됩니다.
+
+    simultaneous=True이면 라운드마다 두 페르소나가 직전 라운드의 상대 발언에 동시에 답하고,
+    라운드가 끝나면 record_round로 두 발언을 한꺼번에 기록합니다.
+    """
+    SPEAKERS = ("찬성 측", "반대 측")
+    # 상대 발언 뒤에 붙는 진행 지시 (발언자 순서와 같음)
+    INSTRUCTIONS = (
+        "이러한 우려에 대해 당신의 긍정적인 반박 의견을 제시해주세요.",
+        "위 주장에 대해 당신의 비판적인 견해를 제시해주세요.",
     )
 
-    # --- 토론 설정 ---
-    debate_rounds = 3
-    model = os.getenv("OLLAMA_MODEL")
+    def __init__(self, topic: str, persona1: str, persona2: str, debate_rounds: int = 3, memory_factory=None,
+                 simultaneous: bool = False):
+        self.topic = topic
+        self.debate_rounds = debate_rounds
+        self.simultaneous = simultaneous
+        self.turn = 0
 
-    # 파라미터로 받은 페르소나 설정
-    persona_1_system_prompt = {"role": "system", "content": persona1}
-    persona_2_system_prompt = {"role": "system", "content": persona2}
+        # 파라미터로 받은 페르소나 설정 (페르소나별 시스템 프롬프트)
+        self.system_prompts = (
+            {"role": "system", "content": persona1},
+            {"role": "system", "content": persona2},
+        )
 
-    yield f"<h2>토론 주제: {topic}</h2>"
+        # 첫 발언자는 페르소나 1 (찬성 측)으로 고정
+        self.speaker = 0
 
-    conversation_history = []
-    # 첫 발언자는 페르소나 1 (찬성 측)으로 고정
-    current_speaker_name = "찬성 측"
-    current_speaker_prompt = persona_1_system_prompt
-    
-    initial_message = {
-        "role": "user",
-        "content": f"'{topic}'에 대한 당신의 입장을 밝혀주세요. 토론을 시작하겠습니다."
-    }
-    conversation_history.append(initial_message)
+        initial_message = {
+            "role": "user",
+            "content": f"'{topic}'에 대한 당신의 입장을 밝혀주세요. 토론을 시작하겠습니다."
+        }
+        # 페르소나별 대화 기록 (시스템 프롬프트 제외). 반대 측 기록은 찬성 측 첫 발언으로 시작합니다.
+        # 동시 발언 형식에서는 두 페르소나 모두 같은 첫 메시지로 시작합니다.
+        self.histories = ([initial_message], [dict(initial_message)] if simultaneous else [])
+
+        # memory_factory가 있으면 페르소나마다 DebateMemory를 두어 오래된 턴은 요약으로 보냅니다
+        self.memories = (
+            (memory_factory(), memory_factory()) if memory_factory is not None else (None, None)
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.turn >= self.debate_rounds * 2
+
+    @property
+    def current_speaker_name(self) -> str:
+        return self.SPEAKERS[self.speaker]
+
+    @property
+    def round(self) -> int:
+        """진행 중인 라운드 번호 (1부터)"""
+        return self.turn // 2 + 1
+
+    def messages_for_api(self, speaker: int = None) -> list:
+        """발언자(기본값: 현재 발언자)의 시스템 프롬프트 + 그 발언자의 대화 기록."""
+        speaker = self.speaker if speaker is None else speaker
+        history = self.histories[speaker]
+        memory = self.memories[speaker]
+        if memory is not None:
+            history = memory.messages(history)
+        return [self.system_prompts[speaker]] + history
+
+    def summary_request(self, model: str, speaker: int = None):
+        """발언자의 토론 기억 요약을 갱신할 때가 되었으면 요약 요청 인자를, 아니면 None을 반환합니다."""
+        speaker = self.speaker if speaker is None else speaker
+        memory = self.memories[speaker]
+        if memory is None:
+            return None
+        # 페르소나별 기록에서 assistant는 그 발언자, user는 상대 측의 발언(과 진행 지시)입니다
+        return memory.summary_request(self.histories[speaker], model,
+                                      speakers=(self.SPEAKERS[speaker],), others=self.SPEAKERS[1 - speaker])
+
+    def apply_summary(self, summary: str, speaker: int = None):
+        """summary_request로 요청한 요약 결과를 발언자의 토론 기억에 반영합니다."""
+        speaker = self.speaker if speaker is None else speaker
+        self.memories[speaker].apply_summary(summary)
+
+    def record(self, ai_response: str):
+        """AI 응답을 두 페르소나의 기록에 추가하고 다음 발언자로 넘깁니다."""
+        self.histories[self.speaker].append({"role": "assistant", "content": ai_response})
+        self.turn += 1
+
+        # 상대 측에게는 이 발언을 진행 지시와 함께 user 메시지로 전달합니다
+        opponent = 1 - self.speaker
+        content = f"상대 측 발언:\n{ai_response}\n\n{self.INSTRUCTIONS[opponent]}"
+        if not self.histories[opponent]:
+            content = f"'{self.topic}'에 대한 토론입니다. {content}"
+        self.histories[opponent].append({"role": "user", "content": content})
+        self.speaker = opponent
+
+    def record_round(self, responses):
+        """(동시 발언 형식) 한 라운드의 두 발언을 기록합니다. 다음 라운드에는 각자 상대의 이번 발언에 답합니다."""
+        for speaker, ai_response in enumerate(responses):
+            self.histories[speaker].append({"role": "assistant", "content": ai_response})
+        for speaker in (0, 1):
+            content = f"상대 측 발언:\n{responses[1 - speaker]}\n\n{self.INSTRUCTIONS[speaker]}"
+            self.histories[speaker].append({"role": "user", "content": content})
+        self.turn += 2
+
+def refresh_memory(state: DebateState, client, model: str, speaker: int = None):
+    """필요하면 오래된 턴의 요약을 갱신합니다. 실패하면 이번 턴은 전체 기록을 그대로 보냅니다."""
+    completion_kwargs = state.summary_request(model, speaker)
+    if completion_kwargs is None:
+        return
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(**completion_kwargs)
+    except Exception:
+        metrics.record_error('debate_summary', model)
+        return
+    metrics.observe_request('debate_summary', model, time.perf_counter() - started, response.usage)
+    state.apply_summary(response.choices[0].message.content, speaker)
+
+async def arefresh_memory(state: DebateState, client, model: str, speaker: int = None):
+    """refresh_memory의 비동기 버전입니다."""
+    completion_kwargs = state.summary_request(model, speaker)
+    if completion_kwargs is None:
+        return
+    started = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**completion_kwargs)
+    except Exception:
+        metrics.record_error('debate_summary', model)
+        return
+    metrics.observe_request('debate_summary', model, time.perf_counter() - started, response.usage)
+    state.apply_summary(response.choices[0].message.content, speaker)
+
+def debate_slots(options: dict) -> int:
+    """토론이 동시에 쓰는 업스트림 호출 수 (스케줄러의 슬롯 수)"""
+    if options.get('format') == 'simultaneous':
+        return options.get('parallelism', MAX_PARALLELISM)
+    return 1
+
+def debate_event(event_type: str, **fields) -> dict:
+    """
+    토론 스트림 이벤트를 만듭니다.
+
+    이벤트 종류:
+    - queued: {position} 업스트림 슬롯을 기다리는 중 (debate_runs에서 보냄)
+    - debate_start: {topic, format}
+    - turn_start: {turn, speaker, round} 한 발언의 시작
+    - delta: {turn, text} 생성된 토큰 조각
+    - turn_end: {turn, usage} 한 발언의 끝 (usage: 백엔드가 알려준 prompt_tokens/completion_tokens)
+    - error: {message}
+    - debate_end: 토론 종료
+
+    동시 발언 형식에서는 두 발언의 delta가 섞여 오므로, 클라이언트는 turn으로 발언을 구분합니다.
+    """
+    return {'type': event_type, **fields}
+
+DEBATE_EXPIRED_MESSAGE = "토론 기록이 만료되었습니다. 토론을 다시 시작해주세요."
+DEBATE_SETTINGS_MISSING_MESSAGE = "토론 설정이 만료되었거나 없습니다. 페이지를 새로고침하여 다시 시도해주세요."
+
+def debate_notice_events(message: str) -> list:
+    """토론을 시작하거나 이어 받을 수 없을 때 오류를 보여주고 스트림을 닫는 이벤트"""
+    return [debate_event('error', message=message), debate_event('debate_end')]
+
+def stream_turn(client, model: str, messages: list, usage: dict = None):
+    """
+    한 발언을 스트리밍으로 생성하며 토큰 조각을 생성(yield)하고, 호출 지표를 기록합니다.
+    usage 사전을 주면 끝난 뒤 prompt_tokens/completion_tokens를 채웁니다.
+    """
+    chunk_usage = None
+    first_token = True
+    started = time.perf_counter()
+    try:
+        stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={'include_usage': True},
+        )
+        for chunk in stream:
+            if getattr(chunk, 'usage', None) is not None:
+                chunk_usage = chunk.usage
+            delta = delta_text(chunk)
+            if delta:
+                if first_token:
+                    metrics.observe_first_token('debate', model, time.perf_counter() - started)
+                    first_token = False
+                yield delta
+    except Exception:
+        metrics.record_error('debate', model)
+        raise
+    metrics.observe_request('debate', model, time.perf_counter() - started, chunk_usage)
+    if usage is not None and chunk_usage is not None:
+        usage['prompt_tokens'] = chunk_usage.prompt_tokens
+        usage['completion_tokens'] = chunk_usage.completion_tokens
+
+async def astream_turn(client, model: str, messages: list, usage: dict = None):
+    """stream_turn의 비동기 버전입니다."""
+    chunk_usage = None
+    first_token = True
+    started = time.perf_counter()
+    try:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={'include_usage': True},
+        )
+        # 발언 도중에 취소되거나 닫혀도 응답 연결을 바로 닫습니다
+        async with stream:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    chunk_usage = chunk.usage
+                delta = delta_text(chunk)
+                if delta:
+                    if first_token:
+                        metrics.observe_first_token('debate', model, time.perf_counter() - started)
+                        first_token = False
+                    yield delta
+    except Exception:
+        metrics.record_error('debate', model)
+        raise
+    metrics.observe_request('debate', model, time.perf_counter() - started, chunk_usage)
+    if usage is not None and chunk_usage is not None:
+        usage['prompt_tokens'] = chunk_usage.prompt_tokens
+        usage['completion_tokens'] = chunk_usage.completion_tokens
 
-    for i in range(debate_rounds * 2):
-        messages_for_api = [current_speaker_prompt] + conversation_history
+def _error_event(error: Exception) -> dict:
+    return debate_event('error', message=f"API 호출 중 오류가 발생했습니다: {error}")
+
+def _sequential_rounds(state: DebateState, clients: list, model: str):
+    """차례대로 한 명씩 발언합니다."""
+    while not state.finished:
+        turn = state.turn + 1
+        client = clients[state.speaker % len(clients)]
+        yield debate_event('turn_start', turn=turn, speaker=state.current_speaker_name, round=state.round)
 
-        yield f"<h3>--- {current_speaker_name}의 발언 ---</h3>"
-        
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages_for_api,
-                stream=False,
-            )
-            ai_response = response.choices[0].message.content
-            
-            yield f"<p>{ai_response.replace('\n', '<br>')}</p>"
-
-            conversation_history.append({"role": "assistant", "content": ai_response})
-            
-            # 다음 발언자 설정
-            if current_speaker_name == "찬성 측":
-                current_speaker_name = "반대 측"
-                current_speaker_prompt = persona_2_system_prompt
-                conversation_history.append({"role": "user", "content": "위 주장에 대해 당신의 비판적인 견해를 제시해주세요."})
-            else:
-                current_speaker_name = "찬성 측"
-                current_speaker_prompt = persona_1_system_prompt
-                conversation_history.append({"role": "user", "content": "이러한 우려에 대해 당신의 긍정적인 반박 의견을 제시해주세요."})
+            # 오래된 턴이 쌓였으면 요약을 갱신하여 프롬프트 크기를 일정하게 유지합니다
+            refresh_memory(state, client, model)
+
+            parts = []
+            usage = {}
+            for delta in stream_turn(client, model, state.messages_for_api(), usage):
+                parts.append(delta)
+                yield debate_event('delta', turn=turn, text=delta)
+
+            # 대화 기록에는 발언 전체를 남깁니다
+            state.record(''.join(parts))
+            yield debate_event('turn_end', turn=turn, usage=usage)
 
         except Exception as e:
-            yield f"<p style='color: red;'>API 호출 중 오류가 발생했습니다: {e}</p>"
+            yield _error_event(e)
             break
-    
-    yield "<h3>--- 토론 종료 ---</h3>"
\ No newline at end of file
+
+class _ConsumerStopped(Exception):
+    """이벤트를 받던 쪽이 더 이상 읽지 않을 때 생성 스레드를 멈추기 위한 예외"""
+
+
+def _put_event(events: queue.Queue, event, stopped: threading.Event):
+    """큐에 자리가 날 때까지 기다렸다가 넣습니다. 받는 쪽이 멈추면 _ConsumerStopped를 발생시킵니다."""
+    while not stopped.is_set():
+        try:
+            events.put(event, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _ConsumerStopped()
+
+def _simultaneous_rounds(state: DebateState, clients: list, model: str, parallelism: int):
+    """
+    라운드마다 두 페르소나의 발언을 스레드로 동시에 생성하고, 이벤트를 한 큐로 모아 순서대로 내보냅니다.
+    동시에 진행하는 호출 수는 parallelism으로 제한합니다. (1이면 라운드 안에서도 차례대로 호출)
+    """
+    slots = threading.Semaphore(parallelism)
+    while not state.finished:
+        events = queue.Queue(maxsize=DEBATE_EVENT_QUEUE_SIZE)
+        stopped = threading.Event()
+        responses = [None, None]
+        failed = []
+
+        def speak(speaker):
+            turn = state.turn + speaker + 1
+            client = clients[speaker % len(clients)]
+            try:
+                with slots:
+                    _put_event(events, debate_event('turn_start', turn=turn, speaker=state.SPEAKERS[speaker], round=state.round), stopped)
+                    try:
+                        refresh_memory(state, client, model, speaker)
+                        parts = []
+                        usage = {}
+                        for delta in stream_turn(client, model, state.messages_for_api(speaker), usage):
+                            parts.append(delta)
+                            _put_event(events, debate_event('delta', turn=turn, text=delta), stopped)
+                        responses[speaker] = ''.join(parts)
+                        _put_event(events, debate_event('turn_end', turn=turn, usage=usage), stopped)
+                    except _ConsumerStopped:
+                        raise
+                    except Exception as e:
+                        failed.append(speaker)
+                        _put_event(events, _error_event(e), stopped)
+                _put_event(events, None, stopped)  # 이 발언자의 이벤트 끝
+            except _ConsumerStopped:
+                pass  # 클라이언트가 연결을 끊었으므로 생성을 그만둡니다
+
+        for speaker in (0, 1):
+            threading.Thread(target=speak, args=(speaker,), daemon=True).start()
+
+        try:
+            remaining = 2
+            while remaining:
+                event = events.get()
+                if event is None:
+                    remaining -= 1
+                    continue
+                yield event
+        finally:
+            # 클라이언트가 연결을 끊으면 큐에서 기다리던 생성 스레드도 멈춥니다
+            stopped.set()
+
+        # 한쪽이라도 실패하면 이번 라운드는 마무리하고 토론을 멈춥니다
+        if failed:
+            break
+        state.record_round(responses)
+
+async def _asequential_rounds(state: DebateState, clients: list, model: str):
+    """_sequential_rounds의 비동기 버전입니다."""
+    while not state.finished:
+        turn = state.turn + 1
+        client = clients[state.speaker % len(clients)]
+        yield debate_event('turn_start', turn=turn, speaker=state.current_speaker_name, round=state.round)
+
+        try:
+            await arefresh_memory(state, client, model)
+
+            parts = []
+            usage = {}
+            async for delta in astream_turn(client, model, state.messages_for_api(), usage):
+                parts.append(delta)
+                yield debate_event('delta', turn=turn, text=delta)
+
+            state.record(''.join(parts))
+            yield debate_event('turn_end', turn=turn, usage=usage)
+
+        except Exception as e:
+            yield _error_event(e)
+            break
+
+async def _asimultaneous_rounds(state: DebateState, clients: list, model: str, parallelism: int):
+    """_simultaneous_rounds의 비동기 버전입니다. 스레드 대신 태스크와 asyncio.Queue를 사용합니다."""
+    slots = asyncio.Semaphore(parallelism)
+    while not state.finished:
+        events = asyncio.Queue(maxsize=DEBATE_EVENT_QUEUE_SIZE)
+        responses = [None, None]
+        failed = []
+
+        async def speak(speaker):
+            turn = state.turn + speaker + 1
+            client = clients[speaker % len(clients)]
+            async with slots:
+                await events.put(debate_event('turn_start', turn=turn, speaker=state.SPEAKERS[speaker], round=state.round))
+                try:
+                    await arefresh_memory(state, client, model, speaker)
+                    parts = []
+                    usage = {}
+                    # 큐에서 기다리다 취소되면 업스트림 스트림도 이 태스크 안에서 닫습니다
+                    async with contextlib.aclosing(astream_turn(client, model, state.messages_for_api(speaker), usage)) as deltas:
+                        async for delta in deltas:
+                            parts.append(delta)
+                            await events.put(debate_event('delta', turn=turn, text=delta))
+                    responses[speaker] = ''.join(parts)
+                    await events.put(debate_event('turn_end', turn=turn, usage=usage))
+                except Exception as e:
+                    failed.append(speaker)
+                    await events.put(_error_event(e))
+            await events.put(None)
+
+        tasks = [asyncio.ensure_future(speak(speaker)) for speaker in (0, 1)]
+        try:
+            remaining = 2
+            while remaining:
+                event = await events.get()
+                if event is None:
+                    remaining -= 1
+                    continue
+                yield event
+        finally:
+            # 클라이언트가 연결을 끊으면 진행 중인 생성도 취소합니다
+            for task in tasks:
+                task.cancel()
+
+        if failed:
+            break
+        state.record_round(responses)
+
+def stream_debate(topic: str, persona1: str, persona2: str, debate_rounds: int = 3,
+                  debate_format: str = 'sequential', parallelism: int = 2):
+    """
+    주어진 주제와 페르소나로 AI 토론을 실행하고,
+    발언 시작/끝과 토큰 조각을 이벤트 사전(debate_event)으로 생성(yield)합니다.
+
+    debate_format이 'simultaneous'이면 라운드마다 두 페르소나가 최대 parallelism개의 호출로 동시에 발언합니다.
+    OLLAMA_BASE_URLS에 여러 주소가 있으면 두 페르소나가 서로 다른 백엔드를 사용합니다.
+    """
+    # 백엔드별 클라이언트는 한 번만 만들어 재사용합니다
+    clients = [get_client(url) for url in backend_urls()]
+
+    # --- 토론 설정 ---
+    model = os.getenv("OLLAMA_MODEL")
+    simultaneous = debate_format == 'simultaneous'
+    state = DebateState(topic, persona1, persona2, debate_rounds,
+                        memory_factory=lambda: create_debate_memory(per_persona=True),
+                        simultaneous=simultaneous)
+
+    yield debate_event('debate_start', topic=topic, format=debate_format)
+    if simultaneous:
+        yield from _simultaneous_rounds(state, clients, model, parallelism)
+    else:
+        yield from _sequential_rounds(state, clients, model)
+    yield debate_event('debate_end')
+
+async def astream_debate(topic: str, persona1: str, persona2: str, debate_rounds: int = 3,
+                         debate_format: str = 'sequential', parallelism: int = 2):
+    """stream_debate의 비동기 버전입니다. (asgi_app.py에서 사용)"""
+    model = os.getenv("OLLAMA_MODEL")
+    clients = [get_async_client(url) for url in backend_urls()]
+    simultaneous = debate_format == 'simultaneous'
+    state = DebateState(topic, persona1, persona2, debate_rounds,
+                        memory_factory=lambda: create_debate_memory(per_persona=True),
+                        simultaneous=simultaneous)
+
+    yield debate_event('debate_start', topic=topic, format=debate_format)
+    rounds = (_asimultaneous_rounds(state, clients, model, parallelism) if simultaneous
+              else _asequential_rounds(state, clients, model))
+    async for event in rounds:
+        yield event
+    yield debate_event('debate_end')
@@ -0,0 +1,127 @@
+"""
+토론 기억(memory) 모드
+
+토론은 매 턴 [시스템 프롬프트] + 대화 기록 전체를 보내므로 턴마다 프롬프트가 두 메시지씩 늘어나고,
+로컬 Ollama의 프롬프트 처리 시간도 라운드가 진행될수록 길어집니다.
+
+DebateMemory는 최근 recent_turns 턴만 그대로 보내고, 그보다 오래된 턴은 짧은 요약 하나로 접습니다.
+요약은 접을 턴이 recent_turns만큼 쌓일 때마다 (이전 요약 + 새로 접히는 턴)으로 갱신하므로
+요약 호출은 recent_turns 턴에 한 번이고, 한 턴의 프롬프트는 최대 2 * recent_turns 턴 + 요약으로 일정합니다.
+
+대화 기록 형식 (DebateState의 페르소나별 기록, debate.py의 conversation_history):
+[첫 user 메시지, 발언 1(assistant), 다음 user 메시지 1, 발언 2, 다음 user 메시지 2, ...]
+DebateState는 페르소나마다 기록과 기억을 따로 두므로, 그 기록의 한 턴(자기 발언 + 이어지는 상대 발언)은
+토론 전체로는 두 턴입니다. DEBATE_MEMORY_TURNS는 토론 전체의 턴 수로 세고, 페르소나별 기억은
+persona_turns()로 절반을 써서 두 경우 모두 같은 수의 최근 발언을 그대로 보냅니다.
+
+기본값(4턴)이면 두 방식 모두 5라운드부터 요약을 시작합니다. 기본 3라운드 토론은 전체 기록이
+창 안에 들어가므로 요약 호출이 없고, 기억 모드는 라운드가 4보다 많을 때만 효과가 있습니다.
+요약기가 측별로 정리할 수 있도록 요약할 기록의 각 줄에는 호출하는 쪽이 알려준 발언자 이름을 붙입니다.
+
+환경 변수:
+- DEBATE_MEMORY_TURNS: 그대로 보낼 최근 턴 수, 두 페르소나의 발언을 합쳐 셈 (기본값: 4, 0이면 전체 기록을 보냄)
+"""
+
+import os
+
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_SYSTEM_PROMPT = (
+    "당신은 토론 기록 요약가입니다. 이전 요약과 새 발언들을 합쳐, 찬성 측과 반대 측이 지금까지 펼친 "
+    "핵심 주장과 반박을 측별로 정리해주세요. 8문장 이내로, 요약만 출력하세요."
+)
+
+
+class DebateMemory:
+    """
+    최근 턴은 그대로, 오래된 턴은 누적 요약으로 보내는 토론 기억
+
+    Args:
+        recent_turns: 그대로 보낼 최근 턴 수
+    """
+
+    def __init__(self, recent_turns=4):
+        self.recent_turns = recent_turns
+        self.summary = None
+        self.folded_end = 1  # 요약에 접힌 기록의 끝 위치 (0번 첫 메시지는 항상 그대로 보냄)
+        self._pending_end = None
+
+    def summary_request(self, history, model, speakers=("발언",), others="상대 측/진행자"):
+        """
+        접을 턴이 충분히 쌓였으면 요약 갱신 요청 인자를, 아니면 None을 반환합니다.
+        요청이 성공하면 apply_summary로 결과를 넘겨주세요.
+
+        Args:
+            speakers: assistant 발언에 붙일 발언자 이름. 여러 개면 기록 처음부터 발언 순서대로 돌아가며 붙입니다.
+                (두 페르소나가 한 기록을 쓰는 debate.py는 ("찬성 측 ...", "반대 측 ..."))
+            others: user 메시지(상대 발언, 진행 지시)에 붙일 이름
+        """
+        verbatim_turns = (len(history) - self.folded_end) // 2
+        if verbatim_turns < 2 * self.recent_turns:
+            return None
+
+        # 한 턴 = 발언 + 다음 지시이므로 접는 위치는 항상 발언 앞에 놓입니다
+        self._pending_end = len(history) - 2 * self.recent_turns
+        # 이미 접힌 발언 수부터 세어야 돌아가며 붙는 발언자 이름이 실제 순서와 맞습니다
+        turn = sum(1 for message in history[:self.folded_end] if message['role'] == 'assistant')
+        lines = []
+        for message in history[self.folded_end:self._pending_end]:
+            if message['role'] == 'assistant':
+                label = speakers[turn % len(speakers)]
+                turn += 1
+            else:
+                label = others
+            lines.append(f"{label}: {message['content']}")
+        transcript = "\n".join(lines)
+        user_content = f"새 발언:\n{transcript}"
+        if self.summary:
+            user_content = f"이전 요약:\n{self.summary}\n\n{user_content}"
+        return {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content}
+            ],
+            'max_tokens': SUMMARY_MAX_TOKENS,
+            'temperature': 0.3,
+        }
+
+    def apply_summary(self, summary):
+        """summary_request로 요청한 요약 결과를 반영합니다."""
+        self.summary = summary
+        self.folded_end = self._pending_end
+        self._pending_end = None
+
+    def refresh(self, history, client, model, speakers=("발언",), others="상대 측/진행자"):
+        """(터미널 스크립트용) 필요하면 동기 클라이언트로 요약을 갱신합니다. 실패하면 전체 기록을 유지합니다."""
+        completion_kwargs = self.summary_request(history, model, speakers, others)
+        if completion_kwargs is None:
+            return
+        try:
+            response = client.chat.completions.create(**completion_kwargs)
+        except Exception as e:
+            print(f"토론 요약 갱신 중 오류가 발생했습니다: {e}")
+            return
+        self.apply_summary(response.choices[0].message.content)
+
+    def messages(self, history):
+        """API에 보낼 대화 기록: 첫 메시지, (요약), 요약되지 않은 최근 기록"""
+        if self.summary is None:
+            return list(history)
+        summary_message = {"role": "system", "content": f"지금까지의 토론 요약:\n{self.summary}"}
+        return [history[0], summary_message] + history[self.folded_end:]
+
+
+def persona_turns(debate_turns):
+    """토론 전체의 턴 수를 페르소나별 기록의 턴 수(자기 발언 + 상대 발언)로 바꿉니다."""
+    return max(1, (debate_turns + 1) // 2)
+
+
+def create_debate_memory(per_persona=False):
+    """
+    환경 변수 설정에 맞는 토론 기억을 만듭니다. 0이면 None (전체 기록 사용).
+    per_persona=True이면 페르소나별 기록(DebateState)에 맞춰 창을 턴 수의 절반으로 잡습니다.
+    """
+    recent_turns = int(os.getenv('DEBATE_MEMORY_TURNS', '4'))
+    if recent_turns <= 0:
+        return None
+    return DebateMemory(persona_turns(recent_turns) if per_persona else recent_turns)
@@ -0,0 +1,144 @@
+"""
+토론 주제별 페르소나 캐시
+
+"페르소나 생성"을 누를 때마다 JSON 모드 생성을 한 번씩 다시 하면, 인기 있는 주제는 같은 페르소나를
+끝없이 다시 만들게 됩니다. 정규화한 주제 문자열을 키로 성공한 결과를 보관하고, 같은 주제가 다시 오면
+바로 돌려줍니다.
+
+주제 비교 방식 (PERSONA_CACHE_MATCH):
+- exact: 정규화한 주제가 같을 때만 (대소문자, 공백, 문장 부호 차이는 무시) (기본값)
+- fuzzy: 문자열 유사도(difflib)가 PERSONA_CACHE_SIMILARITY 이상인 주제도 같은 주제로 봅니다
+- embedding: 주제 임베딩의 코사인 유사도로 비교합니다 (OLLAMA_EMBED_MODEL 필요)
+fuzzy/embedding은 "AI는 사회에 이롭다"와 "AI는 사회에 해롭다"처럼 한 글자로 입장이 뒤집히는 주제도
+같은 주제로 볼 수 있으므로, 주제 표현이 정해져 있는 경우에만 골라 쓰세요.
+
+"페르소나 재생성"은 캐시를 건너뛰고 새로 생성한 결과로 덮어씁니다.
+
+환경 변수:
+- PERSONA_CACHE_SIZE: 보관할 최대 주제 수 (기본값: 256, 0이면 캐시 사용 안 함)
+- PERSONA_CACHE_MATCH: exact / fuzzy / embedding (기본값: exact)
+- PERSONA_CACHE_SIMILARITY: 같은 주제로 볼 최소 유사도 (기본값: fuzzy 0.9, embedding 0.92)
+- OLLAMA_EMBED_MODEL: embedding 방식에서 쓸 임베딩 모델
+"""
+
+import difflib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+MATCH_MODES = ('exact', 'fuzzy', 'embedding')
+DEFAULT_SIMILARITY = {'fuzzy': 0.9, 'embedding': 0.92}
+
+
+def normalize_topic(topic):
+    """비교용 주제 문자열: 유니코드 정규화, 소문자, 문장 부호 제거, 공백 정리"""
+    text = unicodedata.normalize('NFKC', topic).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+class PersonaCache:
+    """
+    크기가 제한된 주제별 페르소나 LRU 캐시
+
+    Args:
+        max_entries: 보관할 최대 주제 수
+        match: 주제 비교 방식 (exact / fuzzy / embedding)
+        similarity: fuzzy/embedding 방식에서 같은 주제로 볼 최소 유사도
+    """
+
+    def __init__(self, max_entries=256, match='exact', similarity=None):
+        if match not in MATCH_MODES:
+            raise ValueError(f"지원하지 않는 주제 비교 방식입니다: {match}")
+        self.max_entries = max_entries
+        self.match = match
+        self.similarity = similarity if similarity is not None else DEFAULT_SIMILARITY.get(match, 1.0)
+        self._entries = OrderedDict()  # 정규화한 주제 -> (페르소나, 정규화한 임베딩 또는 None)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.near_hits = 0  # 비슷한 주제로 찾은 횟수 (hits에 포함)
+        self.misses = 0
+
+    @property
+    def uses_embeddings(self):
+        return self.match == 'embedding'
+
+    def _nearest(self, key, vector):
+        """가장 비슷한 보관 주제와 유사도를 반환합니다."""
+        best_key, best_score = None, 0.0
+        for other_key, (_, other_vector) in self._entries.items():
+            if self.match == 'embedding':
+                if vector is None or other_vector is None:
+                    continue
+                score = float(np.dot(vector, other_vector))
+            else:
+                matcher = difflib.SequenceMatcher(None, key, other_key)
+                # 빠른 상한 검사로 확실히 다른 주제는 정확한 비교를 건너뜁니다
+                if matcher.real_quick_ratio() < self.similarity or matcher.quick_ratio() < self.similarity:
+                    continue
+                score = matcher.ratio()
+            if score > best_score:
+                best_key, best_score = other_key, score
+        return best_key, best_score
+
+    def get(self, topic, vector=None):
+        """같거나 충분히 비슷한 주제의 페르소나를 반환합니다. 없으면 None."""
+        key = normalize_topic(topic)
+        vector = _unit(vector)
+        with self._lock:
+            found = key if key in self._entries else None
+            if found is None and self.match != 'exact':
+                nearest, score = self._nearest(key, vector)
+                if nearest is not None and score >= self.similarity:
+                    found = nearest
+                    self.near_hits += 1
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(found)
+            return dict(self._entries[found][0])
+
+    def set(self, topic, personas, vector=None):
+        """생성에 성공한 페르소나를 저장합니다. (같은 주제가 있으면 덮어씀)"""
+        key = normalize_topic(topic)
+        with self._lock:
+            self._entries[key] = (dict(personas), _unit(vector))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _unit(vector):
+    """코사인 유사도를 내적으로 구할 수 있도록 길이 1인 float32 벡터로 바꿉니다."""
+    if vector is None:
+        return None
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else None
+
+
+def create_persona_cache():
+    """환경 변수 설정에 맞는 페르소나 캐시를 만듭니다. 크기가 0이면 None (캐시 사용 안 함)."""
+    max_entries = int(os.getenv('PERSONA_CACHE_SIZE', '256'))
+    if max_entries <= 0:
+        return None
+    match = os.getenv('PERSONA_CACHE_MATCH', 'exact')
+    similarity = os.getenv('PERSONA_CACHE_SIMILARITY')
+    return PersonaCache(max_entries, match, float(similarity) if similarity else None)
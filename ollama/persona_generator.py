@@ -1,28 +1,23 @@
 import os
+import time
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
+from ollama.client import get_async_client, get_client
+from ollama.persona_cache import create_persona_cache
+from chat_service import delta_text
+from metrics import metrics
 
-def generate_personas(topic: str) -> dict:
-    """
-    주어진 토론 주제에 대해 LLM을 사용하여 두 개의 대립하는 페르소나를 생성합니다.
+# .env 파일에서 환경 변수 로드 (모듈을 불러올 때 한 번만)
+load_dotenv()
 
-    Args:
-        topic: 토론 주제.
+# 주제별 페르소나 캐시 (PERSONA_CACHE_SIZE=0이면 None)
+persona_cache = create_persona_cache()
 
-    Returns:
-        'persona1'과 'persona2' 설명을 포함하는 사전 또는 오류 메시지.
-    """
-    load_dotenv(override=True)
-    
-    try:
-        client = OpenAI(
-            base_url=os.getenv("OLLAMA_BASE_URL"),
-            api_key="ollama",
-        )
-        model = os.getenv("OLLAMA_MODEL")
+PERSONA_KEYS = ("persona1", "persona2")
+# 스트리밍 생성에서 JSON 형식이 깨졌을 때 최대 시도 횟수
+MAX_PERSONA_ATTEMPTS = 2
 
-        system_prompt = """
+SYSTEM_PROMPT = """
         당신은 토론의 사회자이자 작가입니다. 주어진 토론 주제에 대해, 두 명의 대립하는 페르소나를 생성하는 역할을 합니다.
         각 페르소나는 명확한 찬성 또는 반대 입장을 가져야 합니다.
         결과는 반드시 다음 JSON 형식으로만 제공해야 합니다. 다른 설명은 일절 포함하지 마세요.
@@ -33,36 +28,379 @@ def generate_personas(topic: str) -> dict:
         }
         """
 
-        user_prompt = f"""
+def build_persona_messages(topic: str) -> list:
+    """페르소나 생성을 위한 메시지 목록을 만듭니다."""
+    user_prompt = f"""
         토론 주제: "{topic}"
 
         위 주제에 대한 찬성 페르소나 1과 반대 페르소나 2를 생성해주세요.
         각 페르소나 설명의 마지막에는 "또한, 당신의 모든 답변은 반드시 5줄 이내로 간결하게 작성해야 합니다." 라는 문장을 반드시 포함시켜 주세요.
         """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def parse_personas(generated_text: str) -> dict:
+    """LLM의 JSON 응답을 페르소나 사전으로 변환합니다."""
+    try:
+        personas = json.loads(generated_text)
+    except json.JSONDecodeError:
+        return {"error": "LLM의 응답이 JSON 형식이 아닙니다.", "raw_response": generated_text}
+
+    if "persona1" in personas and "persona2" in personas:
+        return personas
+    return {"error": "LLM이 유효한 페르소나를 생성하지 못했습니다."}
+
+class MalformedPersonaJSON(ValueError):
+    """스트리밍 중인 JSON 모드 출력이 기대한 형식에서 벗어났을 때 발생합니다."""
+
+
+class PersonaStreamParser:
+    """
+    JSON 모드 출력을 조각 단위로 읽어, 문자열 값이 닫히는 즉시 (키, 값)을 돌려주는 증분 파서.
+
+    문자열 값만 있는 평평한 객체({"persona1": "...", "persona2": "..."})만 받아들이며,
+    그 밖의 문자(앞뒤 설명, 코드 블록, 숫자나 객체 값 등)가 보이면 바로 MalformedPersonaJSON을 발생시켜
+    생성이 끝나기 전에 중단할 수 있게 합니다.
+    """
+
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    # 문자열 밖의 상태에서 기대하는 문자와 다음 상태
+    TRANSITIONS = {
+        'start': {'{': 'key_or_end'},
+        'key_or_end': {'"': 'key', '}': 'end'},
+        'next_key': {'"': 'key'},
+        'colon': {':': 'value_start'},
+        'value_start': {'"': 'value'},
+        'comma_or_end': {',': 'next_key', '}': 'end'},
+        'end': {},
+    }
+
+    def __init__(self):
+        self.state = 'start'
+        self._chars = []
+        self._key = None
+        self._escape = None  # 백슬래시 뒤에 모은 문자 (None이면 이스케이프 중이 아님)
+
+    @property
+    def done(self) -> bool:
+        """객체가 닫혔는지 여부"""
+        return self.state == 'end'
+
+    def feed(self, text: str) -> list:
+        """조각을 읽고, 이번 조각에서 완성된 (키, 값) 목록을 반환합니다."""
+        fields = []
+        for char in text:
+            if self.state in ('key', 'value'):
+                field = self._string_char(char)
+                if field is not None:
+                    fields.append(field)
+            elif not char.isspace():
+                next_state = self.TRANSITIONS[self.state].get(char)
+                if next_state is None:
+                    raise MalformedPersonaJSON(f"JSON 형식이 아닙니다: {char!r} (상태: {self.state})")
+                self.state = next_state
+        return fields
+
+    def _string_char(self, char):
+        if self._escape is not None:
+            self._escape += char
+            if self._escape == 'u' or (self._escape.startswith('u') and len(self._escape) < 5):
+                return None
+            if self._escape.startswith('u'):
+                try:
+                    self._append(chr(int(self._escape[1:], 16)))
+                except ValueError:
+                    raise MalformedPersonaJSON(f"잘못된 유니코드 이스케이프입니다: \\{self._escape}")
+            elif self._escape in self.ESCAPES:
+                self._chars.append(self.ESCAPES[self._escape])
+            else:
+                raise MalformedPersonaJSON(f"잘못된 이스케이프입니다: \\{self._escape}")
+            self._escape = None
+            return None
+
+        if char == '\\':
+            self._escape = ''
+            return None
+        if char != '"':
+            # 모델이 문자열 안에 줄바꿈을 그대로 넣는 경우가 있어 제어 문자도 받아들입니다 (json.loads strict=False와 같음)
+            self._chars.append(char)
+            return None
+
+        text = ''.join(self._chars)
+        self._chars = []
+        if self.state == 'key':
+            self._key = text
+            self.state = 'colon'
+            return None
+        self.state = 'comma_or_end'
+        return self._key, text
+
+    def _append(self, char):
+        """\\uXXXX로 나뉘어 온 서로게이트 쌍은 한 글자로 합칩니다."""
+        if self._chars and '\ud800' <= self._chars[-1] <= '\udbff' and '\udc00' <= char <= '\udfff':
+            high = self._chars.pop()
+            char = chr(0x10000 + ((ord(high) - 0xD800) << 10) + (ord(char) - 0xDC00))
+        self._chars.append(char)
+
+
+def _topic_embedding(client, topic: str):
+    """(embedding 비교 방식) 주제 임베딩. 실패하면 None을 반환하여 정확히 같은 주제만 비교합니다."""
+    try:
+        response = client.embeddings.create(model=os.getenv("OLLAMA_EMBED_MODEL"), input=topic)
+    except Exception:
+        return None
+    return response.data[0].embedding
+
+async def _atopic_embedding(client, topic: str):
+    """_topic_embedding의 비동기 버전입니다."""
+    try:
+        response = await client.embeddings.create(model=os.getenv("OLLAMA_EMBED_MODEL"), input=topic)
+    except Exception:
+        return None
+    return response.data[0].embedding
+
+def generate_personas(topic: str, force: bool = False) -> dict:
+    """
+    주어진 토론 주제에 대해 LLM을 사용하여 두 개의 대립하는 페르소나를 생성합니다.
+    같거나 비슷한 주제로 만든 페르소나가 캐시에 있으면 생성하지 않고 바로 돌려줍니다.
+
+    Args:
+        topic: 토론 주제.
+        force: True이면 캐시를 건너뛰고 새로 생성합니다. ("페르소나 재생성")
 
+    Returns:
+        'persona1'과 'persona2' 설명을 포함하는 사전 또는 오류 메시지.
+    """
+    client = get_client()
+    model = os.getenv("OLLAMA_MODEL")
+
+    vector = None
+    if persona_cache is not None:
+        if persona_cache.uses_embeddings:
+            vector = _topic_embedding(client, topic)
+        if not force:
+            cached = persona_cache.get(topic, vector)
+            if cached is not None:
+                metrics.record_cache_hit('personas')
+                return cached
+
+    try:
+        started = time.perf_counter()
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=build_persona_messages(topic),
             temperature=0.7,
             response_format={"type": "json_object"}, # JSON 모드 사용
         )
+        metrics.observe_request('personas', model, time.perf_counter() - started, response.usage)
 
-        generated_text = response.choices[0].message.content
-        personas = json.loads(generated_text)
+        personas = parse_personas(response.choices[0].message.content)
 
-        if "persona1" in personas and "persona2" in personas:
-            return personas
-        else:
-            return {"error": "LLM이 유효한 페르소나를 생성하지 못했습니다."}
+    except Exception as e:
+        metrics.record_error('personas', model)
+        return {"error": f"페르소나 생성 중 오류 발생: {str(e)}"}
+
+    # 생성에 성공한 결과만 저장합니다
+    if persona_cache is not None and "error" not in personas:
+        persona_cache.set(topic, personas, vector)
+    return personas
+
+async def agenerate_personas(topic: str, force: bool = False) -> dict:
+    """generate_personas의 비동기 버전입니다. (asgi_app.py에서 사용)"""
+    client = get_async_client()
+    model = os.getenv("OLLAMA_MODEL")
+
+    vector = None
+    if persona_cache is not None:
+        if persona_cache.uses_embeddings:
+            vector = await _atopic_embedding(client, topic)
+        if not force:
+            cached = persona_cache.get(topic, vector)
+            if cached is not None:
+                metrics.record_cache_hit('personas')
+                return cached
+
+    try:
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=build_persona_messages(topic),
+            temperature=0.7,
+            response_format={"type": "json_object"}, # JSON 모드 사용
+        )
+        metrics.observe_request('personas', model, time.perf_counter() - started, response.usage)
+
+        personas = parse_personas(response.choices[0].message.content)
 
-    except json.JSONDecodeError:
-        return {"error": "LLM의 응답이 JSON 형식이 아닙니다.", "raw_response": generated_text}
     except Exception as e:
+        metrics.record_error('personas', model)
         return {"error": f"페르소나 생성 중 오류 발생: {str(e)}"}
 
+    if persona_cache is not None and "error" not in personas:
+        persona_cache.set(topic, personas, vector)
+    return personas
+
+def _persona_events(personas: dict) -> list:
+    return [{'type': 'persona', 'key': key, 'text': personas[key]} for key in PERSONA_KEYS]
+
+def _check_complete(parser: PersonaStreamParser, personas: dict):
+    if not parser.done:
+        raise MalformedPersonaJSON("JSON 객체가 끝나지 않았습니다.")
+    if any(key not in personas for key in PERSONA_KEYS):
+        raise MalformedPersonaJSON("LLM이 유효한 페르소나를 생성하지 못했습니다.")
+
+def stream_personas(topic: str, force: bool = False, max_attempts: int = MAX_PERSONA_ATTEMPTS):
+    """
+    페르소나를 스트리밍으로 생성하며, 각 페르소나 설명의 문자열이 닫히는 즉시 이벤트로 생성(yield)합니다.
+
+    이벤트:
+    - persona: {key, text} persona1 또는 persona2가 완성됨
+    - retry: {attempt, reason} JSON 형식이 깨져 다시 생성함 (이미 받은 페르소나는 버려야 함)
+    - error: {message}
+    - done: 두 페르소나가 모두 완성됨
+
+    JSON 형식이 깨진 것이 보이면 생성이 끝나기를 기다리지 않고 스트림을 끊은 뒤 다시 시도합니다.
+    """
+    client = get_client()
+    model = os.getenv("OLLAMA_MODEL")
+
+    vector = None
+    if persona_cache is not None:
+        if persona_cache.uses_embeddings:
+            vector = _topic_embedding(client, topic)
+        if not force:
+            cached = persona_cache.get(topic, vector)
+            if cached is not None:
+                metrics.record_cache_hit('personas')
+                yield from _persona_events(cached)
+                yield {'type': 'done'}
+                return
+
+    for attempt in range(1, max_attempts + 1):
+        parser = PersonaStreamParser()
+        personas = {}
+        usage = None
+        stream = None
+        started = time.perf_counter()
+        first_token = True
+        try:
+            stream = client.chat.completions.create(
+                model=model,
+                messages=build_persona_messages(topic),
+                temperature=0.7,
+                response_format={"type": "json_object"}, # JSON 모드 사용
+                stream=True,
+                stream_options={'include_usage': True},
+            )
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                delta = delta_text(chunk)
+                if not delta:
+                    continue
+                if first_token:
+                    first_token = False
+                    metrics.observe_first_token('personas', model, time.perf_counter() - started)
+                for key, text in parser.feed(delta):
+                    if key in PERSONA_KEYS and key not in personas:
+                        personas[key] = text
+                        yield {'type': 'persona', 'key': key, 'text': text}
+            _check_complete(parser, personas)
+
+        except MalformedPersonaJSON as e:
+            # 남은 생성을 기다리지 않고 연결을 끊습니다
+            if stream is not None:
+                stream.close()
+            metrics.record_error('personas', model)
+            if attempt < max_attempts:
+                yield {'type': 'retry', 'attempt': attempt + 1, 'reason': str(e)}
+                continue
+            yield {'type': 'error', 'message': f"페르소나 생성 중 오류 발생: {e}"}
+            return
+
+        except Exception as e:
+            metrics.record_error('personas', model)
+            yield {'type': 'error', 'message': f"페르소나 생성 중 오류 발생: {str(e)}"}
+            return
+
+        metrics.observe_request('personas', model, time.perf_counter() - started, usage)
+        if persona_cache is not None:
+            persona_cache.set(topic, personas, vector)
+        yield {'type': 'done'}
+        return
+
+async def astream_personas(topic: str, force: bool = False, max_attempts: int = MAX_PERSONA_ATTEMPTS):
+    """stream_personas의 비동기 버전입니다. (asgi_app.py에서 사용)"""
+    client = get_async_client()
+    model = os.getenv("OLLAMA_MODEL")
+
+    vector = None
+    if persona_cache is not None:
+        if persona_cache.uses_embeddings:
+            vector = await _atopic_embedding(client, topic)
+        if not force:
+            cached = persona_cache.get(topic, vector)
+            if cached is not None:
+                metrics.record_cache_hit('personas')
+                for event in _persona_events(cached):
+                    yield event
+                yield {'type': 'done'}
+                return
+
+    for attempt in range(1, max_attempts + 1):
+        parser = PersonaStreamParser()
+        personas = {}
+        usage = None
+        stream = None
+        started = time.perf_counter()
+        first_token = True
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=build_persona_messages(topic),
+                temperature=0.7,
+                response_format={"type": "json_object"}, # JSON 모드 사용
+                stream=True,
+                stream_options={'include_usage': True},
+            )
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                delta = delta_text(chunk)
+                if not delta:
+                    continue
+                if first_token:
+                    first_token = False
+                    metrics.observe_first_token('personas', model, time.perf_counter() - started)
+                for key, text in parser.feed(delta):
+                    if key in PERSONA_KEYS and key not in personas:
+                        personas[key] = text
+                        yield {'type': 'persona', 'key': key, 'text': text}
+            _check_complete(parser, personas)
+
+        except MalformedPersonaJSON as e:
+            if stream is not None:
+                await stream.close()
+            metrics.record_error('personas', model)
+            if attempt < max_attempts:
+                yield {'type': 'retry', 'attempt': attempt + 1, 'reason': str(e)}
+                continue
+            yield {'type': 'error', 'message': f"페르소나 생성 중 오류 발생: {e}"}
+            return
+
+        except Exception as e:
+            metrics.record_error('personas', model)
+            yield {'type': 'error', 'message': f"페르소나 생성 중 오류 발생: {str(e)}"}
+            return
+
+        metrics.observe_request('personas', model, time.perf_counter() - started, usage)
+        if persona_cache is not None:
+            persona_cache.set(topic, personas, vector)
+        yield {'type': 'done'}
+        return
+
 if __name__ == '__main__':
     # 테스트용 코드
     test_topic = "소셜 미디어는 사회에 긍정적인 영향을 미치는가?"
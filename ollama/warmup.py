@@ -0,0 +1,147 @@
+"""
+Ollama 모델 예열(warm-up)과 유지(keep-alive)
+
+Ollama는 한동안(기본 5분) 요청이 없으면 모델을 메모리에서 내리므로, 그 뒤 첫 토론은
+generate_personas나 stream_debate 안에서 모델 적재 시간(큰 모델은 수십 초)을 그대로 기다리게 됩니다.
+
+ModelWarmer는 앱이 시작될 때 OLLAMA_MODEL을 미리 적재하고, 앱이 떠 있는 동안 주기적으로
+keep_alive를 갱신하는 빈 요청을 보내 모델이 내려가지 않게 합니다. (Ollama /api/generate에 프롬프트 없이
+model과 keep_alive만 보내면 모델을 적재만 하고 바로 응답합니다)
+OLLAMA_BASE_URLS로 백엔드를 여럿 쓰면 백엔드마다 예열합니다.
+준비 여부와 적재 시간은 status()로 확인할 수 있습니다. (/api/model-status)
+
+환경 변수:
+- OLLAMA_WARMUP: 0이면 예열하지 않음 (기본값: 1)
+- OLLAMA_KEEP_ALIVE: 모델을 메모리에 유지할 시간 (Ollama keep_alive 형식, 기본값: 30m)
+- OLLAMA_KEEPALIVE_INTERVAL: 유지 요청 간격(초) (기본값: 240)
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+
+from ollama.client import backend_urls
+
+# 유지 요청이 실패했을 때 다시 시도하기까지의 간격(초)
+RETRY_INTERVAL = 10
+
+
+def native_base_url(base_url: str) -> str:
+    """OpenAI 호환 주소(http://host:11434/v1)에서 Ollama 고유 API 주소(http://host:11434)를 구합니다."""
+    base_url = base_url.rstrip('/')
+    return base_url[:-len('/v1')] if base_url.endswith('/v1') else base_url
+
+
+class ModelWarmer:
+    """
+    백그라운드 스레드에서 모델을 적재하고 keep_alive를 주기적으로 갱신합니다.
+
+    Args:
+        base_url: Ollama 주소 (OpenAI 호환 /v1 주소도 가능)
+        model: 예열할 모델 이름
+        keep_alive: 요청마다 갱신할 유지 시간 (예: "30m", -1이면 무기한)
+        interval: 유지 요청 간격(초). keep_alive보다 짧아야 합니다.
+    """
+
+    def __init__(self, base_url, model, keep_alive='30m', interval=240):
+        self.base_url = native_base_url(base_url)
+        self.model = model
+        self.keep_alive = keep_alive
+        self.interval = interval
+
+        self.ready = threading.Event()
+        self.load_seconds = None       # 처음 예열할 때 걸린 시간
+        self.last_ping_seconds = None  # 마지막 유지 요청에 걸린 시간
+        self.last_ping_at = None
+        self.reloads = 0               # 유지 요청 중 모델을 다시 적재해야 했던 횟수
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ping(self):
+        """모델을 적재하고 keep_alive를 갱신합니다. (걸린 시간, Ollama가 알려준 적재 시간)을 초로 반환합니다."""
+        body = json.dumps({'model': self.model, 'prompt': '', 'keep_alive': self.keep_alive}).encode('utf-8')
+        req = urllib.request.Request(f"{self.base_url}/api/generate", data=body,
+                                     headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        with urllib.request.urlopen(req, timeout=600) as response:
+            data = json.loads(response.read())
+        return time.perf_counter() - started, data.get('load_duration', 0) / 1e9
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                seconds, load_seconds = self.ping()
+            except Exception as e:
+                with self._lock:
+                    self.error = str(e)
+                self.ready.clear()
+                self._stop.wait(min(self.interval, RETRY_INTERVAL))
+                continue
+
+            with self._lock:
+                if self.load_seconds is None:
+                    self.load_seconds = seconds
+                elif load_seconds > 0.5:
+                    # 유지 요청 사이에 모델이 내려갔던 경우 (다른 모델 적재, 서버 재시작 등)
+                    self.reloads += 1
+                self.last_ping_seconds = seconds
+                self.last_ping_at = time.time()
+                self.error = None
+            self.ready.set()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """예열 스레드를 시작합니다. (이미 시작했으면 아무 일도 하지 않음)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='ollama-warmup', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """모델이 적재될 때까지 기다립니다. 준비되었으면 True."""
+        return self.ready.wait(timeout)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'base_url': self.base_url,
+                'model': self.model,
+                'ready': self.ready.is_set(),
+                'load_seconds': self.load_seconds,
+                'last_ping_seconds': self.last_ping_seconds,
+                'last_ping_at': self.last_ping_at,
+                'reloads': self.reloads,
+                'keep_alive': self.keep_alive,
+                'error': self.error,
+            }
+
+
+def create_model_warmers():
+    """
+    환경 변수 설정에 맞는 예열기 목록을 만듭니다. (OLLAMA_BASE_URLS의 백엔드마다 하나)
+    예열을 끄거나 Ollama 설정이 없으면 빈 목록입니다.
+    """
+    model = os.getenv("OLLAMA_MODEL")
+    urls = [url for url in backend_urls() if url]
+    if os.getenv('OLLAMA_WARMUP', '1') == '0' or not urls or not model:
+        return []
+    keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    if keep_alive.lstrip('-').isdigit():
+        keep_alive = int(keep_alive)  # 숫자는 초 단위 (-1이면 무기한)
+    interval = float(os.getenv('OLLAMA_KEEPALIVE_INTERVAL', '240'))
+    return [ModelWarmer(url, model, keep_alive, interval) for url in urls]
+
+
+def warmup_status(warmers) -> dict:
+    """예열기들의 상태를 모읍니다. 모든 백엔드의 모델이 적재되었을 때만 ready입니다."""
+    backends = [warmer.status() for warmer in warmers]
+    return {'ready': all(backend['ready'] for backend in backends), 'backends': backends}
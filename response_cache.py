@@ -0,0 +1,146 @@
+"""
+결정적인 봇(번역, 요약, 질문 생성)을 위한 응답 캐시
+
+같은 (모델, 시스템 프롬프트, 사용자 프롬프트, max_tokens, temperature) 요청이 다시 오면
+API를 호출하지 않고 저장된 응답을 돌려줍니다.
+
+- 메모리 계층: 크기가 제한된 LRU
+- 디스크 계층(선택): SQLite 파일에 저장되어 서버를 재시작해도 유지
+
+환경 변수:
+- RESPONSE_CACHE_SIZE: 메모리 계층의 최대 항목 수 (기본값: 1000)
+- RESPONSE_CACHE_PATH: 디스크 계층 SQLite 파일 경로 (없으면 메모리만 사용)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _normalize(text):
+    """앞뒤 공백을 없애고 연속된 공백을 하나로 줄입니다."""
+    return ' '.join(text.split())
+
+
+def make_cache_key(completion_kwargs):
+    """chat.completions.create 호출 인자로 캐시 키를 만듭니다."""
+    normalized = [
+        completion_kwargs.get('model'),
+        [[message['role'], _normalize(message['content'])] for message in completion_kwargs['messages']],
+        completion_kwargs.get('max_tokens'),
+        completion_kwargs.get('temperature'),
+    ]
+    encoded = json.dumps(normalized, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """메모리 LRU + (선택) SQLite 디스크 2계층 응답 캐시"""
+
+    # 이 횟수만큼 저장할 때마다 디스크의 만료된 항목을 정리합니다
+    PURGE_INTERVAL = 500
+
+    def __init__(self, max_entries=1000, disk_path=None):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._memory = OrderedDict()  # key -> (응답, 만료 시각)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._set_count = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            self._connection().execute("""
+                CREATE TABLE IF NOT EXISTS completion_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+    def _connection(self):
+        """스레드마다 별도의 SQLite 연결을 사용합니다."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.disk_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _remember(self, key, response, expires_at):
+        """메모리 계층에 저장하고, 크기를 넘으면 가장 오래 사용하지 않은 항목을 지웁니다."""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if self.disk_path:
+            row = self._connection().execute(
+                "SELECT response, expires_at FROM completion_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, response, ttl):
+        """응답을 ttl초 동안 캐시합니다."""
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._set_count += 1
+            purge = self._set_count % self.PURGE_INTERVAL == 0
+
+        if self.disk_path:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO completion_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at)
+            )
+            if purge:
+                connection.execute("DELETE FROM completion_cache WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self):
+        """적중/실패 횟수와 메모리 계층 크기를 반환합니다."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
+
+
+def create_response_cache():
+    """환경 변수 설정에 맞는 응답 캐시를 만듭니다."""
+    return CompletionCache(
+        max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+        disk_path=os.getenv('RESPONSE_CACHE_PATH') or None,
+    )
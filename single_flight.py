@@ -0,0 +1,229 @@
+"""
+동일한 LLM 요청 합치기 (single-flight)
+
+링크가 공유되면 같은 번역/요약 요청이나 같은 토론 주제의 페르소나 요청이 거의 동시에 몰립니다.
+같은 키의 업스트림 호출이 진행 중이면 뒤에 온 요청은 새로 호출하지 않고 그 결과(또는 스트림)를
+함께 받습니다.
+
+- SingleFlight: 스레드 기반 (app.py)
+- AsyncSingleFlight: asyncio 기반 (asgi_app.py)
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    """진행 중인 호출 하나의 결과를 담는 객체"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SharedStream:
+    """
+    업스트림 스트림의 조각을 모아 두고, 여러 구독자가 처음부터 함께 읽도록 하는 버퍼.
+    조각은 백그라운드 스레드가 채우므로 한 구독자가 연결을 끊어도 다른 구독자는 계속 받습니다.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._condition = threading.Condition()
+
+    def feed(self, iterator):
+        try:
+            for chunk in iterator:
+                with self._condition:
+                    self.chunks.append(chunk)
+                    self._condition.notify_all()
+        except Exception as e:
+            with self._condition:
+                self.error = e
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def subscribe(self):
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.chunks) and not self.done:
+                    self._condition.wait()
+                pending = self.chunks[index:]
+                index += len(pending)
+                finished = self.done and index >= len(self.chunks)
+                error = self.error
+
+            yield from pending
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 하나로 합치는 스레드 기반 구현"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.executed = 0  # 실제로 실행된 업스트림 호출 수
+        self.shared = 0    # 진행 중인 호출을 공유하여 절약한 호출 수
+
+    def do(self, key, fn):
+        """
+        fn()을 실행하고 결과를 반환합니다.
+        같은 key의 호출이 진행 중이면 fn을 실행하지 않고 그 결과를 기다립니다.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stream(self, key, start):
+        """
+        start()가 반환하는 조각 이터레이터를 백그라운드 스레드에서 읽고, 구독 이터레이터를 반환합니다.
+        같은 key의 스트림이 진행 중이면 새로 시작하지 않고 그 스트림을 처음부터 함께 읽습니다.
+        """
+        with self._lock:
+            shared_stream = self._streams.get(key)
+            if shared_stream is None:
+                shared_stream = _SharedStream()
+                self._streams[key] = shared_stream
+                self.executed += 1
+                threading.Thread(
+                    target=self._run_stream, args=(key, shared_stream, start), daemon=True
+                ).start()
+            else:
+                self.shared += 1
+
+        return shared_stream.subscribe()
+
+    def _run_stream(self, key, shared_stream, start):
+        try:
+            shared_stream.feed(start())
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'shared': self.shared,
+                'in_flight': len(self._calls) + len(self._streams),
+            }
+
+
+class _AsyncSharedStream:
+    """_SharedStream의 asyncio 버전"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._condition = asyncio.Condition()
+
+    async def feed(self, aiterator):
+        try:
+            async for chunk in aiterator:
+                async with self._condition:
+                    self.chunks.append(chunk)
+                    self._condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    async def subscribe(self):
+        index = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: index < len(self.chunks) or self.done)
+                pending = self.chunks[index:]
+                index += len(pending)
+                finished = self.done and index >= len(self.chunks)
+                error = self.error
+
+            for chunk in pending:
+                yield chunk
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class AsyncSingleFlight:
+    """같은 키의 동시 호출을 하나로 합치는 asyncio 기반 구현"""
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key, coroutine_fn):
+        """
+        coroutine_fn()을 실행하고 결과를 반환합니다.
+        호출은 별도 태스크에서 실행되므로, 먼저 요청한 클라이언트가 연결을 끊어도
+        기다리는 다른 요청에는 영향이 없습니다.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_fn())
+            self._calls[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key, start):
+        """SingleFlight.stream의 asyncio 버전. start()는 비동기 조각 이터레이터를 반환해야 합니다."""
+        shared_stream = self._streams.get(key)
+        if shared_stream is None:
+            shared_stream = _AsyncSharedStream()
+            self._streams[key] = shared_stream
+            self.executed += 1
+            task = asyncio.ensure_future(shared_stream.feed(start()))
+            task.add_done_callback(lambda _: self._streams.pop(key, None))
+        else:
+            self.shared += 1
+        return shared_stream.subscribe()
+
+    def stats(self):
+        return {
+            'executed': self.executed,
+            'shared': self.shared,
+            'in_flight': len(self._calls) + len(self._streams),
+        }
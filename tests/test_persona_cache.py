@@ -0,0 +1,40 @@
+import os
+import sys
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ollama.persona_cache import PersonaCache, create_persona_cache
+
+PERSONAS = {'persona1': "당신은 찬성 측입니다.", 'persona2': "당신은 반대 측입니다."}
+
+
+def test_default_match_is_exact(monkeypatch):
+    monkeypatch.delenv('PERSONA_CACHE_MATCH', raising=False)
+    monkeypatch.delenv('PERSONA_CACHE_SIZE', raising=False)
+    assert PersonaCache().match == 'exact'
+    assert create_persona_cache().match == 'exact'
+
+
+def test_opposite_topics_do_not_share_personas(monkeypatch):
+    monkeypatch.delenv('PERSONA_CACHE_MATCH', raising=False)
+    monkeypatch.delenv('PERSONA_CACHE_SIZE', raising=False)
+    cache = create_persona_cache()
+    cache.set("AI는 사회에 이롭다", PERSONAS)
+
+    # 한 글자 차이로 입장이 뒤집힌 주제는 다른 주제입니다
+    assert cache.get("AI는 사회에 해롭다") is None
+    assert cache.stats()['near_hits'] == 0
+
+
+def test_exact_match_ignores_case_spacing_and_punctuation():
+    cache = PersonaCache()
+    cache.set("AI는 사회에 이롭다", PERSONAS)
+    assert cache.get("  ai는   사회에 이롭다? ") == PERSONAS
+
+
+def test_fuzzy_match_is_opt_in():
+    cache = PersonaCache(match='fuzzy', similarity=0.8)
+    cache.set("AI는 사회에 이롭다", PERSONAS)
+    assert cache.get("AI는 사회에 이롭다고 본다") == PERSONAS
+    assert cache.stats()['near_hits'] == 1